@@ -0,0 +1,185 @@
+"""Esquema base
+
+Tablas tal y como las creaba Base.metadata.create_all al arrancar.
+Es idempotente: en instalaciones existentes (creadas con create_all) solo
+crea lo que falte, incluidas las columnas añadidas después (leads.updated_at).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+LEAD_TABS = ("NEW", "LEADS", "DOUBTS", "DISCARDED", "MARKETPLACE")
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+
+    def create(name, *columns, indexes=()):
+        if name in existing:
+            return
+        op.create_table(name, *columns)
+        for index_name, index_columns, unique in indexes:
+            op.create_index(index_name, name, index_columns, unique=unique)
+
+    create(
+        "countries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False, unique=True),
+        sa.Column("code", sa.String(10), nullable=False),
+        sa.Column("language", sa.String(10), nullable=False),
+        sa.Column("flag_image", sa.Text(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_countries_id", ["id"], False)]
+    )
+
+    create(
+        "country_flags",
+        sa.Column("country_id", sa.Integer(), sa.ForeignKey("countries.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("content", sa.LargeBinary(), nullable=False),
+        sa.Column("content_type", sa.String(100), nullable=False),
+        sa.Column("etag", sa.String(64), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+    create(
+        "keywords",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("country_id", sa.Integer(), sa.ForeignKey("countries.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("text", sa.String(255), nullable=False),
+        sa.Column("category", sa.String(50), nullable=True),
+        sa.Column("results_per_search", sa.Integer(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("total_searches", sa.Integer(), nullable=True),
+        sa.Column("total_results", sa.Integer(), nullable=True),
+        sa.Column("last_search_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_keywords_id", ["id"], False)]
+    )
+
+    create(
+        "lead_statuses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False, unique=True),
+        sa.Column("color", sa.String(20), nullable=True),
+        sa.Column("icon", sa.String(50), nullable=True),
+        sa.Column("order", sa.Integer(), nullable=True),
+        sa.Column("is_default", sa.Boolean(), nullable=True),
+        sa.Column("is_system", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_lead_statuses_id", ["id"], False)]
+    )
+
+    create(
+        "leads",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("country_id", sa.Integer(), sa.ForeignKey("countries.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("keyword_id", sa.Integer(), sa.ForeignKey("keywords.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("status_id", sa.Integer(), sa.ForeignKey("lead_statuses.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("name", sa.String(500), nullable=False),
+        sa.Column("url", sa.Text(), nullable=False),
+        sa.Column("domain", sa.String(255), nullable=False),
+        sa.Column("snippet", sa.Text(), nullable=True),
+        sa.Column("email", sa.String(255), nullable=True),
+        sa.Column("phone", sa.String(50), nullable=True),
+        sa.Column("cif", sa.String(20), nullable=True),
+        sa.Column("tab", sa.Enum(*LEAD_TABS, name="leadtab"), nullable=False),
+        sa.Column("is_reviewed", sa.Boolean(), nullable=True),
+        sa.Column("found_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("reviewed_at", sa.DateTime(), nullable=True),
+        sa.Column("contact_extracted", sa.Boolean(), nullable=True),
+        sa.Column("contact_extracted_at", sa.DateTime(), nullable=True),
+        indexes=[
+            ("ix_leads_id", ["id"], False),
+            ("ix_leads_domain", ["domain"], False),
+            ("ix_leads_tab", ["tab"], False),
+        ]
+    )
+
+    create(
+        "notes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("lead_id", sa.Integer(), sa.ForeignKey("leads.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_notes_id", ["id"], False)]
+    )
+
+    create(
+        "search_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("country_id", sa.Integer(), sa.ForeignKey("countries.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("keyword_id", sa.Integer(), sa.ForeignKey("keywords.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("keyword_text", sa.String(255), nullable=True),
+        sa.Column("results_count", sa.Integer(), nullable=True),
+        sa.Column("new_leads_count", sa.Integer(), nullable=True),
+        sa.Column("is_success", sa.Boolean(), nullable=True),
+        sa.Column("error_message", sa.String(500), nullable=True),
+        sa.Column("searched_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_search_logs_id", ["id"], False)]
+    )
+
+    create(
+        "keyword_suggestions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("country_id", sa.Integer(), sa.ForeignKey("countries.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("text", sa.String(255), nullable=False),
+        sa.Column("source", sa.String(50), nullable=True),
+        sa.Column("frequency", sa.Integer(), nullable=True),
+        sa.Column("websites_count", sa.Integer(), nullable=True),
+        sa.Column("is_ignored", sa.Boolean(), nullable=True),
+        sa.Column("is_added", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_keyword_suggestions_id", ["id"], False)]
+    )
+
+    create(
+        "marketplaces",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("domain", sa.String(255), nullable=False, unique=True),
+        sa.Column("name", sa.String(255), nullable=True),
+        sa.Column("is_system", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_marketplaces_id", ["id"], False)]
+    )
+
+    create(
+        "app_settings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("key", sa.String(100), nullable=False, unique=True),
+        sa.Column("value", sa.Text(), nullable=True),
+        sa.Column("description", sa.String(500), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_app_settings_id", ["id"], False)]
+    )
+
+    # Columnas añadidas a tablas que ya existían en instalaciones antiguas
+    if "leads" in existing:
+        lead_columns = {column["name"] for column in inspector.get_columns("leads")}
+        if "updated_at" not in lead_columns:
+            op.add_column("leads", sa.Column("updated_at", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    for table in (
+        "app_settings", "marketplaces", "keyword_suggestions", "search_logs", "notes",
+        "leads", "lead_statuses", "keywords", "country_flags", "countries"
+    ):
+        op.drop_table(table)
+    sa.Enum(name="leadtab").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,68 @@
+"""Índices para las consultas frecuentes
+
+- leads (country_id, tab, found_at DESC): listado por país/pestaña y exportaciones.
+- leads (country_id, domain) único: comprobación de duplicados al guardar
+  resultados de búsqueda. Antes se eliminan los duplicados que pudiera haber
+  (se conserva el lead más antiguo y se le pasan las notas de los demás).
+- search_logs (searched_at): contador de búsquedas del día e historial.
+- notes (lead_id, created_at): notas de un lead ordenadas por fecha.
+- keyword_suggestions (country_id, text): sugerencias por país.
+- keywords (country_id): keywords de un país.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Duplicados (country_id, domain): se conserva el de menor id
+    op.execute("""
+        UPDATE notes SET lead_id = (
+            SELECT MIN(keep.id) FROM leads keep
+            JOIN leads dup ON dup.country_id = keep.country_id AND dup.domain = keep.domain
+            WHERE dup.id = notes.lead_id
+        )
+        WHERE lead_id IN (
+            SELECT l.id FROM leads l
+            WHERE EXISTS (
+                SELECT 1 FROM leads older
+                WHERE older.country_id = l.country_id AND older.domain = l.domain AND older.id < l.id
+            )
+        )
+    """)
+    op.execute("""
+        DELETE FROM leads
+        WHERE EXISTS (
+            SELECT 1 FROM leads older
+            WHERE older.country_id = leads.country_id AND older.domain = leads.domain
+              AND older.id < leads.id
+        )
+    """)
+
+    op.create_index(
+        "ix_leads_country_tab_found", "leads",
+        ["country_id", "tab", sa.text("found_at DESC")]
+    )
+    op.create_index("uq_leads_country_domain", "leads", ["country_id", "domain"], unique=True)
+    op.create_index("ix_search_logs_searched_at", "search_logs", ["searched_at"])
+    op.create_index("ix_notes_lead_created", "notes", ["lead_id", "created_at"])
+    op.create_index("ix_keyword_suggestions_country_text", "keyword_suggestions", ["country_id", "text"])
+    op.create_index("ix_keywords_country_id", "keywords", ["country_id"])
+
+
+def downgrade():
+    op.drop_index("ix_keywords_country_id", table_name="keywords")
+    op.drop_index("ix_keyword_suggestions_country_text", table_name="keyword_suggestions")
+    op.drop_index("ix_notes_lead_created", table_name="notes")
+    op.drop_index("ix_search_logs_searched_at", table_name="search_logs")
+    op.drop_index("uq_leads_country_domain", table_name="leads")
+    op.drop_index("ix_leads_country_tab_found", table_name="leads")
@@ -0,0 +1,66 @@
+"""Sugerencias únicas por país y texto
+
+El índice (country_id, text) de keyword_suggestions pasa a ser único para
+guardar las sugerencias con INSERT ... ON CONFLICT. Antes se fusionan los
+duplicados que pudiera haber: se conserva la sugerencia más antigua con la
+frecuencia y el número de webs máximos, y marcada como ignorada o añadida
+si lo estaba alguna de ellas.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        UPDATE keyword_suggestions SET
+            frequency = (
+                SELECT MAX(dup.frequency) FROM keyword_suggestions dup
+                WHERE dup.country_id = keyword_suggestions.country_id AND dup.text = keyword_suggestions.text
+            ),
+            websites_count = (
+                SELECT MAX(dup.websites_count) FROM keyword_suggestions dup
+                WHERE dup.country_id = keyword_suggestions.country_id AND dup.text = keyword_suggestions.text
+            ),
+            is_ignored = EXISTS (
+                SELECT 1 FROM keyword_suggestions dup
+                WHERE dup.country_id = keyword_suggestions.country_id AND dup.text = keyword_suggestions.text
+                  AND dup.is_ignored
+            ),
+            is_added = EXISTS (
+                SELECT 1 FROM keyword_suggestions dup
+                WHERE dup.country_id = keyword_suggestions.country_id AND dup.text = keyword_suggestions.text
+                  AND dup.is_added
+            )
+        WHERE EXISTS (
+            SELECT 1 FROM keyword_suggestions dup
+            WHERE dup.country_id = keyword_suggestions.country_id AND dup.text = keyword_suggestions.text
+              AND dup.id <> keyword_suggestions.id
+        )
+    """)
+    op.execute("""
+        DELETE FROM keyword_suggestions
+        WHERE EXISTS (
+            SELECT 1 FROM keyword_suggestions older
+            WHERE older.country_id = keyword_suggestions.country_id AND older.text = keyword_suggestions.text
+              AND older.id < keyword_suggestions.id
+        )
+    """)
+
+    op.drop_index("ix_keyword_suggestions_country_text", table_name="keyword_suggestions")
+    op.create_index(
+        "uq_keyword_suggestions_country_text", "keyword_suggestions", ["country_id", "text"], unique=True
+    )
+
+
+def downgrade():
+    op.drop_index("uq_keyword_suggestions_country_text", table_name="keyword_suggestions")
+    op.create_index("ix_keyword_suggestions_country_text", "keyword_suggestions", ["country_id", "text"])
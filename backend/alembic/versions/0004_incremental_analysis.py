@@ -0,0 +1,50 @@
+"""Análisis incremental de webs
+
+- lead_analyses: último análisis de la web de cada lead (fecha, hash del
+  contenido y términos extraídos).
+- keyword_term_stats: agregado por país de los términos de todas las webs
+  analizadas, del que salen las sugerencias.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "lead_analyses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("lead_id", sa.Integer(), sa.ForeignKey("leads.id", ondelete="SET NULL"), nullable=True, unique=True),
+        sa.Column("country_id", sa.Integer(), sa.ForeignKey("countries.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("url", sa.Text(), nullable=False),
+        sa.Column("content_hash", sa.String(64), nullable=True),
+        sa.Column("terms", sa.JSON(), nullable=False),
+        sa.Column("error", sa.String(255), nullable=True),
+        sa.Column("analyzed_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_lead_analyses_country_id", "lead_analyses", ["country_id"])
+
+    op.create_table(
+        "keyword_term_stats",
+        sa.Column("country_id", sa.Integer(), sa.ForeignKey("countries.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("text", sa.String(255), primary_key=True),
+        sa.Column("source", sa.String(50), nullable=True),
+        sa.Column("frequency", sa.Integer(), nullable=False),
+        sa.Column("websites_count", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("keyword_term_stats")
+    op.drop_index("ix_lead_analyses_country_id", table_name="lead_analyses")
+    op.drop_table("lead_analyses")
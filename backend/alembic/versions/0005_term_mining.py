@@ -0,0 +1,38 @@
+"""Minería de términos
+
+- lead_analyses.tab: lado del agregado en que cuenta el análisis (también
+  se analizan las webs de los leads descartados).
+- keyword_term_stats.discarded_count: webs de leads descartados en las que
+  aparece el término.
+- keyword_suggestions.score: puntuación TF-IDF de la sugerencia.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("lead_analyses") as batch:
+        batch.add_column(sa.Column("tab", sa.String(20), nullable=False, server_default="leads"))
+    with op.batch_alter_table("keyword_term_stats") as batch:
+        batch.add_column(sa.Column("discarded_count", sa.Integer(), nullable=False, server_default="0"))
+    with op.batch_alter_table("keyword_suggestions") as batch:
+        batch.add_column(sa.Column("score", sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("keyword_suggestions") as batch:
+        batch.drop_column("score")
+    with op.batch_alter_table("keyword_term_stats") as batch:
+        batch.drop_column("discarded_count")
+    with op.batch_alter_table("lead_analyses") as batch:
+        batch.drop_column("tab")
@@ -0,0 +1,56 @@
+"""Ranking precalculado de keywords
+
+keyword_rankings: una fila por keyword (búsquedas, resultados y leads
+nuevos) y por sugerencia mejor puntuada de cada país. Las filas se crean
+al consultar el ranking de un país por primera vez.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "keyword_rankings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("country_id", sa.Integer(), sa.ForeignKey("countries.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("kind", sa.String(20), nullable=False),
+        sa.Column(
+            "keyword_id", sa.Integer(), sa.ForeignKey("keywords.id", ondelete="CASCADE"), nullable=True, unique=True
+        ),
+        sa.Column(
+            "suggestion_id", sa.Integer(), sa.ForeignKey("keyword_suggestions.id", ondelete="CASCADE"),
+            nullable=True, unique=True
+        ),
+        sa.Column("text", sa.String(255), nullable=False),
+        sa.Column("sort_value", sa.Float(), nullable=False),
+        sa.Column("category", sa.String(50), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("total_searches", sa.Integer(), nullable=True),
+        sa.Column("total_results", sa.Integer(), nullable=True),
+        sa.Column("new_leads", sa.Integer(), nullable=True),
+        sa.Column("new_leads_per_search", sa.Float(), nullable=True),
+        sa.Column("source", sa.String(50), nullable=True),
+        sa.Column("frequency", sa.Integer(), nullable=True),
+        sa.Column("websites_count", sa.Integer(), nullable=True),
+        sa.Column("score", sa.Float(), nullable=True),
+        sa.Column("is_added", sa.Boolean(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        "ix_keyword_rankings_country_kind_sort", "keyword_rankings", ["country_id", "kind", "sort_value"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_keyword_rankings_country_kind_sort", table_name="keyword_rankings")
+    op.drop_table("keyword_rankings")
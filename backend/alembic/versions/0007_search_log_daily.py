@@ -0,0 +1,64 @@
+"""Resúmenes diarios de búsquedas
+
+search_log_daily: búsquedas, resultados, leads nuevos y errores por día,
+país y keyword, calculados desde search_logs. Los registros que ya existen
+se resumen aquí mismo para que las analíticas tengan todo el historial.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "search_log_daily",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("country_id", sa.Integer(), nullable=False),
+        sa.Column("keyword_id", sa.Integer(), nullable=False),
+        sa.Column("keyword_text", sa.String(255), nullable=True),
+        sa.Column("searches", sa.Integer(), nullable=False),
+        sa.Column("results", sa.Integer(), nullable=False),
+        sa.Column("new_leads", sa.Integer(), nullable=False),
+        sa.Column("errors", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        "uq_search_log_daily_bucket", "search_log_daily", ["day", "country_id", "keyword_id"], unique=True
+    )
+    op.create_index("ix_search_log_daily_country_day", "search_log_daily", ["country_id", "day"])
+
+    # Historial existente (el marcador deja hecho hasta el último registro)
+    op.execute("""
+        INSERT INTO search_log_daily
+            (day, country_id, keyword_id, keyword_text, searches, results, new_leads, errors, updated_at)
+        SELECT
+            DATE(searched_at), COALESCE(country_id, 0), COALESCE(keyword_id, 0), MAX(keyword_text),
+            COUNT(*), COALESCE(SUM(results_count), 0), COALESCE(SUM(new_leads_count), 0),
+            SUM(CASE WHEN is_success THEN 0 ELSE 1 END), CURRENT_TIMESTAMP
+        FROM search_logs
+        WHERE searched_at IS NOT NULL
+        GROUP BY DATE(searched_at), COALESCE(country_id, 0), COALESCE(keyword_id, 0)
+    """)
+    op.execute("""
+        INSERT INTO app_settings (key, value, description, updated_at)
+        SELECT 'search_rollup_watermark', CAST(COALESCE(MAX(id), 0) AS VARCHAR(20)),
+               'Último registro de búsqueda incluido en los resúmenes diarios', CURRENT_TIMESTAMP
+        FROM search_logs
+    """)
+
+
+def downgrade():
+    op.execute("DELETE FROM app_settings WHERE key = 'search_rollup_watermark'")
+    op.drop_index("ix_search_log_daily_country_day", table_name="search_log_daily")
+    op.drop_index("uq_search_log_daily_bucket", table_name="search_log_daily")
+    op.drop_table("search_log_daily")
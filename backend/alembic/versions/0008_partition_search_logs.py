@@ -0,0 +1,130 @@
+"""Particiones mensuales de search_logs
+
+En PostgreSQL search_logs pasa a ser una tabla particionada por rango de
+searched_at, con una partición por mes (search_logs_pAAAAMM). Se crean las
+particiones de los meses con registros y las de los próximos meses, más
+una partición por defecto (search_logs_default) para los registros de
+meses sin partición, de modo que un INSERT nunca falla; se copian los
+registros y se conserva la secuencia de ids (el marcador de los
+resúmenes diarios sigue valiendo). La clave primaria pasa a ser
+(id, searched_at), que es lo que exige PostgreSQL.
+
+En SQLite la tabla no se particiona; en los dos casos searched_at pasa a
+ser obligatorio.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from datetime import date, datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    "id, country_id, keyword_id, keyword_text, results_count, new_leads_count, "
+    "is_success, error_message, searched_at"
+)
+MONTHS_AHEAD = 3
+
+
+def _columns_sql(sequence: str, searched_at: str) -> str:
+    return f"""
+        id INTEGER NOT NULL DEFAULT nextval('{sequence}'::regclass),
+        country_id INTEGER REFERENCES countries (id) ON DELETE SET NULL,
+        keyword_id INTEGER REFERENCES keywords (id) ON DELETE SET NULL,
+        keyword_text VARCHAR(255),
+        results_count INTEGER,
+        new_leads_count INTEGER,
+        is_success BOOLEAN,
+        error_message VARCHAR(500),
+        searched_at {searched_at}
+    """
+
+
+def _next_month(month: date) -> date:
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def _swap_out(bind, old_name: str) -> str:
+    """Renombra search_logs (con su clave e índices) y suelta su secuencia."""
+    sequence = bind.scalar(sa.text("SELECT pg_get_serial_sequence('search_logs', 'id')"))
+    op.execute("DROP INDEX ix_search_logs_id")
+    op.execute("DROP INDEX ix_search_logs_searched_at")
+    op.execute(f"ALTER TABLE search_logs RENAME TO {old_name}")
+    op.execute(f"ALTER TABLE {old_name} RENAME CONSTRAINT search_logs_pkey TO {old_name}_pkey")
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+    return sequence
+
+
+def _swap_in(old_name: str, sequence: str):
+    """Copia los registros a la nueva search_logs, le da la secuencia y borra la antigua."""
+    op.create_index("ix_search_logs_id", "search_logs", ["id"])
+    op.create_index("ix_search_logs_searched_at", "search_logs", ["searched_at"])
+    op.execute(f"INSERT INTO search_logs ({COLUMNS}) SELECT {COLUMNS} FROM {old_name}")
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY search_logs.id")
+    op.execute(f"DROP TABLE {old_name}")
+
+
+def upgrade():
+    bind = op.get_bind()
+    op.execute("UPDATE search_logs SET searched_at = CURRENT_TIMESTAMP WHERE searched_at IS NULL")
+
+    if bind.dialect.name != "postgresql":
+        with op.batch_alter_table("search_logs") as batch:
+            batch.alter_column("searched_at", existing_type=sa.DateTime(), nullable=False)
+        return
+
+    sequence = _swap_out(bind, "search_logs_unpartitioned")
+    op.execute(f"""
+        CREATE TABLE search_logs (
+            {_columns_sql(sequence, "TIMESTAMP WITHOUT TIME ZONE NOT NULL")},
+            PRIMARY KEY (id, searched_at)
+        ) PARTITION BY RANGE (searched_at)
+    """)
+
+    # Un mes por partición, desde el registro más antiguo hasta MONTHS_AHEAD meses después de hoy
+    first, last = bind.execute(sa.text(
+        "SELECT MIN(searched_at), MAX(searched_at) FROM search_logs_unpartitioned"
+    )).one()
+    today = datetime.utcnow().date()
+    month = (first.date() if first else today).replace(day=1)
+    end = today.replace(day=1)
+    for _ in range(MONTHS_AHEAD):
+        end = _next_month(end)
+    if last and last.date() > end:
+        end = last.date().replace(day=1)
+    while month <= end:
+        op.execute(
+            f"CREATE TABLE search_logs_p{month:%Y%m} PARTITION OF search_logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+        )
+        month = _next_month(month)
+    op.execute("CREATE TABLE search_logs_default PARTITION OF search_logs DEFAULT")
+
+    _swap_in("search_logs_unpartitioned", sequence)
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name != "postgresql":
+        with op.batch_alter_table("search_logs") as batch:
+            batch.alter_column("searched_at", existing_type=sa.DateTime(), nullable=True)
+        return
+
+    # Las particiones ya separadas (archivo) no se tocan
+    sequence = _swap_out(bind, "search_logs_partitioned")
+    op.execute(f"""
+        CREATE TABLE search_logs (
+            {_columns_sql(sequence, "TIMESTAMP WITHOUT TIME ZONE")},
+            PRIMARY KEY (id)
+        )
+    """)
+    _swap_in("search_logs_partitioned", sequence)
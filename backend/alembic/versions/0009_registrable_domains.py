@@ -0,0 +1,57 @@
+"""Dominios registrables en leads y marketplaces
+
+Los dominios se normalizan ahora con la Public Suffix List
+(app/services/domains.py): el de un lead es su dominio registrable
+("tienda.foo.co.uk" -> "foo.co.uk"). Se pasan a esa forma los leads y
+marketplaces guardados con la normalización anterior, salvo los que
+chocarían con otro ya guardado (mismo país y dominio), que se quedan como
+estaban para no mezclar leads con notas y estados distintos.
+
+La bajada no deshace el cambio: la forma anterior no se puede recuperar.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.domains import lead_domain
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def _renormalize(bind, table: str, scope: str = None):
+    """Actualiza los dominios que cambian y no chocan con otro del mismo ámbito."""
+    columns = f"id, {scope}, domain" if scope else "id, NULL, domain"
+    rows = bind.execute(sa.text(f"SELECT {columns} FROM {table}")).all()
+
+    taken = {(group, domain) for _, group, domain in rows}
+    changes = []
+    for row_id, group, domain in rows:
+        normalized = lead_domain(domain)
+        if not normalized or normalized == domain or (group, normalized) in taken:
+            continue
+        taken.discard((group, domain))
+        taken.add((group, normalized))
+        changes.append({"row_id": row_id, "domain": normalized})
+
+    statement = sa.text(f"UPDATE {table} SET domain = :domain WHERE id = :row_id")
+    for start in range(0, len(changes), BATCH_SIZE):
+        bind.execute(statement, changes[start:start + BATCH_SIZE])
+
+
+def upgrade():
+    bind = op.get_bind()
+    _renormalize(bind, "leads", scope="country_id")
+    _renormalize(bind, "marketplaces")
+
+
+def downgrade():
+    pass
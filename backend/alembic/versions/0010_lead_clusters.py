@@ -0,0 +1,115 @@
+"""Agrupación de leads de la misma empresa
+
+leads.email_domain (dominio del email, sin correo gratuito) y
+leads.cluster_id (id más bajo de los leads que comparten dominio, CIF o
+dominio de email, en todos los países), con índices en los tres campos por
+los que se agrupa. Los CIF guardados se normalizan (mayúsculas, sin
+espacios ni guiones) y se calculan los grupos de los leads existentes.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.domains import lead_domain
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Copia de app/services/lead_clusters.py en el momento de esta migración,
+# para que el resultado no cambie si cambia el servicio
+FREE_MAIL_DOMAINS = {
+    "gmail.com", "googlemail.com", "hotmail.com", "hotmail.es", "hotmail.fr", "outlook.com", "outlook.es",
+    "outlook.fr", "live.com", "live.fr", "msn.com", "yahoo.com", "yahoo.es", "yahoo.fr", "ymail.com",
+    "icloud.com", "me.com", "mac.com", "aol.com", "gmx.com", "gmx.es", "gmx.fr", "gmx.de", "mail.com",
+    "protonmail.com", "proton.me", "zoho.com", "yandex.com", "telefonica.net", "movistar.es", "terra.es",
+    "orange.fr", "wanadoo.fr", "free.fr", "laposte.net", "sfr.fr", "sapo.pt", "libero.it", "web.de"
+}
+
+_CIF_NOISE = re.compile(r"[^0-9A-Z]")
+
+
+def normalize_cif(cif):
+    if not cif:
+        return None
+    return _CIF_NOISE.sub("", cif.upper()) or None
+
+
+def email_domain(email):
+    if not email or "@" not in email:
+        return None
+    domain = lead_domain(email.rsplit("@", 1)[1])
+    return domain if domain and domain not in FREE_MAIL_DOMAINS else None
+
+
+def cluster_leads(rows):
+    """(id, domain, email_domain, cif) -> cluster_id (id más bajo de cada grupo)."""
+    parent = {}
+
+    def find(lead_id):
+        root = lead_id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[lead_id] != root:
+            parent[lead_id], lead_id = root, parent[lead_id]
+        return root
+
+    owners = {}
+    for lead_id, domain, mail_domain, cif in rows:
+        parent.setdefault(lead_id, lead_id)
+        for key in (("domain", domain), ("domain", mail_domain), ("cif", cif)):
+            if not key[1]:
+                continue
+            owner = owners.setdefault(key, lead_id)
+            if owner != lead_id:
+                a, b = find(owner), find(lead_id)
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+
+    return {lead_id: find(lead_id) for lead_id in parent}
+
+
+def upgrade():
+    with op.batch_alter_table("leads") as batch:
+        batch.add_column(sa.Column("email_domain", sa.String(255), nullable=True))
+        batch.add_column(sa.Column("cluster_id", sa.Integer(), nullable=True))
+    op.create_index("ix_leads_cluster_id", "leads", ["cluster_id"])
+    op.create_index("ix_leads_email_domain", "leads", ["email_domain"])
+    op.create_index("ix_leads_cif", "leads", ["cif"])
+
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, domain, email, cif FROM leads")).all()
+    values = {
+        row.id: {"row_id": row.id, "email_domain": email_domain(row.email), "cif": normalize_cif(row.cif)}
+        for row in rows
+    }
+    clusters = cluster_leads(
+        (row.id, row.domain, values[row.id]["email_domain"], values[row.id]["cif"]) for row in rows
+    )
+    for row_id, cluster_id in clusters.items():
+        values[row_id]["cluster_id"] = cluster_id
+
+    changes = list(values.values())
+    statement = sa.text(
+        "UPDATE leads SET email_domain = :email_domain, cif = :cif, cluster_id = :cluster_id WHERE id = :row_id"
+    )
+    for start in range(0, len(changes), BATCH_SIZE):
+        bind.execute(statement, changes[start:start + BATCH_SIZE])
+
+
+def downgrade():
+    op.drop_index("ix_leads_cif", table_name="leads")
+    op.drop_index("ix_leads_email_domain", table_name="leads")
+    op.drop_index("ix_leads_cluster_id", table_name="leads")
+    with op.batch_alter_table("leads") as batch:
+        batch.drop_column("cluster_id")
+        batch.drop_column("email_domain")
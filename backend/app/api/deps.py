@@ -3,9 +3,7 @@ Dependencias compartidas para los endpoints de la API.
 """
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
 
-from app.core.database import get_db
 from app.core.security import verify_token
 
 # Esquema de seguridad
@@ -13,12 +11,12 @@ security = HTTPBearer()
 
 
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     """
     Verifica que el usuario tiene un token válido.
-    Se usa como dependencia en los endpoints protegidos.
+    Se usa como dependencia en los endpoints protegidos. No usa la base de
+    datos: el token se verifica (o se lee de la caché) en memoria.
     """
     token = credentials.credentials
 
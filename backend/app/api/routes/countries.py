@@ -1,10 +1,10 @@
 """
 Endpoints de países.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-import base64
 
 from app.core.database import get_db
 from app.api.deps import get_current_user
@@ -14,41 +14,58 @@ from app.api.schemas import (
 from app.models.country import Country
 from app.models.keyword import Keyword
 from app.models.lead import Lead
+from app.services.domain_index import domain_index
+from app.services.flag_store import FlagStore
 
 router = APIRouter(prefix="/countries", tags=["Países"])
 
 
+def country_to_response(country: Country, keywords_count: int = 0, leads_count: int = 0) -> CountryResponse:
+    """Convierte un Country a respuesta (la bandera se devuelve solo como URL)."""
+    return CountryResponse(
+        id=country.id,
+        name=country.name,
+        code=country.code,
+        language=country.language,
+        flag_url=FlagStore.flag_url(country),
+        is_active=country.is_active,
+        created_at=country.created_at,
+        keywords_count=keywords_count,
+        leads_count=leads_count
+    )
+
+
+async def get_country_or_404(db: AsyncSession, country_id: int) -> Country:
+    """Obtiene un país por ID o lanza 404."""
+    country = await db.get(Country, country_id)
+    if not country:
+        raise HTTPException(status_code=404, detail="País no encontrado")
+    return country
+
+
+async def count_by_country(db: AsyncSession, model, country_id: int) -> int:
+    """Cuenta las filas de un modelo (Keyword, Lead) de un país."""
+    return await db.scalar(
+        select(func.count()).select_from(model).where(model.country_id == country_id)
+    )
+
+
 @router.get("", response_model=List[CountryResponse])
 async def list_countries(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Lista todos los países.
     """
-    countries = db.query(Country).order_by(Country.name).all()
+    countries = (await db.scalars(select(Country).order_by(Country.name))).all()
 
     result = []
     for country in countries:
-        keywords_count = db.query(Keyword).filter(
-            Keyword.country_id == country.id
-        ).count()
-        leads_count = db.query(Lead).filter(
-            Lead.country_id == country.id
-        ).count()
-
-        country_dict = {
-            "id": country.id,
-            "name": country.name,
-            "code": country.code,
-            "language": country.language,
-            "flag_image": country.flag_image,
-            "is_active": country.is_active,
-            "created_at": country.created_at,
-            "keywords_count": keywords_count,
-            "leads_count": leads_count
-        }
-        result.append(CountryResponse(**country_dict))
+        keywords_count = await count_by_country(db, Keyword, country.id)
+        leads_count = await count_by_country(db, Lead, country.id)
+
+        result.append(country_to_response(country, keywords_count, leads_count))
 
     return result
 
@@ -56,47 +73,31 @@ async def list_countries(
 @router.get("/{country_id}", response_model=CountryResponse)
 async def get_country(
     country_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Obtiene un país por ID.
     """
-    country = db.query(Country).filter(Country.id == country_id).first()
-    if not country:
-        raise HTTPException(status_code=404, detail="País no encontrado")
+    country = await get_country_or_404(db, country_id)
 
-    keywords_count = db.query(Keyword).filter(
-        Keyword.country_id == country.id
-    ).count()
-    leads_count = db.query(Lead).filter(
-        Lead.country_id == country.id
-    ).count()
+    keywords_count = await count_by_country(db, Keyword, country.id)
+    leads_count = await count_by_country(db, Lead, country.id)
 
-    return CountryResponse(
-        id=country.id,
-        name=country.name,
-        code=country.code,
-        language=country.language,
-        flag_image=country.flag_image,
-        is_active=country.is_active,
-        created_at=country.created_at,
-        keywords_count=keywords_count,
-        leads_count=leads_count
-    )
+    return country_to_response(country, keywords_count, leads_count)
 
 
 @router.post("", response_model=CountryResponse, status_code=status.HTTP_201_CREATED)
 async def create_country(
     data: CountryCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Crea un nuevo país.
     """
     # Verificar que no existe
-    existing = db.query(Country).filter(Country.name == data.name).first()
+    existing = await db.scalar(select(Country).where(Country.name == data.name))
     if existing:
         raise HTTPException(
             status_code=400,
@@ -106,39 +107,26 @@ async def create_country(
     country = Country(
         name=data.name,
         code=data.code.upper(),
-        language=data.language.lower(),
-        flag_image=data.flag_image
+        language=data.language.lower()
     )
     db.add(country)
-    db.commit()
-    db.refresh(country)
+    await db.commit()
+    await db.refresh(country, ["flag"])
 
-    return CountryResponse(
-        id=country.id,
-        name=country.name,
-        code=country.code,
-        language=country.language,
-        flag_image=country.flag_image,
-        is_active=country.is_active,
-        created_at=country.created_at,
-        keywords_count=0,
-        leads_count=0
-    )
+    return country_to_response(country)
 
 
 @router.put("/{country_id}", response_model=CountryResponse)
 async def update_country(
     country_id: int,
     data: CountryUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Actualiza un país.
     """
-    country = db.query(Country).filter(Country.id == country_id).first()
-    if not country:
-        raise HTTPException(status_code=404, detail="País no encontrado")
+    country = await get_country_or_404(db, country_id)
 
     # Actualizar campos
     update_data = data.model_dump(exclude_unset=True)
@@ -149,44 +137,28 @@ async def update_country(
             value = value.lower()
         setattr(country, field, value)
 
-    db.commit()
-    db.refresh(country)
+    await db.commit()
 
-    keywords_count = db.query(Keyword).filter(
-        Keyword.country_id == country.id
-    ).count()
-    leads_count = db.query(Lead).filter(
-        Lead.country_id == country.id
-    ).count()
+    keywords_count = await count_by_country(db, Keyword, country.id)
+    leads_count = await count_by_country(db, Lead, country.id)
 
-    return CountryResponse(
-        id=country.id,
-        name=country.name,
-        code=country.code,
-        language=country.language,
-        flag_image=country.flag_image,
-        is_active=country.is_active,
-        created_at=country.created_at,
-        keywords_count=keywords_count,
-        leads_count=leads_count
-    )
+    return country_to_response(country, keywords_count, leads_count)
 
 
 @router.delete("/{country_id}")
 async def delete_country(
     country_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Elimina un país (y todos sus keywords y leads).
     """
-    country = db.query(Country).filter(Country.id == country_id).first()
-    if not country:
-        raise HTTPException(status_code=404, detail="País no encontrado")
+    country = await get_country_or_404(db, country_id)
 
-    db.delete(country)
-    db.commit()
+    await db.delete(country)
+    await db.commit()
+    await domain_index.removed(db, country_id)
 
     return {"message": f"País '{country.name}' eliminado correctamente"}
 
@@ -195,29 +167,54 @@ async def delete_country(
 async def upload_flag(
     country_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Sube una imagen de bandera para un país.
     """
-    country = db.query(Country).filter(Country.id == country_id).first()
-    if not country:
-        raise HTTPException(status_code=404, detail="País no encontrado")
+    country = await get_country_or_404(db, country_id)
 
     # Verificar tipo de archivo
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="El archivo debe ser una imagen")
 
-    # Leer y codificar en base64
+    # Leer imagen
     content = await file.read()
     if len(content) > 500000:  # 500KB máximo
         raise HTTPException(status_code=400, detail="La imagen es demasiado grande (máx 500KB)")
 
-    base64_image = base64.b64encode(content).decode("utf-8")
-    data_url = f"data:{file.content_type};base64,{base64_image}"
+    store = FlagStore(db)
+    store.save(country, content, file.content_type)
+    await db.commit()
+
+    return {
+        "message": "Bandera actualizada correctamente",
+        "flag_url": FlagStore.flag_url(country)
+    }
+
+
+@router.get("/{country_id}/flag")
+async def get_flag(
+    country_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Sirve la bandera de un país en binario.
+    Pública (se usa directamente en <img>) y cacheable: ETag fuerte + Cache-Control largo.
+    """
+    store = FlagStore(db)
+    flag = await store.get(country_id)
+    if not flag:
+        raise HTTPException(status_code=404, detail="Bandera no encontrada")
+
+    etag = f'"{flag.etag}"'
+    headers = {"ETag": etag, "Cache-Control": FlagStore.CACHE_CONTROL}
 
-    country.flag_image = data_url
-    db.commit()
+    # Si el navegador ya la tiene, no cargamos los bytes
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    return {"message": "Bandera actualizada correctamente"}
+    content = await store.get_content(flag)
+    return Response(content=content, media_type=flag.content_type, headers=headers)
@@ -2,9 +2,6 @@
 Endpoints de búsqueda por imagen y OCR.
 """
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
-
-from app.core.database import get_db
 from app.api.deps import get_current_user
 from app.api.schemas import ImageSearchResponse
 from app.services.image_search import ImageSearchService, OCRService
@@ -15,7 +12,6 @@ router = APIRouter(prefix="/images", tags=["Imágenes"])
 @router.post("/search", response_model=ImageSearchResponse)
 async def search_by_image(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
@@ -44,7 +40,6 @@ async def search_by_image(
 async def extract_text_from_image(
     file: UploadFile = File(...),
     language: str = "es",
-    db: Session = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
@@ -64,7 +59,7 @@ async def extract_text_from_image(
 
     # Extraer texto
     service = OCRService()
-    result = service.extract_text(content, language)
+    result = await service.extract_text_async(content, language)
 
     return result
 
@@ -73,13 +68,12 @@ async def extract_text_from_image(
 async def extract_text_from_url(
     url: str,
     language: str = "es",
-    db: Session = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Extrae texto de una imagen por URL.
     """
     service = OCRService()
-    result = service.extract_from_url(url, language)
+    result = await service.extract_from_url(url, language)
 
     return result
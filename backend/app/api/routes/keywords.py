@@ -2,7 +2,8 @@
 Endpoints de palabras clave.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.core.database import get_db
@@ -12,6 +13,7 @@ from app.api.schemas import (
 )
 from app.models.keyword import Keyword
 from app.models.country import Country
+from app.services.keyword_ranking import KeywordRankingService
 
 router = APIRouter(prefix="/keywords", tags=["Keywords"])
 
@@ -20,31 +22,31 @@ router = APIRouter(prefix="/keywords", tags=["Keywords"])
 async def list_keywords_by_country(
     country_id: int,
     active_only: bool = False,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Lista todas las keywords de un país.
     """
-    query = db.query(Keyword).filter(Keyword.country_id == country_id)
+    query = select(Keyword).where(Keyword.country_id == country_id)
 
     if active_only:
-        query = query.filter(Keyword.is_active == True)
+        query = query.where(Keyword.is_active == True)
 
-    keywords = query.order_by(Keyword.text).all()
+    keywords = (await db.scalars(query.order_by(Keyword.text))).all()
     return keywords
 
 
 @router.get("/{keyword_id}", response_model=KeywordResponse)
 async def get_keyword(
     keyword_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Obtiene una keyword por ID.
     """
-    keyword = db.query(Keyword).filter(Keyword.id == keyword_id).first()
+    keyword = await db.get(Keyword, keyword_id)
     if not keyword:
         raise HTTPException(status_code=404, detail="Keyword no encontrada")
     return keyword
@@ -53,22 +55,22 @@ async def get_keyword(
 @router.post("", response_model=KeywordResponse, status_code=status.HTTP_201_CREATED)
 async def create_keyword(
     data: KeywordCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Crea una nueva keyword.
     """
     # Verificar que el país existe
-    country = db.query(Country).filter(Country.id == data.country_id).first()
+    country = await db.get(Country, data.country_id)
     if not country:
         raise HTTPException(status_code=404, detail="País no encontrado")
 
     # Verificar que no existe ya
-    existing = db.query(Keyword).filter(
+    existing = await db.scalar(select(Keyword).where(
         Keyword.country_id == data.country_id,
         Keyword.text == data.text
-    ).first()
+    ))
     if existing:
         raise HTTPException(
             status_code=400,
@@ -82,8 +84,10 @@ async def create_keyword(
         results_per_search=data.results_per_search
     )
     db.add(keyword)
-    db.commit()
-    db.refresh(keyword)
+    await db.flush()
+    await KeywordRankingService(db).refresh_keyword(keyword)
+    await db.commit()
+    await db.refresh(keyword)
 
     return keyword
 
@@ -92,13 +96,13 @@ async def create_keyword(
 async def update_keyword(
     keyword_id: int,
     data: KeywordUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Actualiza una keyword.
     """
-    keyword = db.query(Keyword).filter(Keyword.id == keyword_id).first()
+    keyword = await db.get(Keyword, keyword_id)
     if not keyword:
         raise HTTPException(status_code=404, detail="Keyword no encontrada")
 
@@ -106,8 +110,9 @@ async def update_keyword(
     for field, value in update_data.items():
         setattr(keyword, field, value)
 
-    db.commit()
-    db.refresh(keyword)
+    await KeywordRankingService(db).refresh_keyword(keyword)
+    await db.commit()
+    await db.refresh(keyword)
 
     return keyword
 
@@ -115,18 +120,19 @@ async def update_keyword(
 @router.delete("/{keyword_id}")
 async def delete_keyword(
     keyword_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Elimina una keyword.
     """
-    keyword = db.query(Keyword).filter(Keyword.id == keyword_id).first()
+    keyword = await db.get(Keyword, keyword_id)
     if not keyword:
         raise HTTPException(status_code=404, detail="Keyword no encontrada")
 
-    db.delete(keyword)
-    db.commit()
+    await KeywordRankingService(db).remove_keyword(keyword.id)
+    await db.delete(keyword)
+    await db.commit()
 
     return {"message": f"Keyword '{keyword.text}' eliminada correctamente"}
 
@@ -134,18 +140,19 @@ async def delete_keyword(
 @router.post("/{keyword_id}/toggle")
 async def toggle_keyword(
     keyword_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Activa/desactiva una keyword.
     """
-    keyword = db.query(Keyword).filter(Keyword.id == keyword_id).first()
+    keyword = await db.get(Keyword, keyword_id)
     if not keyword:
         raise HTTPException(status_code=404, detail="Keyword no encontrada")
 
     keyword.is_active = not keyword.is_active
-    db.commit()
+    await KeywordRankingService(db).refresh_keyword(keyword)
+    await db.commit()
 
     state = "activada" if keyword.is_active else "desactivada"
     return {"message": f"Keyword '{keyword.text}' {state}", "is_active": keyword.is_active}
@@ -1,29 +1,43 @@
 """
 Endpoints de leads.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi.responses import StreamingResponse, FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import select, update, delete, func, case, and_, or_
+from typing import List, Optional, Iterator, AsyncIterator, Callable
 from datetime import datetime
-import io
 
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
+from app.core.executors import iterate_in_io
 from app.api.deps import get_current_user
 from app.api.schemas import (
     LeadResponse, LeadDetailResponse, LeadUpdate,
-    NoteBase, NoteResponse, LeadTabEnum
+    NoteBase, NoteResponse, LeadTabEnum, ExportFormatEnum,
+    LeadSelection, BulkMove, BulkStatus, BulkReview, BulkDelete, BulkResult, CompanyLeadsResponse
 )
 from app.models.lead import Lead, LeadTab
 from app.models.note import Note
 from app.models.keyword import Keyword
-from app.models.status import LeadStatus
 from app.services.scraper import ScraperService
-from app.services.excel_export import ExcelExportService
+from app.services.lead_export import LeadExportService
+from app.services.export_jobs import ExportJobService
+from app.services.export_source import export_conditions, render_export, render_all_tabs
+from app.services.domain_index import domain_index
+from app.services.domains import lead_domain
+from app.services.lead_clusters import LeadClusterService, normalize_cif
+from app.services.reference_cache import reference_cache
 
 router = APIRouter(prefix="/leads", tags=["Leads"])
 
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+EXPORT_MEDIA_TYPES = {
+    "xlsx": XLSX_MEDIA_TYPE,
+    **{name: media_type for name, (media_type, _) in LeadExportService.FORMATS.items()}
+}
+EXPORT_JOB_ID_PATTERN = r"^\d+_[a-z]+_[a-z]+_[0-9a-f]{16}$"
+
 
 def lead_to_response(lead: Lead) -> dict:
     """Convierte un Lead a diccionario para respuesta."""
@@ -47,46 +61,137 @@ def lead_to_response(lead: Lead) -> dict:
         "keyword_text": lead.found_by_keyword.text if lead.found_by_keyword else None,
         "status_name": lead.status.name if lead.status else None,
         "status_color": lead.status.color if lead.status else None,
-        "notes_count": len(lead.notes) if lead.notes else 0
+        "notes_count": len(lead.notes) if lead.notes else 0,
+        "cluster_id": lead.cluster_id
     }
 
 
-@router.get("/country/{country_id}", response_model=List[LeadResponse])
-async def list_leads_by_country(
-    country_id: int,
+# Relaciones que usa lead_to_response, cargadas en bloque
+LEAD_RESPONSE_OPTIONS = (
+    selectinload(Lead.found_by_keyword),
+    selectinload(Lead.status),
+    selectinload(Lead.notes)
+)
+
+
+async def get_lead_or_404(db: AsyncSession, lead_id: int) -> Lead:
+    """Obtiene un lead con sus relaciones o lanza 404."""
+    lead = await db.scalar(
+        select(Lead).where(Lead.id == lead_id).options(*LEAD_RESPONSE_OPTIONS)
+    )
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead no encontrado")
+    return lead
+
+
+async def leads_exist(db: AsyncSession, conditions: list) -> bool:
+    """Indica si hay algún lead que cumpla las condiciones."""
+    return await db.scalar(select(Lead.id).where(*conditions).limit(1)) is not None
+
+
+def lead_filters(
+    country_id: Optional[int] = None,
     tab: Optional[LeadTabEnum] = None,
     keyword_id: Optional[int] = None,
     status_id: Optional[int] = None,
-    search: Optional[str] = None,
-    limit: int = Query(100, ge=1, le=500),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-    _: bool = Depends(get_current_user)
-):
-    """
-    Lista leads de un país con filtros opcionales.
-    """
-    query = db.query(Lead).filter(Lead.country_id == country_id)
+    search: Optional[str] = None
+) -> list:
+    """Construye las condiciones de filtrado de leads (listado y operaciones masivas)."""
+    conditions = []
+
+    if country_id:
+        conditions.append(Lead.country_id == country_id)
 
     if tab:
-        tab_enum = LeadTab(tab.value)
-        query = query.filter(Lead.tab == tab_enum)
+        conditions.append(Lead.tab == LeadTab(tab.value))
 
     if keyword_id:
-        query = query.filter(Lead.keyword_id == keyword_id)
+        conditions.append(Lead.keyword_id == keyword_id)
 
     if status_id:
-        query = query.filter(Lead.status_id == status_id)
+        conditions.append(Lead.status_id == status_id)
 
     if search:
         search_term = f"%{search}%"
-        query = query.filter(
+        conditions.append(
             (Lead.name.ilike(search_term)) |
             (Lead.domain.ilike(search_term)) |
             (Lead.email.ilike(search_term))
         )
 
-    leads = query.order_by(Lead.found_at.desc()).offset(offset).limit(limit).all()
+    return conditions
+
+
+def selection_filters(selection: LeadSelection) -> list:
+    """
+    Condiciones SQL para una selección masiva (IDs y/o filtro). Una lista
+    de IDs vacía no selecciona nada: el filtro por país solo vale para
+    todo el país si no se envía lead_ids.
+    """
+    if selection.lead_ids is None and not selection.country_id:
+        raise HTTPException(
+            status_code=400,
+            detail="Indica una lista de leads (lead_ids) o un país (country_id)"
+        )
+
+    conditions = lead_filters(
+        country_id=selection.country_id,
+        tab=selection.tab,
+        keyword_id=selection.keyword_id,
+        status_id=selection.status_id,
+        search=selection.search
+    )
+    if selection.lead_ids is not None:
+        conditions.append(Lead.id.in_(selection.lead_ids))  # IN vacío = ningún lead
+
+    if selection.include_company:
+        # Los leads seleccionados (también los aún sin grupo) y los de sus
+        # empresas, en cualquier país y pestaña
+        return [or_(
+            and_(*conditions),
+            Lead.cluster_id.in_(select(Lead.cluster_id).where(*conditions, Lead.cluster_id.is_not(None)))
+        )]
+
+    return conditions
+
+
+def review_values(now: datetime) -> dict:
+    """
+    Valores SET para marcar como revisados los leads que no están en NEW
+    (equivalente en SQL a la lógica de update_lead).
+    """
+    return {
+        Lead.is_reviewed: case((Lead.tab != LeadTab.NEW, True), else_=Lead.is_reviewed),
+        Lead.reviewed_at: case(
+            (and_(Lead.tab != LeadTab.NEW, Lead.is_reviewed == False), now),
+            else_=Lead.reviewed_at
+        )
+    }
+
+
+@router.get("/country/{country_id}", response_model=List[LeadResponse])
+async def list_leads_by_country(
+    country_id: int,
+    tab: Optional[LeadTabEnum] = None,
+    keyword_id: Optional[int] = None,
+    status_id: Optional[int] = None,
+    search: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Lista leads de un país con filtros opcionales.
+    """
+    query = select(Lead).where(
+        Lead.country_id == country_id,
+        *lead_filters(tab=tab, keyword_id=keyword_id, status_id=status_id, search=search)
+    ).options(*LEAD_RESPONSE_OPTIONS)
+
+    leads = (await db.scalars(
+        query.order_by(Lead.found_at.desc()).offset(offset).limit(limit)
+    )).all()
 
     return [LeadResponse(**lead_to_response(lead)) for lead in leads]
 
@@ -94,35 +199,184 @@ async def list_leads_by_country(
 @router.get("/country/{country_id}/stats")
 async def get_country_lead_stats(
     country_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Obtiene estadísticas de leads por pestaña para un país.
     """
-    stats = {}
-    for tab in LeadTab:
-        count = db.query(Lead).filter(
-            Lead.country_id == country_id,
-            Lead.tab == tab
-        ).count()
-        stats[tab.value] = count
+    result = await db.execute(
+        select(Lead.tab, func.count(Lead.id))
+        .where(Lead.country_id == country_id)
+        .group_by(Lead.tab)
+    )
+    counts = dict(result.all())
+
+    return {tab.value: counts.get(tab, 0) for tab in LeadTab}
+
+
+# ============ Operaciones masivas ============
+@router.post("/bulk/move", response_model=BulkResult)
+async def bulk_move_leads(
+    data: BulkMove,
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Mueve varios leads a otra pestaña en un único UPDATE.
+    """
+    target = LeadTab(data.tab.value)
+    values = {Lead.tab: target}
+
+    if target != LeadTab.NEW:
+        values[Lead.is_reviewed] = True
+        values[Lead.reviewed_at] = case(
+            (Lead.is_reviewed == False, datetime.utcnow()),
+            else_=Lead.reviewed_at
+        )
+
+    result = await db.execute(
+        update(Lead).where(*selection_filters(data.selection)).values(values)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    affected = result.rowcount
+
+    return BulkResult(message=f"{affected} leads movidos a {data.tab.value}", affected=affected)
+
+
+@router.post("/bulk/status", response_model=BulkResult)
+async def bulk_update_status(
+    data: BulkStatus,
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Cambia el estado de varios leads en un único UPDATE.
+    """
+    if data.status_id is not None:
+        if not (await reference_cache.get(db)).get_status(data.status_id):
+            raise HTTPException(status_code=404, detail="Estado no encontrado")
+
+    values = {Lead.status_id: data.status_id}
+    values.update(review_values(datetime.utcnow()))
+
+    result = await db.execute(
+        update(Lead).where(*selection_filters(data.selection)).values(values)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    affected = result.rowcount
+
+    return BulkResult(message=f"Estado actualizado en {affected} leads", affected=affected)
+
+
+@router.post("/bulk/review", response_model=BulkResult)
+async def bulk_review_leads(
+    data: BulkReview,
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Marca (o desmarca) varios leads como revisados en un único UPDATE.
+    """
+    values = {Lead.is_reviewed: data.is_reviewed}
+    if data.is_reviewed:
+        values[Lead.reviewed_at] = case(
+            (Lead.is_reviewed == False, datetime.utcnow()),
+            else_=Lead.reviewed_at
+        )
 
-    return stats
+    result = await db.execute(
+        update(Lead).where(*selection_filters(data.selection)).values(values)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    affected = result.rowcount
+
+    state = "revisados" if data.is_reviewed else "pendientes de revisar"
+    return BulkResult(message=f"{affected} leads marcados como {state}", affected=affected)
+
+
+@router.post("/bulk/delete", response_model=BulkResult)
+async def bulk_delete_leads(
+    data: BulkDelete,
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Elimina varios leads en un único DELETE (las notas se borran por ON DELETE CASCADE;
+    en SQLite las claves foráneas se activan en cada conexión, ver core/database.py).
+    """
+    deleted = (await db.execute(
+        delete(Lead).where(*selection_filters(data.selection))
+        .returning(Lead.country_id, Lead.domain)
+        .execution_options(synchronize_session=False)
+    )).all()
+    await db.commit()
+    affected = len(deleted)
+
+    domains_by_country = {}
+    for country_id, domain in deleted:
+        domains_by_country.setdefault(country_id, []).append(domain)
+    for country_id, domains in domains_by_country.items():
+        await domain_index.removed(db, country_id, domains)
+
+    return BulkResult(message=f"{affected} leads eliminados", affected=affected)
+
+
+# ============ Empresas (leads de la misma empresa en varios países) ============
+@router.get("/company", response_model=CompanyLeadsResponse)
+async def get_company_leads(
+    lead_id: Optional[int] = None,
+    domain: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Lista los leads de una empresa en todos los países: los que comparten
+    dominio, CIF o dominio de email con el lead indicado (lead_id) o con
+    el dominio indicado (web o email, se normaliza).
+    """
+    clusters = LeadClusterService(db)
+    if lead_id:
+        lead = await get_lead_or_404(db, lead_id)
+        cluster_id = lead.cluster_id
+        if cluster_id is None:
+            cluster_id = await clusters.index(lead)
+            await db.commit()
+    elif domain:
+        normalized = lead_domain(domain)
+        cluster_id = await clusters.find_cluster(normalized) if normalized else None
+        if cluster_id is None:
+            raise HTTPException(status_code=404, detail=f"No hay leads del dominio '{domain}'")
+    else:
+        raise HTTPException(status_code=400, detail="Indica un lead (lead_id) o un dominio (domain)")
+
+    members = (await db.scalars(
+        select(Lead).where(Lead.cluster_id == cluster_id)
+        .options(*LEAD_RESPONSE_OPTIONS)
+        .order_by(Lead.country_id, Lead.found_at)
+    )).all()
+
+    return CompanyLeadsResponse(
+        cluster_id=cluster_id,
+        domains=sorted({lead.domain for lead in members}),
+        country_ids=sorted({lead.country_id for lead in members}),
+        leads=[LeadResponse(**lead_to_response(lead)) for lead in members]
+    )
 
 
 @router.get("/{lead_id}", response_model=LeadDetailResponse)
 async def get_lead(
     lead_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Obtiene un lead con sus notas.
     """
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
-    if not lead:
-        raise HTTPException(status_code=404, detail="Lead no encontrado")
+    lead = await get_lead_or_404(db, lead_id)
 
     response = lead_to_response(lead)
     response["notes"] = [
@@ -143,32 +397,36 @@ async def get_lead(
 async def update_lead(
     lead_id: int,
     data: LeadUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Actualiza un lead (cambiar pestaña, estado, datos de contacto).
     """
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
-    if not lead:
-        raise HTTPException(status_code=404, detail="Lead no encontrado")
+    lead = await get_lead_or_404(db, lead_id)
 
     update_data = data.model_dump(exclude_unset=True)
 
     # Convertir tab string a enum
     if "tab" in update_data:
         update_data["tab"] = LeadTab(update_data["tab"])
+    if "cif" in update_data:
+        update_data["cif"] = normalize_cif(update_data["cif"])
 
     for field, value in update_data.items():
         setattr(lead, field, value)
 
+    # Con otro email o CIF el lead puede ser de otra empresa
+    if "email" in update_data or "cif" in update_data:
+        await LeadClusterService(db).index(lead)
+
     # Marcar como revisado si se mueve de NEW
     if lead.tab != LeadTab.NEW and not lead.is_reviewed:
         lead.is_reviewed = True
         lead.reviewed_at = datetime.utcnow()
 
-    db.commit()
-    db.refresh(lead)
+    await db.commit()
+    await db.refresh(lead, ["found_by_keyword", "status", "notes"])
 
     return LeadResponse(**lead_to_response(lead))
 
@@ -177,15 +435,13 @@ async def update_lead(
 async def move_lead_to_tab(
     lead_id: int,
     tab: LeadTabEnum,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Mueve un lead a otra pestaña.
     """
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
-    if not lead:
-        raise HTTPException(status_code=404, detail="Lead no encontrado")
+    lead = await get_lead_or_404(db, lead_id)
 
     lead.tab = LeadTab(tab.value)
 
@@ -193,7 +449,7 @@ async def move_lead_to_tab(
         lead.is_reviewed = True
         lead.reviewed_at = datetime.utcnow()
 
-    db.commit()
+    await db.commit()
 
     return {"message": f"Lead movido a {tab.value}"}
 
@@ -201,15 +457,13 @@ async def move_lead_to_tab(
 @router.post("/{lead_id}/extract-contact")
 async def extract_contact_info(
     lead_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Extrae información de contacto de la web del lead.
     """
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
-    if not lead:
-        raise HTTPException(status_code=404, detail="Lead no encontrado")
+    lead = await get_lead_or_404(db, lead_id)
 
     scraper = ScraperService()
     result = await scraper.extract_contact_info(lead.url)
@@ -220,11 +474,12 @@ async def extract_contact_info(
         if result["phone"] and not lead.phone:
             lead.phone = result["phone"]
         if result["cif"] and not lead.cif:
-            lead.cif = result["cif"]
+            lead.cif = normalize_cif(result["cif"])
 
         lead.contact_extracted = True
         lead.contact_extracted_at = datetime.utcnow()
-        db.commit()
+        await LeadClusterService(db).index(lead)
+        await db.commit()
 
     return {
         "success": result["success"],
@@ -240,18 +495,17 @@ async def extract_contact_info(
 @router.delete("/{lead_id}")
 async def delete_lead(
     lead_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Elimina un lead permanentemente.
     """
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
-    if not lead:
-        raise HTTPException(status_code=404, detail="Lead no encontrado")
+    lead = await get_lead_or_404(db, lead_id)
 
-    db.delete(lead)
-    db.commit()
+    await db.delete(lead)
+    await db.commit()
+    await domain_index.removed(db, lead.country_id, [lead.domain])
 
     return {"message": "Lead eliminado correctamente"}
 
@@ -260,15 +514,15 @@ async def delete_lead(
 @router.get("/{lead_id}/notes", response_model=List[NoteResponse])
 async def get_lead_notes(
     lead_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Obtiene las notas de un lead.
     """
-    notes = db.query(Note).filter(
-        Note.lead_id == lead_id
-    ).order_by(Note.created_at.desc()).all()
+    notes = (await db.scalars(
+        select(Note).where(Note.lead_id == lead_id).order_by(Note.created_at.desc())
+    )).all()
 
     return notes
 
@@ -277,14 +531,13 @@ async def get_lead_notes(
 async def create_note(
     lead_id: int,
     data: NoteBase,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Crea una nota para un lead.
     """
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
-    if not lead:
+    if not await db.scalar(select(Lead.id).where(Lead.id == lead_id)):
         raise HTTPException(status_code=404, detail="Lead no encontrado")
 
     note = Note(
@@ -292,8 +545,8 @@ async def create_note(
         content=data.content
     )
     db.add(note)
-    db.commit()
-    db.refresh(note)
+    await db.commit()
+    await db.refresh(note)
 
     return note
 
@@ -302,86 +555,191 @@ async def create_note(
 async def delete_note(
     lead_id: int,
     note_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Elimina una nota.
     """
-    note = db.query(Note).filter(
-        Note.id == note_id,
-        Note.lead_id == lead_id
-    ).first()
+    note = await db.scalar(
+        select(Note).where(Note.id == note_id, Note.lead_id == lead_id)
+    )
     if not note:
         raise HTTPException(status_code=404, detail="Nota no encontrada")
 
-    db.delete(note)
-    db.commit()
+    await db.delete(note)
+    await db.commit()
 
     return {"message": "Nota eliminada correctamente"}
 
 
 # ============ Exportación ============
+def stream_with_session(render: Callable[[Session], Iterator[bytes]]) -> AsyncIterator[bytes]:
+    """
+    Ejecuta un generador de exportación con su propia sesión síncrona en el
+    pool de hilos: la sesión de la petición se cierra antes de que
+    StreamingResponse empiece a enviar datos.
+    """
+    def generate() -> Iterator[bytes]:
+        db = SessionLocal()
+        try:
+            yield from render(db)
+        finally:
+            db.close()
+
+    return iterate_in_io(generate())
+
+
+async def export_data_version(db: AsyncSession, conditions: list) -> str:
+    """
+    Sello de versión de los datos a exportar: cambia si se añade, modifica o
+    elimina algún lead o nota de la selección.
+    """
+    leads_count, leads_updated = (await db.execute(
+        select(func.count(Lead.id), func.max(func.coalesce(Lead.updated_at, Lead.found_at)))
+        .where(*conditions)
+    )).one()
+
+    notes_count, notes_updated = (await db.execute(
+        select(func.count(Note.id), func.max(Note.updated_at))
+        .join(Lead, Note.lead_id == Lead.id)
+        .where(*conditions)
+    )).one()
+
+    return f"{leads_count}|{leads_updated}|{notes_count}|{notes_updated}"
+
+
+def export_filename(tab: Optional[str], extension: str) -> str:
+    return f"leads_{tab or 'todos'}_{datetime.now().strftime('%Y%m%d')}.{extension}"
+
+
 @router.get("/country/{country_id}/export")
 async def export_leads(
     country_id: int,
     tab: Optional[LeadTabEnum] = None,
-    db: Session = Depends(get_db),
+    export_format: ExportFormatEnum = Query(ExportFormatEnum.xlsx, alias="format"),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
-    Exporta leads a Excel.
+    Exporta leads en streaming: Excel (por defecto), CSV, NDJSON o Parquet.
+    Si ya hay un fichero generado para los mismos datos, se sirve directamente.
     """
-    query = db.query(Lead).filter(Lead.country_id == country_id)
-
-    if tab:
-        query = query.filter(Lead.tab == LeadTab(tab.value))
-
-    leads = query.order_by(Lead.found_at.desc()).all()
+    tab_value = tab.value if tab else None
+    conditions = export_conditions(country_id, tab_value)
 
-    if not leads:
+    if not await leads_exist(db, conditions):
         raise HTTPException(status_code=404, detail="No hay leads para exportar")
 
-    exporter = ExcelExportService()
-    excel_bytes = exporter.export_leads(leads)
+    media_type = EXPORT_MEDIA_TYPES[export_format.value]
+    filename = export_filename(tab_value, export_format.value)
 
-    filename = f"leads_{tab.value if tab else 'todos'}_{datetime.now().strftime('%Y%m%d')}.xlsx"
+    # Resultado cacheado de un trabajo anterior con los mismos datos
+    key = ExportJobService.make_key(
+        country_id, tab_value, export_format.value, await export_data_version(db, conditions)
+    )
+    cached = ExportJobService().result_path(key)
+    if cached.exists():
+        return FileResponse(cached, media_type=media_type, filename=filename)
 
     return StreamingResponse(
-        io.BytesIO(excel_bytes),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        stream_with_session(
+            lambda session: render_export(session, country_id, tab_value, export_format.value)
+        ),
+        media_type=media_type,
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
+@router.post("/country/{country_id}/export-jobs")
+async def create_export_job(
+    country_id: int,
+    tab: Optional[LeadTabEnum] = None,
+    export_format: ExportFormatEnum = Query(ExportFormatEnum.xlsx, alias="format"),
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Lanza una exportación en el pool de procesos y devuelve el trabajo.
+    Si los datos no han cambiado desde la última exportación igual, el
+    trabajo ya está terminado y se reutiliza el fichero.
+    """
+    tab_value = tab.value if tab else None
+    conditions = export_conditions(country_id, tab_value)
+
+    if not await leads_exist(db, conditions):
+        raise HTTPException(status_code=404, detail="No hay leads para exportar")
+
+    key = ExportJobService.make_key(
+        country_id, tab_value, export_format.value,
+        await export_data_version(db, conditions)
+    )
+
+    service = ExportJobService()
+    service.start(key, country_id, tab_value, export_format.value)
+
+    return export_job_response(key, service.get_status(key) or {"status": "running"})
+
+
+def export_job_response(job_id: str, job_status: dict) -> dict:
+    """Respuesta con el estado de un trabajo de exportación."""
+    response = {"job_id": job_id, **job_status}
+    if job_status["status"] == "done":
+        response["download_url"] = f"/api/leads/export-jobs/{job_id}/download"
+    return response
+
+
+@router.get("/export-jobs/{job_id}")
+async def get_export_job(
+    job_id: str = Path(..., pattern=EXPORT_JOB_ID_PATTERN),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Obtiene el estado de un trabajo de exportación.
+    """
+    job_status = ExportJobService().get_status(job_id)
+    if not job_status:
+        raise HTTPException(status_code=404, detail="Exportación no encontrada")
+
+    return export_job_response(job_id, job_status)
+
+
+@router.get("/export-jobs/{job_id}/download")
+async def download_export_job(
+    job_id: str = Path(..., pattern=EXPORT_JOB_ID_PATTERN),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Descarga el fichero de un trabajo de exportación terminado.
+    """
+    path = ExportJobService().result_path(job_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Exportación no disponible")
+
+    _, tab_value, format_value, _ = job_id.split("_")
+    return FileResponse(
+        path,
+        media_type=EXPORT_MEDIA_TYPES[format_value],
+        filename=export_filename(tab_value, format_value)
+    )
+
+
 @router.get("/country/{country_id}/export-all")
 async def export_all_tabs(
     country_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Exporta todos los leads de todas las pestañas a un Excel con múltiples hojas.
     """
-    leads_by_tab = {}
-    for tab in LeadTab:
-        leads = db.query(Lead).filter(
-            Lead.country_id == country_id,
-            Lead.tab == tab
-        ).order_by(Lead.found_at.desc()).all()
-        if leads:
-            leads_by_tab[tab] = leads
-
-    if not leads_by_tab:
+    if not await leads_exist(db, [Lead.country_id == country_id]):
         raise HTTPException(status_code=404, detail="No hay leads para exportar")
 
-    exporter = ExcelExportService()
-    excel_bytes = exporter.export_all_tabs(leads_by_tab)
-
     filename = f"leads_completo_{datetime.now().strftime('%Y%m%d')}.xlsx"
 
     return StreamingResponse(
-        io.BytesIO(excel_bytes),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        stream_with_session(lambda session: render_all_tabs(session, country_id)),
+        media_type=XLSX_MEDIA_TYPE,
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
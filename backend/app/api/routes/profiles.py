@@ -0,0 +1,59 @@
+"""
+Endpoints de administración de los perfiles de peticiones lentas.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from fastapi.responses import FileResponse
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.executors import run_io
+from app.core.profiling import PROFILE_ID_PATTERN, ProfileStore
+
+router = APIRouter(prefix="/admin/profiles", tags=["Administración"])
+
+
+@router.get("")
+async def list_profiles(
+    limit: int = Query(50, ge=1, le=500),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Lista los perfiles más recientes (sin las sentencias SQL).
+    """
+    return {
+        "enabled": settings.PROFILING_ENABLED,
+        "sample_rate": settings.PROFILE_SAMPLE_RATE,
+        "header": settings.PROFILE_HEADER or None,
+        "profiles": await run_io(ProfileStore().list, limit)
+    }
+
+
+@router.get("/{profile_id}")
+async def get_profile(
+    profile_id: str = Path(..., pattern=PROFILE_ID_PATTERN),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Detalle de un perfil, con las sentencias SQL ejecutadas.
+    """
+    profile = await run_io(ProfileStore().get, profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+
+    profile["call_tree_url"] = f"/api/admin/profiles/{profile_id}/call-tree"
+    return profile
+
+
+@router.get("/{profile_id}/call-tree")
+async def get_profile_call_tree(
+    profile_id: str = Path(..., pattern=PROFILE_ID_PATTERN),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Árbol de llamadas del perfil (HTML interactivo de pyinstrument).
+    """
+    path = ProfileStore().html_path(profile_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+
+    return FileResponse(path, media_type="text/html")
@@ -1,8 +1,9 @@
 """
 Endpoints de búsqueda en Google.
 """
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from datetime import date, datetime
 
@@ -12,38 +13,29 @@ from app.api.schemas import SearchRequest, SearchResponse, SearchStats
 from app.models.country import Country
 from app.models.keyword import Keyword
 from app.models.search_log import SearchLog
-from app.models.settings import AppSettings
 from app.services.google_search import GoogleSearchService
 from app.services.scheduler import SchedulerService
-from app.core.config import settings
+from app.services.search_rollups import SearchRollupService
+from app.services.reference_cache import reference_cache
 
 router = APIRouter(prefix="/search", tags=["Búsqueda"])
 
 
 @router.get("/stats", response_model=SearchStats)
 async def get_search_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Obtiene estadísticas de búsquedas del día.
     """
     today = date.today()
-    searches_today = db.query(SearchLog).filter(
+    searches_today = await db.scalar(select(func.count(SearchLog.id)).where(
         SearchLog.searched_at >= datetime.combine(today, datetime.min.time())
-    ).count()
+    ))
 
-    # Obtener límite configurado
-    setting = db.query(AppSettings).filter(
-        AppSettings.key == "max_searches"
-    ).first()
-
-    max_searches = settings.MAX_SEARCHES_DEFAULT
-    if setting and setting.value:
-        try:
-            max_searches = int(setting.value)
-        except ValueError:
-            pass
+    # Límite configurado (caché de referencia)
+    max_searches = (await reference_cache.get(db)).max_searches
 
     is_unlimited = max_searches == 0
     remaining = -1 if is_unlimited else max(0, max_searches - searches_today)
@@ -60,7 +52,7 @@ async def get_search_stats(
 async def search_country(
     country_id: int,
     keyword_ids: Optional[List[int]] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
@@ -69,26 +61,26 @@ async def search_country(
     Si no, busca todas las keywords activas del país.
     """
     # Verificar país
-    country = db.query(Country).filter(Country.id == country_id).first()
+    country = await db.get(Country, country_id)
     if not country:
         raise HTTPException(status_code=404, detail="País no encontrado")
 
     # Obtener keywords
-    query = db.query(Keyword).filter(
+    query = select(Keyword).where(
         Keyword.country_id == country_id,
         Keyword.is_active == True
     )
 
     if keyword_ids:
-        query = query.filter(Keyword.id.in_(keyword_ids))
+        query = query.where(Keyword.id.in_(keyword_ids))
 
-    keywords = query.all()
+    keywords = (await db.scalars(query)).all()
 
     if not keywords:
         raise HTTPException(status_code=400, detail="No hay keywords activas para buscar")
 
     # Iniciar búsqueda
-    search_service = GoogleSearchService(db)
+    search_service = await GoogleSearchService.create(db)
 
     total_results = 0
     new_leads = 0
@@ -132,7 +124,7 @@ async def search_country(
 @router.post("/all", response_model=SearchResponse)
 async def search_all_countries(
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
@@ -140,7 +132,9 @@ async def search_all_countries(
     Se ejecuta en background para no bloquear.
     """
     # Verificar que hay países activos
-    active_countries = db.query(Country).filter(Country.is_active == True).count()
+    active_countries = await db.scalar(
+        select(func.count(Country.id)).where(Country.is_active == True)
+    )
     if active_countries == 0:
         raise HTTPException(status_code=400, detail="No hay países activos")
 
@@ -162,18 +156,18 @@ async def search_all_countries(
 async def get_search_history(
     country_id: Optional[int] = None,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Obtiene el historial de búsquedas.
     """
-    query = db.query(SearchLog)
+    query = select(SearchLog)
 
     if country_id:
-        query = query.filter(SearchLog.country_id == country_id)
+        query = query.where(SearchLog.country_id == country_id)
 
-    logs = query.order_by(SearchLog.searched_at.desc()).limit(limit).all()
+    logs = (await db.scalars(query.order_by(SearchLog.searched_at.desc()).limit(limit))).all()
 
     return [
         {
@@ -187,3 +181,35 @@ async def get_search_history(
         }
         for log in logs
     ]
+
+
+@router.get("/analytics/keywords")
+async def get_keyword_analytics(
+    country_id: Optional[int] = None,
+    days: int = Query(30, ge=1, le=730),
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Rendimiento de cada keyword en los últimos días: búsquedas, resultados,
+    leads nuevos, errores y leads nuevos por búsqueda (por unidad de cuota).
+    Se sirve de los resúmenes diarios.
+    """
+    service = SearchRollupService(db)
+    await service.rollup()
+    return await service.keyword_effectiveness(country_id, days)
+
+
+@router.get("/analytics/daily")
+async def get_daily_analytics(
+    country_id: Optional[int] = None,
+    days: int = Query(30, ge=1, le=730),
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Búsquedas, resultados, leads nuevos y errores por día (resúmenes diarios).
+    """
+    service = SearchRollupService(db)
+    await service.rollup()
+    return await service.daily_totals(country_id, days)
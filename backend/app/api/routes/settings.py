@@ -2,7 +2,8 @@
 Endpoints de configuración.
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, datetime
 
 from app.core.database import get_db
@@ -11,37 +12,29 @@ from app.api.schemas import SettingsUpdate, SettingsResponse, MarketplaceCreate,
 from app.models.settings import AppSettings
 from app.models.marketplace import Marketplace
 from app.models.search_log import SearchLog
-from app.core.config import settings
 from app.core.security import verify_pin
+from app.services.domains import lead_domain
+from app.services.reference_cache import reference_cache
 
 router = APIRouter(prefix="/settings", tags=["Configuración"])
 
 
 @router.get("", response_model=SettingsResponse)
 async def get_settings(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Obtiene la configuración actual.
     """
-    # Obtener max_searches
-    max_setting = db.query(AppSettings).filter(
-        AppSettings.key == "max_searches"
-    ).first()
-
-    max_searches = settings.MAX_SEARCHES_DEFAULT
-    if max_setting and max_setting.value:
-        try:
-            max_searches = int(max_setting.value)
-        except ValueError:
-            pass
+    # Límite configurado (caché de referencia)
+    max_searches = (await reference_cache.get(db)).max_searches
 
     # Búsquedas de hoy
     today = date.today()
-    searches_today = db.query(SearchLog).filter(
+    searches_today = await db.scalar(select(func.count(SearchLog.id)).where(
         SearchLog.searched_at >= datetime.combine(today, datetime.min.time())
-    ).count()
+    ))
 
     return SettingsResponse(
         max_searches=max_searches,
@@ -53,7 +46,7 @@ async def get_settings(
 @router.put("")
 async def update_settings(
     data: SettingsUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
@@ -62,9 +55,9 @@ async def update_settings(
     updates = []
 
     if data.max_searches is not None:
-        setting = db.query(AppSettings).filter(
+        setting = await db.scalar(select(AppSettings).where(
             AppSettings.key == "max_searches"
-        ).first()
+        ))
 
         if setting:
             setting.value = str(data.max_searches)
@@ -83,7 +76,8 @@ async def update_settings(
         # Por seguridad, no cambiamos el PIN desde la API
         pass
 
-    db.commit()
+    await db.commit()
+    await reference_cache.refresh(db)
 
     return {"message": f"Configuración actualizada: {', '.join(updates)}"}
 
@@ -91,34 +85,36 @@ async def update_settings(
 # ============ Marketplaces ============
 @router.get("/marketplaces", response_model=list[MarketplaceResponse])
 async def list_marketplaces(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Lista todos los marketplaces configurados.
     """
-    marketplaces = db.query(Marketplace).order_by(Marketplace.domain).all()
-    return marketplaces
+    return list((await reference_cache.get(db)).marketplaces)
 
 
 @router.post("/marketplaces", response_model=MarketplaceResponse)
 async def add_marketplace(
     data: MarketplaceCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Añade un nuevo marketplace a la lista de exclusión.
     """
-    # Normalizar dominio
-    domain = data.domain.lower().strip()
-    if domain.startswith("www."):
-        domain = domain[4:]
+    # Normalizar dominio (el registrable, como el de los leads)
+    domain = lead_domain(data.domain)
+    if not domain:
+        raise HTTPException(
+            status_code=400,
+            detail=f"'{data.domain}' no es un dominio válido"
+        )
 
     # Verificar si ya existe
-    existing = db.query(Marketplace).filter(
+    existing = await db.scalar(select(Marketplace).where(
         Marketplace.domain == domain
-    ).first()
+    ))
     if existing:
         raise HTTPException(
             status_code=400,
@@ -130,8 +126,9 @@ async def add_marketplace(
         name=data.name or domain
     )
     db.add(marketplace)
-    db.commit()
-    db.refresh(marketplace)
+    await db.commit()
+    await db.refresh(marketplace)
+    await reference_cache.refresh(db)
 
     return marketplace
 
@@ -139,22 +136,21 @@ async def add_marketplace(
 @router.delete("/marketplaces/{marketplace_id}")
 async def delete_marketplace(
     marketplace_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Elimina un marketplace de la lista.
     """
-    marketplace = db.query(Marketplace).filter(
-        Marketplace.id == marketplace_id
-    ).first()
+    marketplace = await db.get(Marketplace, marketplace_id)
     if not marketplace:
         raise HTTPException(status_code=404, detail="Marketplace no encontrado")
 
     if marketplace.is_system:
         raise HTTPException(status_code=400, detail="No se puede eliminar un marketplace del sistema")
 
-    db.delete(marketplace)
-    db.commit()
+    await db.delete(marketplace)
+    await db.commit()
+    await reference_cache.refresh(db)
 
     return {"message": f"Marketplace '{marketplace.domain}' eliminado"}
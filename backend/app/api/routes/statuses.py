@@ -2,39 +2,40 @@
 Endpoints de estados de leads.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.core.database import get_db
 from app.api.deps import get_current_user
 from app.api.schemas import StatusCreate, StatusUpdate, StatusResponse
 from app.models.status import LeadStatus
+from app.services.reference_cache import reference_cache
 
 router = APIRouter(prefix="/statuses", tags=["Estados"])
 
 
 @router.get("", response_model=List[StatusResponse])
 async def list_statuses(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Lista todos los estados disponibles.
     """
-    statuses = db.query(LeadStatus).order_by(LeadStatus.order, LeadStatus.name).all()
-    return statuses
+    return list((await reference_cache.get(db)).statuses)
 
 
 @router.get("/{status_id}", response_model=StatusResponse)
 async def get_status(
     status_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Obtiene un estado por ID.
     """
-    status_obj = db.query(LeadStatus).filter(LeadStatus.id == status_id).first()
+    status_obj = (await reference_cache.get(db)).get_status(status_id)
     if not status_obj:
         raise HTTPException(status_code=404, detail="Estado no encontrado")
     return status_obj
@@ -43,14 +44,14 @@ async def get_status(
 @router.post("", response_model=StatusResponse, status_code=status.HTTP_201_CREATED)
 async def create_status(
     data: StatusCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Crea un nuevo estado.
     """
     # Verificar que no existe
-    existing = db.query(LeadStatus).filter(LeadStatus.name == data.name).first()
+    existing = await db.scalar(select(LeadStatus).where(LeadStatus.name == data.name))
     if existing:
         raise HTTPException(
             status_code=400,
@@ -64,8 +65,9 @@ async def create_status(
         order=data.order
     )
     db.add(status_obj)
-    db.commit()
-    db.refresh(status_obj)
+    await db.commit()
+    await db.refresh(status_obj)
+    await reference_cache.refresh(db)
 
     return status_obj
 
@@ -74,13 +76,13 @@ async def create_status(
 async def update_status(
     status_id: int,
     data: StatusUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Actualiza un estado.
     """
-    status_obj = db.query(LeadStatus).filter(LeadStatus.id == status_id).first()
+    status_obj = await db.get(LeadStatus, status_id)
     if not status_obj:
         raise HTTPException(status_code=404, detail="Estado no encontrado")
 
@@ -91,8 +93,9 @@ async def update_status(
     for field, value in update_data.items():
         setattr(status_obj, field, value)
 
-    db.commit()
-    db.refresh(status_obj)
+    await db.commit()
+    await db.refresh(status_obj)
+    await reference_cache.refresh(db)
 
     return status_obj
 
@@ -100,20 +103,21 @@ async def update_status(
 @router.delete("/{status_id}")
 async def delete_status(
     status_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Elimina un estado.
     """
-    status_obj = db.query(LeadStatus).filter(LeadStatus.id == status_id).first()
+    status_obj = await db.get(LeadStatus, status_id)
     if not status_obj:
         raise HTTPException(status_code=404, detail="Estado no encontrado")
 
     if status_obj.is_system:
         raise HTTPException(status_code=400, detail="No se puede eliminar un estado del sistema")
 
-    db.delete(status_obj)
-    db.commit()
+    await db.delete(status_obj)
+    await db.commit()
+    await reference_cache.refresh(db)
 
     return {"message": f"Estado '{status_obj.name}' eliminado correctamente"}
@@ -1,17 +1,22 @@
 """
 Endpoints de sugerencias de keywords.
 """
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.executors import run_io
 from app.api.deps import get_current_user
 from app.api.schemas import KeywordSuggestionResponse, KeywordCreate
 from app.models.keyword_suggestion import KeywordSuggestion
 from app.models.keyword import Keyword
-from app.models.lead import Lead, LeadTab
-from app.services.scraper import KeywordAnalyzer
+from app.services.keyword_ranking import KeywordRankingService
+from app.services.suggestion_analysis import (
+    JOB_ID_PATTERN, AnalysisJobStore, AnalysisLock, SuggestionAnalysisService, start_analysis_job
+)
 
 router = APIRouter(prefix="/suggestions", tags=["Sugerencias"])
 
@@ -19,145 +24,115 @@ router = APIRouter(prefix="/suggestions", tags=["Sugerencias"])
 @router.get("/country/{country_id}", response_model=List[KeywordSuggestionResponse])
 async def get_suggestions(
     country_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Obtiene sugerencias de keywords para un país.
     """
-    suggestions = db.query(KeywordSuggestion).filter(
+    suggestions = (await db.scalars(select(KeywordSuggestion).where(
         KeywordSuggestion.country_id == country_id,
         KeywordSuggestion.is_ignored == False,
         KeywordSuggestion.is_added == False
-    ).order_by(KeywordSuggestion.frequency.desc()).limit(50).all()
+    ).order_by(
+        KeywordSuggestion.score.desc().nulls_last(),
+        KeywordSuggestion.frequency.desc()
+    ).limit(50))).all()
 
     return suggestions
 
 
+@router.get("/terms/{country_id}")
+async def get_mined_terms(
+    country_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Términos (frases de 1 a 3 palabras) mejor puntuados de las webs
+    analizadas del país: TF-IDF sobre todas las webs, ponderado por lo
+    característicos que son de los leads guardados frente a los descartados.
+    """
+    return await SuggestionAnalysisService(db).rank(country_id, limit)
+
+
 @router.post("/analyze/{country_id}")
 async def analyze_country_leads(
     country_id: int,
-    limit: int = 20,
-    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1, le=2000),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Analiza los leads guardados de un país para generar sugerencias de keywords.
+    Solo procesa los leads nuevos, con otra URL o con el análisis caducado
+    (ANALYSIS_REFRESH_DAYS), hasta limit por ejecución. Con más de ANALYSIS_SYNC_LIMIT leads se lanza en segundo plano y se
+    devuelve el ID del trabajo. Si ya hay un análisis del país en curso, 409.
     """
-    # Obtener leads guardados (en pestaña Leads, no en NEW ni descartados)
-    leads = db.query(Lead).filter(
-        Lead.country_id == country_id,
-        Lead.tab == LeadTab.LEADS
-    ).order_by(Lead.found_at.desc()).limit(limit).all()
+    lock = await AnalysisLock.acquire(country_id)
+    if not lock:
+        raise HTTPException(status_code=409, detail="Ya hay un análisis en curso para este país")
 
-    if not leads:
-        return {"message": "No hay leads para analizar", "suggestions_added": 0}
-
-    analyzer = KeywordAnalyzer()
-    all_keywords = {}
-
-    for lead in leads:
+    if limit > settings.ANALYSIS_SYNC_LIMIT:
         try:
-            result = await analyzer.analyze_website(lead.url)
-
-            if result["success"]:
-                # Procesar meta keywords
-                for kw in result.get("meta_keywords", []):
-                    kw_lower = kw.lower().strip()
-                    if len(kw_lower) > 3:
-                        if kw_lower not in all_keywords:
-                            all_keywords[kw_lower] = {
-                                "frequency": 0,
-                                "websites": set(),
-                                "source": "meta"
-                            }
-                        all_keywords[kw_lower]["frequency"] += 1
-                        all_keywords[kw_lower]["websites"].add(lead.domain)
-
-                # Procesar keywords sugeridas del contenido
-                for item in result.get("suggested_keywords", []):
-                    kw = item["keyword"]
-                    if len(kw) > 3:
-                        if kw not in all_keywords:
-                            all_keywords[kw] = {
-                                "frequency": 0,
-                                "websites": set(),
-                                "source": "content"
-                            }
-                        all_keywords[kw]["frequency"] += item["frequency"]
-                        all_keywords[kw]["websites"].add(lead.domain)
-
+            job_id = start_analysis_job(country_id, limit, lock)
         except Exception:
-            continue
+            await lock.release()
+            raise
+        return {
+            "message": f"Análisis de hasta {limit} leads iniciado en segundo plano",
+            "job_id": job_id,
+            "status": "running",
+            "status_url": f"/api/suggestions/analysis-jobs/{job_id}"
+        }
 
-    # Guardar sugerencias en base de datos
-    suggestions_added = 0
-    existing_keywords = {
-        k.text.lower() for k in
-        db.query(Keyword).filter(Keyword.country_id == country_id).all()
-    }
+    try:
+        return await SuggestionAnalysisService(db).run(country_id, limit)
+    finally:
+        await lock.release()
 
-    for kw, data in all_keywords.items():
-        # Solo sugerir si aparece en múltiples webs o con alta frecuencia
-        if data["frequency"] >= 3 or len(data["websites"]) >= 2:
-            # No sugerir si ya existe como keyword
-            if kw in existing_keywords:
-                continue
-
-            # Verificar si ya existe como sugerencia
-            existing = db.query(KeywordSuggestion).filter(
-                KeywordSuggestion.country_id == country_id,
-                KeywordSuggestion.text == kw
-            ).first()
-
-            if existing:
-                existing.frequency = max(existing.frequency, data["frequency"])
-                existing.websites_count = max(existing.websites_count, len(data["websites"]))
-            else:
-                suggestion = KeywordSuggestion(
-                    country_id=country_id,
-                    text=kw,
-                    source=data["source"],
-                    frequency=data["frequency"],
-                    websites_count=len(data["websites"])
-                )
-                db.add(suggestion)
-                suggestions_added += 1
-
-    db.commit()
 
-    return {
-        "message": f"Análisis completado. {len(leads)} leads analizados.",
-        "keywords_found": len(all_keywords),
-        "suggestions_added": suggestions_added
-    }
+@router.get("/analysis-jobs/{job_id}")
+async def get_analysis_job(
+    job_id: str = Path(..., pattern=JOB_ID_PATTERN),
+    _: bool = Depends(get_current_user)
+):
+    """
+    Estado de un análisis en segundo plano (progreso y resultado).
+    """
+    job_status = await run_io(AnalysisJobStore().get, job_id)
+    if not job_status:
+        raise HTTPException(status_code=404, detail="Análisis no encontrado")
+
+    return job_status
 
 
 @router.post("/{suggestion_id}/add")
 async def add_suggestion_as_keyword(
     suggestion_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Añade una sugerencia como keyword de búsqueda.
     """
-    suggestion = db.query(KeywordSuggestion).filter(
-        KeywordSuggestion.id == suggestion_id
-    ).first()
+    suggestion = await db.get(KeywordSuggestion, suggestion_id)
 
     if not suggestion:
         raise HTTPException(status_code=404, detail="Sugerencia no encontrada")
 
     # Verificar que no existe ya
-    existing = db.query(Keyword).filter(
+    existing = await db.scalar(select(Keyword).where(
         Keyword.country_id == suggestion.country_id,
         Keyword.text == suggestion.text
-    ).first()
+    ))
 
     if existing:
         suggestion.is_added = True
-        db.commit()
+        await db.flush()
+        await KeywordRankingService(db).refresh_suggestions(suggestion.country_id)
+        await db.commit()
         return {"message": "La keyword ya existe", "keyword_id": existing.id}
 
     # Crear keyword
@@ -171,8 +146,12 @@ async def add_suggestion_as_keyword(
 
     suggestion.is_added = True
 
-    db.commit()
-    db.refresh(keyword)
+    await db.flush()
+    ranking = KeywordRankingService(db)
+    await ranking.refresh_keyword(keyword)
+    await ranking.refresh_suggestions(suggestion.country_id)
+    await db.commit()
+    await db.refresh(keyword)
 
     return {
         "message": f"Keyword '{suggestion.text}' añadida correctamente",
@@ -183,21 +162,21 @@ async def add_suggestion_as_keyword(
 @router.post("/{suggestion_id}/ignore")
 async def ignore_suggestion(
     suggestion_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Ignora una sugerencia (no volverá a aparecer).
     """
-    suggestion = db.query(KeywordSuggestion).filter(
-        KeywordSuggestion.id == suggestion_id
-    ).first()
+    suggestion = await db.get(KeywordSuggestion, suggestion_id)
 
     if not suggestion:
         raise HTTPException(status_code=404, detail="Sugerencia no encontrada")
 
     suggestion.is_ignored = True
-    db.commit()
+    await db.flush()
+    await KeywordRankingService(db).refresh_suggestions(suggestion.country_id)
+    await db.commit()
 
     return {"message": f"Sugerencia '{suggestion.text}' ignorada"}
 
@@ -205,49 +184,12 @@ async def ignore_suggestion(
 @router.get("/ranking/{country_id}")
 async def get_keyword_ranking(
     country_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(get_current_user)
 ):
     """
     Obtiene un ranking de las keywords más encontradas en las webs analizadas.
     Incluye tanto las sugerencias como las keywords actuales con sus estadísticas.
+    Se sirve de la tabla precalculada keyword_rankings.
     """
-    # Keywords actuales con estadísticas
-    keywords = db.query(Keyword).filter(
-        Keyword.country_id == country_id
-    ).order_by(Keyword.total_results.desc()).all()
-
-    current_keywords = [
-        {
-            "text": kw.text,
-            "type": "active",
-            "total_results": kw.total_results,
-            "total_searches": kw.total_searches,
-            "category": kw.category,
-            "is_active": kw.is_active
-        }
-        for kw in keywords
-    ]
-
-    # Sugerencias ordenadas por frecuencia
-    suggestions = db.query(KeywordSuggestion).filter(
-        KeywordSuggestion.country_id == country_id,
-        KeywordSuggestion.is_ignored == False
-    ).order_by(KeywordSuggestion.frequency.desc()).limit(30).all()
-
-    suggested_keywords = [
-        {
-            "text": s.text,
-            "type": "suggested",
-            "frequency": s.frequency,
-            "websites_count": s.websites_count,
-            "source": s.source,
-            "is_added": s.is_added
-        }
-        for s in suggestions
-    ]
-
-    return {
-        "current_keywords": current_keywords,
-        "suggested_keywords": suggested_keywords
-    }
+    return await KeywordRankingService(db).get(country_id)
@@ -23,7 +23,6 @@ class CountryBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     code: str = Field(..., min_length=2, max_length=10)
     language: str = Field(default="es", max_length=10)
-    flag_image: Optional[str] = None
 
 
 class CountryCreate(CountryBase):
@@ -34,12 +33,12 @@ class CountryUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     code: Optional[str] = Field(None, min_length=2, max_length=10)
     language: Optional[str] = Field(None, max_length=10)
-    flag_image: Optional[str] = None
     is_active: Optional[bool] = None
 
 
 class CountryResponse(CountryBase):
     id: int
+    flag_url: Optional[str] = None  # /api/countries/{id}/flag?v=...
     is_active: bool
     created_at: datetime
     keywords_count: int = 0
@@ -89,6 +88,13 @@ class LeadTabEnum(str, Enum):
     marketplace = "marketplace"
 
 
+class ExportFormatEnum(str, Enum):
+    xlsx = "xlsx"
+    csv = "csv"
+    ndjson = "ndjson"
+    parquet = "parquet"
+
+
 class LeadBase(BaseModel):
     name: str
     url: str
@@ -108,6 +114,41 @@ class LeadUpdate(BaseModel):
     is_reviewed: Optional[bool] = None
 
 
+class LeadSelection(BaseModel):
+    """Selección de leads para operaciones masivas: lista de IDs o filtro por país (lead_ids=[] no selecciona nada)."""
+    lead_ids: Optional[List[int]] = Field(None, max_length=10000)  # Un único IN (...) por operación
+    country_id: Optional[int] = None
+    tab: Optional[LeadTabEnum] = None
+    keyword_id: Optional[int] = None
+    status_id: Optional[int] = None
+    search: Optional[str] = None
+    include_company: bool = False  # Amplía la selección a los leads de las mismas empresas (todos los países)
+
+
+class BulkMove(BaseModel):
+    selection: LeadSelection
+    tab: LeadTabEnum
+
+
+class BulkStatus(BaseModel):
+    selection: LeadSelection
+    status_id: Optional[int] = None  # None = quitar estado
+
+
+class BulkReview(BaseModel):
+    selection: LeadSelection
+    is_reviewed: bool = True
+
+
+class BulkDelete(BaseModel):
+    selection: LeadSelection
+
+
+class BulkResult(BaseModel):
+    message: str
+    affected: int
+
+
 class NoteBase(BaseModel):
     content: str = Field(..., min_length=1)
 
@@ -136,6 +177,7 @@ class LeadResponse(LeadBase):
     status_name: Optional[str] = None
     status_color: Optional[str] = None
     notes_count: int = 0
+    cluster_id: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -145,6 +187,14 @@ class LeadDetailResponse(LeadResponse):
     notes: List[NoteResponse] = []
 
 
+class CompanyLeadsResponse(BaseModel):
+    """Leads de una misma empresa en todos los países."""
+    cluster_id: int
+    domains: List[str]
+    country_ids: List[int]
+    leads: List[LeadResponse]
+
+
 # ============ Status ============
 class StatusBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -213,6 +263,7 @@ class KeywordSuggestionResponse(BaseModel):
     source: Optional[str]
     frequency: int
     websites_count: int
+    score: Optional[float] = None
     is_ignored: bool
     is_added: bool
 
@@ -1,41 +1,105 @@
 """
 Configuración de la base de datos PostgreSQL con SQLAlchemy.
+
+Los endpoints usan el engine asíncrono (asyncpg) para no bloquear el event
+loop. El engine síncrono se mantiene para el arranque (migraciones, datos
+por defecto) y para el trabajo que ya corre en hilos: exportaciones en
+streaming, trabajos en segundo plano y el scheduler por línea de comandos.
 """
-from sqlalchemy import create_engine
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.metrics import TimedAsyncQueuePool, TimedQueuePool, instrument_engine
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
 
-# Crear engine de SQLAlchemy
+# Crear engine síncrono de SQLAlchemy
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
     pool_size=10,
-    max_overflow=20
+    max_overflow=20,
+    poolclass=TimedQueuePool
 )
+instrument_engine(engine, "sync")
 
 # Crear sesión local
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine y sesiones asíncronas (endpoints)
+# aiosqlite (desarrollo local) no usa pool de conexiones con tamaño
+async_pool_options = {} if settings.async_database_url.startswith("sqlite") else {
+    "pool_size": 10,
+    "max_overflow": 20,
+    "poolclass": TimedAsyncQueuePool
+}
+async_engine = create_async_engine(
+    settings.async_database_url,
+    pool_pre_ping=True,
+    **async_pool_options
+)
+instrument_engine(async_engine.sync_engine, "async")
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite no aplica las claves foráneas (ni ON DELETE CASCADE) si no se activan por conexión."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+for _engine in (engine, async_engine.sync_engine):
+    if _engine.dialect.name == "sqlite":
+        event.listen(_engine, "connect", _enable_sqlite_foreign_keys)
+
+# expire_on_commit=False: tras el commit los objetos se siguen pudiendo leer sin IO
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base para los modelos
 Base = declarative_base()
 
 
-def get_db():
+def dialect_insert(dialect_name: str):
+    """
+    insert() del dialecto, con soporte de ON CONFLICT (on_conflict_do_nothing
+    y on_conflict_do_update). Solo PostgreSQL y SQLite.
+    """
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Dialecto no soportado: {dialect_name}")
+    return insert
+
+
+async def get_db():
     """
-    Dependency para obtener sesión de base de datos.
+    Dependency para obtener sesión asíncrona de base de datos.
     Se usa en los endpoints de FastAPI.
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def init_db():
+def run_migrations():
     """
-    Inicializa la base de datos creando todas las tablas.
+    Aplica las migraciones de Alembic pendientes (alembic upgrade head).
+    Sustituye a create_all: el esquema y sus índices se gestionan en backend/alembic.
     """
-    from app.models import country, keyword, lead, note, status, search_log
-    Base.metadata.create_all(bind=engine)
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    config.attributes["configure_logging"] = False
+    command.upgrade(config, "head")
@@ -0,0 +1,211 @@
+"""
+Pools de ejecución para sacar trabajo bloqueante del event loop.
+
+- Pool de procesos (CPU): parseo de HTML, OCR y generación de exportaciones.
+- Pool de hilos (IO): llamadas bloqueantes (sesión síncrona de base de
+  datos, lectura de ficheros) que no tienen versión asíncrona.
+
+Los pools se crean en el lifespan de la aplicación con el tamaño de la
+configuración. Cada pool mide cuántas tareas esperan turno (cola) y cuánto
+tiempo esperan desde que se envían hasta que empiezan a ejecutarse.
+
+Fuera de la API (scripts, scheduler por línea de comandos) los pools no se
+arrancan y las tareas se ejecutan directamente en el hilo que las llama.
+"""
+import asyncio
+import contextvars
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, InvalidStateError, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("osmoleads.executors")
+
+
+def _timed_call(func: Callable, args: tuple, kwargs: dict, submitted_at: float) -> tuple:
+    """
+    Ejecuta la tarea en el worker y devuelve (espera en segundos, resultado).
+    Usa time.time() porque el worker puede ser otro proceso.
+    """
+    waited = max(0.0, time.time() - submitted_at)
+    return waited, func(*args, **kwargs)
+
+
+class InstrumentedExecutor:
+    """Executor con métricas de cola y tiempo de espera."""
+
+    def __init__(self, name: str, executor: Executor, workers: int):
+        self.name = name
+        self.executor = executor
+        self.workers = workers
+
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Tareas enviadas que aún no tienen worker libre."""
+        return max(0, self.in_flight - self.workers)
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Envía una tarea al pool y devuelve un Future con su resultado."""
+        result = Future()
+
+        with self._lock:
+            self.in_flight += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+        inner = self.executor.submit(_timed_call, func, args, kwargs, time.time())
+        inner.add_done_callback(lambda done: self._finish(done, result))
+        return result
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Ejecuta una tarea en el pool y espera su resultado sin bloquear el loop."""
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def _finish(self, done: Future, result: Future):
+        error = None if done.cancelled() else done.exception()
+
+        with self._lock:
+            self.in_flight -= 1
+            if done.cancelled() or error is not None:
+                self.failed += 1
+            else:
+                waited, _ = done.result()
+                self.completed += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+        # El Future externo puede estar cancelado si quien esperaba se canceló
+        try:
+            if done.cancelled():
+                result.cancel()
+            elif error is not None:
+                result.set_exception(error)
+            else:
+                result.set_result(done.result()[1])
+        except InvalidStateError:
+            pass
+
+    def stats(self) -> Dict:
+        """Métricas del pool."""
+        with self._lock:
+            finished = self.completed
+            return {
+                "workers": self.workers,
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_ms": round(self.wait_total / finished * 1000, 2) if finished else 0.0,
+                "max_wait_ms": round(self.wait_max * 1000, 2),
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+_cpu_pool: Optional[InstrumentedExecutor] = None
+_io_pool: Optional[InstrumentedExecutor] = None
+
+
+def start_executors():
+    """Crea los pools de procesos y de hilos (se llama en el lifespan)."""
+    global _cpu_pool, _io_pool
+
+    cpu_workers = settings.CPU_WORKERS or os.cpu_count() or 1
+    io_workers = settings.IO_WORKERS
+
+    # spawn: los workers no heredan conexiones ni hilos del proceso de la API
+    _cpu_pool = InstrumentedExecutor(
+        "cpu",
+        ProcessPoolExecutor(max_workers=cpu_workers, mp_context=multiprocessing.get_context("spawn")),
+        cpu_workers
+    )
+    _io_pool = InstrumentedExecutor(
+        "io",
+        ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="osmoleads-io"),
+        io_workers
+    )
+    logger.info(f"Pools de ejecución: {cpu_workers} procesos, {io_workers} hilos")
+
+
+def shutdown_executors():
+    """Cierra los pools esperando a las tareas en curso."""
+    global _cpu_pool, _io_pool
+
+    for pool in (_cpu_pool, _io_pool):
+        if pool:
+            pool.shutdown()
+    _cpu_pool = _io_pool = None
+
+
+def submit_cpu(func: Callable, *args, **kwargs) -> Future:
+    """
+    Envía una tarea al pool de procesos sin esperarla.
+    func y sus argumentos deben poder serializarse (funciones de módulo).
+    """
+    if _cpu_pool is None:
+        return _run_inline(func, *args, **kwargs)
+    return _cpu_pool.submit(func, *args, **kwargs)
+
+
+async def run_cpu(func: Callable, *args, **kwargs):
+    """Ejecuta trabajo de CPU en el pool de procesos."""
+    if _cpu_pool is None:
+        return func(*args, **kwargs)
+    return await _cpu_pool.run(func, *args, **kwargs)
+
+
+async def run_io(func: Callable, *args, **kwargs):
+    """
+    Ejecuta una llamada bloqueante en el pool de hilos, con el contexto de la
+    petición (las métricas cuentan el SQL que se hace en el hilo).
+    """
+    if _io_pool is None:
+        return func(*args, **kwargs)
+    context = contextvars.copy_context()
+    return await _io_pool.run(context.run, func, *args, **kwargs)
+
+
+async def iterate_in_io(iterator: Iterator) -> AsyncIterator:
+    """
+    Recorre un generador síncrono (p. ej. una exportación con sesión
+    síncrona) en el pool de hilos, un elemento cada vez.
+    """
+    done = object()
+    try:
+        while True:
+            item = await run_io(next, iterator, done)
+            if item is done:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close:
+            await run_io(close)
+
+
+def executor_stats() -> Dict:
+    """Métricas de los pools (vacío si no están arrancados)."""
+    return {pool.name: pool.stats() for pool in (_cpu_pool, _io_pool) if pool}
+
+
+def _run_inline(func: Callable, *args, **kwargs) -> Future:
+    future = Future()
+    try:
+        future.set_result(func(*args, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    return future
@@ -0,0 +1,320 @@
+"""
+Métricas de rendimiento en formato de texto de Prometheus (/api/metrics).
+
+- Latencia por ruta (histograma por método, plantilla de ruta y código).
+- Sentencias SQL: número y tiempo, en total y por ruta (eventos de SQLAlchemy).
+- Espera al sacar una conexión del pool de base de datos.
+- Llamadas HTTP salientes (Google, Vision, scraper): número y tiempo por
+  servicio, en total y por ruta.
+- Estado de los pools de ejecución (cola y tareas en curso).
+
+Lo que ocurre durante una petición se acumula en un RequestStats guardado en
+un contextvar; el middleware lo vuelca en las métricas por ruta al terminar.
+No depende de prometheus_client: el formato de texto es sencillo y así no se
+añade otra dependencia.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Buckets por defecto de Prometheus (segundos)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Contador con etiquetas."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Histograma acumulativo con etiquetas."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # etiquetas -> [cuentas por bucket (+Inf al final), suma]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labelnames, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total:.6f}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# ============ Métricas ============
+REQUEST_DURATION = Histogram(
+    "osmoleads_http_request_duration_seconds", "Duración de las peticiones a la API",
+    ("method", "route", "status")
+)
+ROUTE_SQL_STATEMENTS = Counter(
+    "osmoleads_route_sql_statements_total", "Sentencias SQL ejecutadas por ruta", ("route",)
+)
+ROUTE_SQL_SECONDS = Counter(
+    "osmoleads_route_sql_seconds_total", "Tiempo en sentencias SQL por ruta", ("route",)
+)
+ROUTE_OUTBOUND_CALLS = Counter(
+    "osmoleads_route_outbound_requests_total", "Llamadas HTTP salientes por ruta", ("route",)
+)
+ROUTE_OUTBOUND_SECONDS = Counter(
+    "osmoleads_route_outbound_seconds_total", "Tiempo en llamadas HTTP salientes por ruta", ("route",)
+)
+SQL_DURATION = Histogram(
+    "osmoleads_sql_statement_duration_seconds", "Duración de las sentencias SQL", ("engine",), SQL_BUCKETS
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "osmoleads_db_pool_checkout_wait_seconds", "Espera al sacar una conexión del pool", ("engine",), SQL_BUCKETS
+)
+OUTBOUND_DURATION = Histogram(
+    "osmoleads_outbound_request_duration_seconds", "Duración de las llamadas HTTP salientes (hasta las cabeceras)",
+    ("service", "status")
+)
+
+METRICS = (
+    REQUEST_DURATION, ROUTE_SQL_STATEMENTS, ROUTE_SQL_SECONDS, ROUTE_OUTBOUND_CALLS,
+    ROUTE_OUTBOUND_SECONDS, SQL_DURATION, POOL_CHECKOUT_WAIT, OUTBOUND_DURATION
+)
+
+
+class RequestStats:
+    """Lo que consume una petición (SQL y llamadas salientes)."""
+
+    __slots__ = ("sql_statements", "sql_seconds", "outbound_calls", "outbound_seconds")
+
+    def __init__(self):
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.outbound_calls = 0
+        self.outbound_seconds = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("osmoleads_request_stats", default=None)
+
+
+# ============ SQLAlchemy ============
+def instrument_engine(engine: Engine, label: str):
+    """Registra los eventos que miden cada sentencia SQL del engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("osmoleads_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["osmoleads_query_start"].pop()
+        SQL_DURATION.observe(elapsed, engine=label)
+        stats = current_request.get()
+        if stats is not None:
+            stats.sql_statements += 1
+            stats.sql_seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("osmoleads_query_start"):
+            connection.info["osmoleads_query_start"].pop()
+
+
+class _TimedCheckout:
+    """Mide cuánto se espera por una conexión libre (incluye abrirla si hace falta)."""
+
+    metrics_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start, engine=self.metrics_label)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    metrics_label = "sync"
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+# ============ HTTP saliente ============
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """Transporte de httpx que mide cada llamada saliente de un servicio."""
+
+    def __init__(self, service: str, **kwargs):
+        super().__init__(**kwargs)
+        self.service = service
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = await super().handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            OUTBOUND_DURATION.observe(elapsed, service=self.service, status=status)
+            stats = current_request.get()
+            if stats is not None:
+                stats.outbound_calls += 1
+                stats.outbound_seconds += elapsed
+
+
+def outbound_client(
+    service: str,
+    verify: bool = True,
+    limits: httpx.Limits = httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    **kwargs
+) -> httpx.AsyncClient:
+    """
+    httpx.AsyncClient cuyas llamadas se cuentan como el servicio indicado.
+    verify y limits son del transporte (con transporte propio, httpx ignora
+    los del cliente).
+    """
+    return httpx.AsyncClient(transport=InstrumentedTransport(service, verify=verify, limits=limits), **kwargs)
+
+
+# ============ Middleware ============
+_route_paths: Dict[object, str] = {}
+
+
+def route_label(scope) -> str:
+    """Plantilla de la ruta (/api/leads/{lead_id}) para no crear una serie por id."""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+
+    path = _route_paths.get(endpoint)
+    if path is None:
+        path = "unmatched"
+        for route in scope["app"].routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                path = route.path
+                break
+        _route_paths[endpoint] = path
+    return path
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada petición HTTP hasta que se envía el último
+    byte (también en las respuestas en streaming).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+
+            route = route_label(scope)
+            REQUEST_DURATION.observe(elapsed, method=scope["method"], route=route, status=status)
+            if stats.sql_statements:
+                ROUTE_SQL_STATEMENTS.inc(stats.sql_statements, route=route)
+                ROUTE_SQL_SECONDS.inc(stats.sql_seconds, route=route)
+            if stats.outbound_calls:
+                ROUTE_OUTBOUND_CALLS.inc(stats.outbound_calls, route=route)
+                ROUTE_OUTBOUND_SECONDS.inc(stats.outbound_seconds, route=route)
+
+
+def render_metrics() -> str:
+    """Todas las métricas en formato de texto de Prometheus."""
+    from app.core.executors import executor_stats
+
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+
+    pools = executor_stats()
+    for name, documentation in (
+        ("in_flight", "Tareas enviadas al pool que no han terminado"),
+        ("queue_depth", "Tareas esperando un worker libre"),
+    ):
+        metric = f"osmoleads_executor_{name}"
+        lines.append(f"# HELP {metric} {documentation}")
+        lines.append(f"# TYPE {metric} gauge")
+        for pool, stats in sorted(pools.items()):
+            lines.append(f'{metric}{{pool="{pool}"}} {stats[name]}')
+
+    return "\n".join(lines) + "\n"
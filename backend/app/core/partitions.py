@@ -0,0 +1,185 @@
+"""
+Particiones mensuales de search_logs (solo PostgreSQL).
+
+En PostgreSQL search_logs es una tabla particionada por rango de
+searched_at, con una partición por mes (search_logs_pAAAAMM, creada por la
+migración 0008). Así las consultas acotadas por fecha (el contador de
+búsquedas de hoy, el historial) solo leen las particiones del periodo, y la
+retención borra meses enteros con un DROP TABLE en lugar de un DELETE.
+
+Los registros de un mes sin partición van a la partición por defecto
+(search_logs_default), así que un INSERT nunca falla por falta de
+partición aunque no se hayan creado las del mes.
+
+- ensure_search_log_partitions: crea la del mes actual y las
+  SEARCH_LOG_PARTITIONS_AHEAD siguientes (al arrancar y tras las búsquedas
+  programadas), y las de los meses que tengan registros en la partición
+  por defecto, a las que pasa esos registros.
+- drop_expired_search_log_partitions: separa y borra (o solo separa, para
+  archivarlas) las particiones cuyo mes entero es anterior al corte. La
+  partición por defecto no se quita nunca.
+
+En SQLite la tabla no está particionada: las funciones no hacen nada y la
+retención sigue siendo el borrado por lotes de SearchRollupService.prune.
+"""
+import logging
+import re
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+
+logger = logging.getLogger("osmoleads.partitions")
+
+SEARCH_LOGS = "search_logs"
+DEFAULT_PARTITION = "search_logs_default"
+COLUMNS = (
+    "id, country_id, keyword_id, keyword_text, results_count, new_leads_count, "
+    "is_success, error_message, searched_at"
+)
+_PARTITION_NAME = re.compile(r"^search_logs_p(\d{4})(\d{2})$")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def next_month(value: date) -> date:
+    return (month_start(value) + timedelta(days=32)).replace(day=1)
+
+
+def partition_name(month: date) -> str:
+    return f"{SEARCH_LOGS}_p{month:%Y%m}"
+
+
+def is_partition_table(name: str) -> bool:
+    """True para los nombres de partición de search_logs (también las ya separadas)."""
+    return name == DEFAULT_PARTITION or bool(_PARTITION_NAME.match(name))
+
+
+def is_partitioned(connection: Connection) -> bool:
+    """True si search_logs es una tabla particionada (PostgreSQL tras la migración 0008)."""
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.scalar(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": SEARCH_LOGS}
+    ) or False
+
+
+def _partitions(connection: Connection) -> List[str]:
+    return list(connection.scalars(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(:name)
+        ORDER BY child.relname
+    """), {"name": SEARCH_LOGS}))
+
+
+def ensure_search_log_partitions(connection: Connection, months_ahead: Optional[int] = None) -> List[str]:
+    """
+    Crea las particiones que falten hasta months_ahead meses y las de los
+    meses con registros en la partición por defecto. Devuelve las creadas.
+    """
+    if not is_partitioned(connection):
+        return []
+
+    connection.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {SEARCH_LOGS} DEFAULT"))
+
+    months_ahead = settings.SEARCH_LOG_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    months = set()
+    month = month_start(datetime.utcnow().date())
+    for _ in range(max(months_ahead, 0) + 1):
+        months.add(month)
+        month = next_month(month)
+
+    stranded = {
+        value.date() if isinstance(value, datetime) else value
+        for value in connection.scalars(text(
+            f"SELECT DISTINCT date_trunc('month', searched_at) FROM {DEFAULT_PARTITION}"
+        ))
+    }
+    existing = set(_partitions(connection))
+    missing = sorted(month for month in months | stranded if partition_name(month) not in existing)
+    if not missing:
+        return []
+
+    # No se puede crear la partición de un mes con registros en la de por
+    # defecto: se separa, se crean las particiones, se pasan los registros
+    # y se vuelve a unir
+    moving = [month for month in missing if month in stranded]
+    if moving:
+        connection.execute(text(f"ALTER TABLE {SEARCH_LOGS} DETACH PARTITION {DEFAULT_PARTITION}"))
+
+    created = []
+    for month in missing:
+        name = partition_name(month)
+        bounds = {"start": month, "end": next_month(month)}
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {SEARCH_LOGS} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+        ))
+        if month in stranded:
+            connection.execute(text(
+                f"INSERT INTO {SEARCH_LOGS} ({COLUMNS}) SELECT {COLUMNS} FROM {DEFAULT_PARTITION} "
+                "WHERE searched_at >= :start AND searched_at < :end"
+            ), bounds)
+            connection.execute(text(
+                f"DELETE FROM {DEFAULT_PARTITION} WHERE searched_at >= :start AND searched_at < :end"
+            ), bounds)
+        created.append(name)
+
+    if moving:
+        connection.execute(text(f"ALTER TABLE {SEARCH_LOGS} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+        logger.warning(
+            f"Registros de {DEFAULT_PARTITION} pasados a sus particiones: "
+            f"{', '.join(partition_name(month) for month in moving)}"
+        )
+
+    logger.info(f"Particiones de {SEARCH_LOGS} creadas: {', '.join(created)}")
+    return created
+
+
+def drop_expired_search_log_partitions(
+    connection: Connection,
+    cutoff: datetime,
+    rolled_up_id: int,
+    detach_only: Optional[bool] = None
+) -> List[str]:
+    """
+    Separa de search_logs las particiones de meses que terminan antes de
+    cutoff y las borra (si detach_only, se quedan como tablas sueltas para
+    archivarlas). Solo las que ya están resumidas entero (su id máximo no
+    pasa de rolled_up_id). Devuelve las particiones quitadas.
+    """
+    if not is_partitioned(connection):
+        return []
+
+    detach_only = settings.SEARCH_LOG_DETACH_PARTITIONS if detach_only is None else detach_only
+    removed = []
+    for name in _partitions(connection):
+        match = _PARTITION_NAME.match(name)
+        if not match:
+            continue
+        month = date(int(match.group(1)), int(match.group(2)), 1)
+        if datetime.combine(next_month(month), datetime.min.time()) > cutoff:
+            continue
+
+        max_id = connection.scalar(text(f"SELECT MAX(id) FROM {name}"))
+        if max_id is not None and max_id > rolled_up_id:
+            logger.warning(f"{name} tiene registros sin resumir; no se quita")
+            continue
+
+        connection.execute(text(f"ALTER TABLE {SEARCH_LOGS} DETACH PARTITION {name}"))
+        if not detach_only:
+            connection.execute(text(f"DROP TABLE {name}"))
+        removed.append(name)
+
+    if removed:
+        action = "separadas" if detach_only else "borradas"
+        logger.info(f"Particiones de {SEARCH_LOGS} {action}: {', '.join(removed)}")
+    return removed
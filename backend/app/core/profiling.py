@@ -0,0 +1,200 @@
+"""
+Perfilado bajo demanda de peticiones lentas.
+
+Con PROFILING_ENABLED se añade un middleware que perfila con pyinstrument
+(profiler de muestreo, con soporte de asyncio) una fracción de las
+peticiones (PROFILE_SAMPLE_RATE) y, si se configura PROFILE_HEADER, las
+peticiones que lleven esa cabecera con un token de acceso válido (el mismo
+del PIN), para que un cliente sin autenticar no pueda lanzar perfiles. De
+cada petición perfilada se guarda en PROFILE_DIR:
+
+- <id>.html: árbol de llamadas interactivo de pyinstrument.
+- <id>.json: ruta, duración, código y las sentencias SQL ejecutadas.
+
+La respuesta lleva la cabecera X-Profile-Id con el id del perfil. Con el
+perfilado desactivado el middleware no se instala y no hay ningún coste.
+"""
+import json
+import logging
+import random
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.executors import run_io
+from app.core.security import verify_token
+
+logger = logging.getLogger("osmoleads.profiling")
+
+PROFILE_ID_PATTERN = r"^\d+_[0-9a-f]{8}$"
+MAX_STATEMENTS = 500  # Sentencias SQL guardadas por perfil
+
+# Sentencias SQL de la petición que se está perfilando (None = no se perfila)
+current_sql_log: ContextVar[Optional[List[Dict]]] = ContextVar("osmoleads_profile_sql", default=None)
+
+
+def capture_sql(engine: Engine):
+    """Guarda en el perfil activo las sentencias SQL del engine y su duración."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if current_sql_log.get() is not None:
+            conn.info["osmoleads_profile_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        log = current_sql_log.get()
+        start = conn.info.pop("osmoleads_profile_start", None)
+        if log is None or start is None or len(log) >= MAX_STATEMENTS:
+            return
+        log.append({
+            "statement": statement,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            "executemany": executemany
+        })
+
+
+class ProfileStore:
+    """Perfiles guardados en disco (se conservan los PROFILE_KEEP más recientes)."""
+
+    def __init__(self, profile_dir: Optional[str] = None):
+        self.profile_dir = Path(profile_dir or settings.PROFILE_DIR)
+
+    @staticmethod
+    def new_id() -> str:
+        return f"{int(time.time() * 1000)}_{uuid.uuid4().hex[:8]}"
+
+    def html_path(self, profile_id: str) -> Path:
+        return self.profile_dir / f"{profile_id}.html"
+
+    def metadata_path(self, profile_id: str) -> Path:
+        return self.profile_dir / f"{profile_id}.json"
+
+    def save(self, profile_id: str, profiler, metadata: Dict):
+        """Escribe el árbol de llamadas y los metadatos (se llama en el pool de hilos)."""
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        self.html_path(profile_id).write_text(profiler.output_html(), encoding="utf-8")
+        self.metadata_path(profile_id).write_text(
+            json.dumps(metadata, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        self._prune()
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        path = self.metadata_path(profile_id)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        """Resumen de los perfiles más recientes (sin las sentencias SQL)."""
+        profiles = []
+        for path in self._metadata_files()[:limit]:
+            try:
+                metadata = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue  # Borrado o escribiéndose
+            metadata.pop("statements", None)
+            profiles.append(metadata)
+        return profiles
+
+    def _metadata_files(self) -> List[Path]:
+        if not self.profile_dir.exists():
+            return []
+        return sorted(
+            (path for path in self.profile_dir.glob("*.json") if re.match(PROFILE_ID_PATTERN, path.stem)),
+            key=lambda path: int(path.stem.split("_")[0]),
+            reverse=True
+        )
+
+    def _prune(self):
+        for path in self._metadata_files()[settings.PROFILE_KEEP:]:
+            path.unlink(missing_ok=True)
+            self.html_path(path.stem).unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI que perfila las peticiones elegidas."""
+
+    def __init__(self, app, store: Optional[ProfileStore] = None):
+        from app.core.database import async_engine, engine
+
+        self.app = app
+        self.store = store or ProfileStore()
+        self.header = settings.PROFILE_HEADER.lower().encode()
+        self.active = 0
+
+        capture_sql(engine)
+        capture_sql(async_engine.sync_engine)
+
+    def trigger(self, scope) -> Optional[str]:
+        """Motivo por el que se perfila la petición (None = no se perfila)."""
+        if self.active >= settings.PROFILE_MAX_CONCURRENT:
+            return None
+        if self.header and any(
+            name == self.header and verify_token(value.decode("latin-1")) for name, value in scope["headers"]
+        ):
+            return "header"
+        if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self.trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        from pyinstrument import Profiler
+
+        profile_id = self.store.new_id()
+        statements: List[Dict] = []
+        status = 500
+
+        async def send_with_profile_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode())
+                ]
+            await send(message)
+
+        token = current_sql_log.set(statements)
+        profiler = Profiler(interval=settings.PROFILE_INTERVAL, async_mode="enabled")
+        self.active += 1
+        created_at = datetime.utcnow()
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            duration = time.perf_counter() - start
+            self.active -= 1
+            current_sql_log.reset(token)
+
+            query_string = scope.get("query_string", b"").decode("latin-1")
+            metadata = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"] + (f"?{query_string}" if query_string else ""),
+                "status": status,
+                "trigger": trigger,
+                "duration_ms": round(duration * 1000, 1),
+                "sql_count": len(statements),
+                "sql_ms": round(sum(statement["duration_ms"] for statement in statements), 1),
+                "created_at": created_at.isoformat(),
+                "statements": statements
+            }
+            try:
+                await run_io(self.store.save, profile_id, profiler, metadata)
+            except Exception as e:
+                logger.warning(f"No se pudo guardar el perfil {profile_id}: {e}")
@@ -1,6 +1,9 @@
 """
 Funciones de seguridad: verificación de PIN y tokens.
 """
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -10,6 +13,45 @@ from app.core.config import settings
 ALGORITHM = "HS256"
 
 
+class TokenCache:
+    """
+    Caché LRU de tokens ya verificados: token -> expiración (timestamp).
+    Un token en caché se acepta sin volver a comprobar la firma ni decodificar
+    el JSON hasta que expira. Solo se guardan tokens válidos.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> bool:
+        """Indica si el token está en caché y no ha expirado."""
+        with self._lock:
+            expires_at = self._tokens.get(token)
+            if expires_at is None:
+                return False
+            if expires_at <= time.time():
+                del self._tokens[token]
+                return False
+            self._tokens.move_to_end(token)
+            return True
+
+    def add(self, token: str, expires_at: float):
+        with self._lock:
+            self._tokens[token] = expires_at
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > self.max_size:
+                self._tokens.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
+
+
 def verify_pin(pin: str) -> bool:
     """
     Verifica si el PIN introducido es correcto.
@@ -39,9 +81,20 @@ def create_access_token(expires_delta: Optional[timedelta] = None) -> str:
 def verify_token(token: str) -> bool:
     """
     Verifica si un token JWT es válido.
+    Los tokens ya verificados se sirven de la caché hasta su expiración.
     """
+    if token_cache.get(token):
+        return True
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub") == "osmoleads_access"
     except JWTError:
         return False
+
+    if payload.get("sub") != "osmoleads_access":
+        return False
+
+    # create_access_token siempre incluye exp; sin él no se cachea
+    if "exp" in payload:
+        token_cache.add(token, float(payload["exp"]))
+    return True
@@ -0,0 +1,65 @@
+"""
+Datos por defecto: estados de lead, marketplaces y configuración.
+
+Se insertan al arrancar con un único INSERT ... ON CONFLICT DO NOTHING por
+tabla, así que es idempotente y no consulta fila a fila qué existe ya.
+"""
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.models.marketplace import Marketplace
+from app.models.settings import AppSettings
+from app.models.status import LeadStatus
+
+DEFAULT_STATUSES = [
+    {"name": "Pendiente", "color": "#6B7280", "icon": "clock", "order": 0, "is_default": True},
+    {"name": "Competencia", "color": "#F59E0B", "icon": "building", "order": 1, "is_default": False},
+    {"name": "Cliente", "color": "#10B981", "icon": "check-circle", "order": 2, "is_default": False},
+    {"name": "En gestión", "color": "#3B82F6", "icon": "phone", "order": 3, "is_default": False},
+    {"name": "Captado", "color": "#8B5CF6", "icon": "star", "order": 4, "is_default": False},
+]
+
+DEFAULT_MARKETPLACES = [
+    "amazon.es", "amazon.com", "amazon.fr",
+    "ebay.es", "ebay.com", "ebay.fr",
+    "aliexpress.com", "alibaba.com",
+    "leroymerlin.es", "leroymerlin.fr",
+    "mediamarkt.es", "pccomponentes.com",
+    "elcorteingles.es", "carrefour.es",
+    "wallapop.com", "milanuncios.com",
+    "manomano.es", "manomano.fr"
+]
+
+
+def insert_ignore(connection: Connection, model, rows: list, conflict_column: str):
+    """INSERT de varias filas que ignora las que ya existen (por su columna única)."""
+    insert = dialect_insert(connection.dialect.name)
+    statement = insert(model).values(rows).on_conflict_do_nothing(index_elements=[conflict_column])
+    return connection.execute(statement)
+
+
+def seed_defaults(connection: Connection):
+    """Inserta los datos por defecto que falten (tres sentencias en total)."""
+    insert_ignore(
+        connection, LeadStatus,
+        [{**status, "is_system": True} for status in DEFAULT_STATUSES],
+        "name"
+    )
+    insert_ignore(
+        connection, Marketplace,
+        [
+            {"domain": domain, "name": domain.split(".")[0].title(), "is_system": True}
+            for domain in DEFAULT_MARKETPLACES
+        ],
+        "domain"
+    )
+    insert_ignore(
+        connection, AppSettings,
+        [{
+            "key": "max_searches",
+            "value": str(settings.MAX_SEARCHES_DEFAULT),
+            "description": "Límite máximo de búsquedas diarias (0 = ilimitado)"
+        }],
+        "key"
+    )
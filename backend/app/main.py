@@ -2,13 +2,19 @@
 Aplicación principal de Osmoleads API.
 FastAPI backend para el sistema de gestión de leads.
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
-from app.core.database import init_db, engine, Base
-from app.api.routes import auth, countries, keywords, leads, search, statuses, settings as settings_routes, images, suggestions
+from app.core.database import SessionLocal, async_engine, engine, run_migrations
+from app.core.executors import start_executors, shutdown_executors, executor_stats
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.profiling import ProfilingMiddleware
+from app.core.partitions import ensure_search_log_partitions
+from app.core.seed import seed_defaults
+from app.services.reference_cache import reference_cache
+from app.api.routes import auth, countries, keywords, leads, search, statuses, settings as settings_routes, images, suggestions, profiles
 
 
 @asynccontextmanager
@@ -19,73 +25,54 @@ async def lifespan(app: FastAPI):
     # Startup
     print(f"Iniciando {settings.APP_NAME} v{settings.APP_VERSION}")
 
-    # Crear tablas si no existen
-    Base.metadata.create_all(bind=engine)
+    # Aplicar migraciones pendientes (crea las tablas en una base de datos nueva).
+    # En producción se puede desactivar y ejecutar `alembic upgrade head` en el despliegue.
+    if settings.RUN_MIGRATIONS_ON_STARTUP:
+        run_migrations()
 
-    # Inicializar datos por defecto
-    from app.core.database import SessionLocal
-    from app.models.status import LeadStatus
-    from app.models.marketplace import Marketplace
-    from app.models.settings import AppSettings
+    # Inicializar datos por defecto (idempotente, una sentencia por tabla)
+    try:
+        with engine.begin() as connection:
+            seed_defaults(connection)
+    except Exception as e:
+        print(f"Error inicializando datos: {e}")
 
-    db = SessionLocal()
+    # Particiones de search_logs del mes actual y los siguientes (solo PostgreSQL)
     try:
-        # Crear estados por defecto si no existen
-        default_statuses = [
-            {"name": "Pendiente", "color": "#6B7280", "icon": "clock", "order": 0, "is_default": True, "is_system": True},
-            {"name": "Competencia", "color": "#F59E0B", "icon": "building", "order": 1, "is_system": True},
-            {"name": "Cliente", "color": "#10B981", "icon": "check-circle", "order": 2, "is_system": True},
-            {"name": "En gestión", "color": "#3B82F6", "icon": "phone", "order": 3, "is_system": True},
-            {"name": "Captado", "color": "#8B5CF6", "icon": "star", "order": 4, "is_system": True},
-        ]
-
-        for status_data in default_statuses:
-            existing = db.query(LeadStatus).filter(LeadStatus.name == status_data["name"]).first()
-            if not existing:
-                status = LeadStatus(**status_data)
-                db.add(status)
-
-        # Crear marketplaces por defecto
-        default_marketplaces = [
-            "amazon.es", "amazon.com", "amazon.fr",
-            "ebay.es", "ebay.com", "ebay.fr",
-            "aliexpress.com", "alibaba.com",
-            "leroymerlin.es", "leroymerlin.fr",
-            "mediamarkt.es", "pccomponentes.com",
-            "elcorteingles.es", "carrefour.es",
-            "wallapop.com", "milanuncios.com",
-            "manomano.es", "manomano.fr"
-        ]
-
-        for domain in default_marketplaces:
-            existing = db.query(Marketplace).filter(Marketplace.domain == domain).first()
-            if not existing:
-                marketplace = Marketplace(domain=domain, name=domain.split(".")[0].title(), is_system=True)
-                db.add(marketplace)
-
-        # Crear configuración por defecto
-        if not db.query(AppSettings).filter(AppSettings.key == "max_searches").first():
-            setting = AppSettings(
-                key="max_searches",
-                value=str(settings.MAX_SEARCHES_DEFAULT),
-                description="Límite máximo de búsquedas diarias (0 = ilimitado)"
-            )
-            db.add(setting)
-
-        db.commit()
+        with engine.begin() as connection:
+            ensure_search_log_partitions(connection)
+    except Exception as e:
+        print(f"Error creando particiones de search_logs: {e}")
 
+    # Migrar banderas antiguas (base64 en countries.flag_image) al almacén binario
+    from app.services.flag_store import FlagStore
+
+    db = SessionLocal()
+    try:
+        migrated = FlagStore(db).migrate_legacy()
+        if migrated:
+            print(f"Banderas migradas al almacén binario: {migrated}")
     except Exception as e:
-        print(f"Error inicializando datos: {e}")
+        print(f"Error migrando banderas: {e}")
         db.rollback()
     finally:
         db.close()
 
+    # Pools de procesos e hilos para el trabajo bloqueante
+    start_executors()
+
+    # Invalidación de la caché de referencia desde otros workers (LISTEN/NOTIFY)
+    reference_cache.start_listener()
+
     print("Aplicación iniciada correctamente")
 
     yield
 
     # Shutdown
     print("Cerrando aplicación...")
+    await reference_cache.stop_listener()
+    shutdown_executors()
+    await async_engine.dispose()
 
 
 # Crear aplicación FastAPI
@@ -108,6 +95,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Perfilado bajo demanda (solo se instala si está activado)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Métricas por petición (latencia, SQL y llamadas salientes) para /api/metrics
+app.add_middleware(MetricsMiddleware)
+
 
 # Registrar routers
 app.include_router(auth.router, prefix="/api")
@@ -119,6 +113,7 @@ app.include_router(statuses.router, prefix="/api")
 app.include_router(settings_routes.router, prefix="/api")
 app.include_router(images.router, prefix="/api")
 app.include_router(suggestions.router, prefix="/api")
+app.include_router(profiles.router, prefix="/api")
 
 
 # Endpoint de salud
@@ -130,10 +125,19 @@ async def health_check():
     return {
         "status": "ok",
         "app": settings.APP_NAME,
-        "version": settings.APP_VERSION
+        "version": settings.APP_VERSION,
+        "executors": executor_stats()
     }
 
 
+@app.get("/api/metrics")
+async def metrics():
+    """
+    Métricas de rendimiento en formato de texto de Prometheus.
+    """
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")  # Starlette añade el charset
+
+
 @app.get("/api")
 async def root():
     """
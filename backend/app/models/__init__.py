@@ -1,22 +1,31 @@
 # Models module
 from app.models.country import Country
+from app.models.country_flag import CountryFlag
 from app.models.keyword import Keyword
 from app.models.lead import Lead
 from app.models.note import Note
 from app.models.status import LeadStatus
 from app.models.search_log import SearchLog
+from app.models.search_log_daily import SearchLogDaily
 from app.models.keyword_suggestion import KeywordSuggestion
+from app.models.lead_analysis import LeadAnalysis, KeywordTermStat
+from app.models.keyword_ranking import KeywordRanking
 from app.models.marketplace import Marketplace
 from app.models.settings import AppSettings
 
 __all__ = [
     "Country",
+    "CountryFlag",
     "Keyword",
     "Lead",
     "Note",
     "LeadStatus",
     "SearchLog",
+    "SearchLogDaily",
     "KeywordSuggestion",
+    "LeadAnalysis",
+    "KeywordTermStat",
+    "KeywordRanking",
     "Marketplace",
     "AppSettings"
 ]
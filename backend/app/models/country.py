@@ -2,7 +2,7 @@
 Modelo de País - Representa un mercado/país donde se realizan búsquedas.
 """
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from app.core.database import Base
 
@@ -14,7 +14,8 @@ class Country(Base):
     name = Column(String(100), nullable=False, unique=True)  # España, Francia...
     code = Column(String(10), nullable=False)  # ES, FR, PT...
     language = Column(String(10), nullable=False, default="es")  # es, fr, pt...
-    flag_image = Column(Text, nullable=True)  # Ruta a la imagen de bandera
+    # Legado: data URL en base64. Se migra a country_flags al arrancar y nunca se carga en las consultas
+    flag_image = deferred(Column(Text, nullable=True))
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -22,6 +23,7 @@ class Country(Base):
     # Relaciones
     keywords = relationship("Keyword", back_populates="country", cascade="all, delete-orphan")
     leads = relationship("Lead", back_populates="country", cascade="all, delete-orphan")
+    flag = relationship("CountryFlag", uselist=False, cascade="all, delete-orphan", lazy="selectin")
 
     def __repr__(self):
         return f"<Country {self.name} ({self.code})>"
@@ -0,0 +1,21 @@
+"""
+Modelo de CountryFlag - Imagen de bandera de un país almacenada en binario.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary
+from sqlalchemy.orm import deferred
+from datetime import datetime
+from app.core.database import Base
+
+
+class CountryFlag(Base):
+    __tablename__ = "country_flags"
+
+    country_id = Column(Integer, ForeignKey("countries.id", ondelete="CASCADE"), primary_key=True)
+    content = deferred(Column(LargeBinary, nullable=False))  # Bytes de la imagen (solo se cargan al servirla)
+    content_type = Column(String(100), nullable=False)  # image/png, image/svg+xml...
+    etag = Column(String(64), nullable=False)  # SHA-256 del contenido
+    size = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<CountryFlag country={self.country_id} ({self.content_type})>"
@@ -11,7 +11,7 @@ class Keyword(Base):
     __tablename__ = "keywords"
 
     id = Column(Integer, primary_key=True, index=True)
-    country_id = Column(Integer, ForeignKey("countries.id", ondelete="CASCADE"), nullable=False)
+    country_id = Column(Integer, ForeignKey("countries.id", ondelete="CASCADE"), nullable=False, index=True)
     text = Column(String(255), nullable=False)  # La palabra clave
     category = Column(String(50), nullable=True)  # producto, competencia, general
     results_per_search = Column(Integer, default=5)  # Cuántos resultados por búsqueda
@@ -0,0 +1,49 @@
+"""
+Modelo de KeywordRanking - Ranking precalculado de keywords y sugerencias por país.
+
+Una fila por keyword (rendimiento de sus búsquedas) y por sugerencia de las
+mejor puntuadas. Se actualiza al terminar cada búsqueda o análisis y al
+cambiar keywords o sugerencias (services/keyword_ranking.py), así que el
+ranking se sirve con una sola consulta por índice.
+"""
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class KeywordRanking(Base):
+    __tablename__ = "keyword_rankings"
+
+    id = Column(Integer, primary_key=True)
+    country_id = Column(Integer, ForeignKey("countries.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(20), nullable=False)  # active (keyword), suggested (sugerencia)
+    keyword_id = Column(Integer, ForeignKey("keywords.id", ondelete="CASCADE"), nullable=True, unique=True)
+    suggestion_id = Column(
+        Integer, ForeignKey("keyword_suggestions.id", ondelete="CASCADE"), nullable=True, unique=True
+    )
+    text = Column(String(255), nullable=False)
+    sort_value = Column(Float, nullable=False, default=0)  # Resultados (keywords) u orden por puntuación (sugerencias)
+
+    # Keywords: rendimiento de las búsquedas
+    category = Column(String(50), nullable=True)
+    is_active = Column(Boolean, nullable=True)
+    total_searches = Column(Integer, nullable=True)
+    total_results = Column(Integer, nullable=True)
+    new_leads = Column(Integer, nullable=True)  # Suma de leads nuevos de sus búsquedas
+    new_leads_per_search = Column(Float, nullable=True)
+
+    # Sugerencias: frecuencia y puntuación del análisis de webs
+    source = Column(String(50), nullable=True)
+    frequency = Column(Integer, nullable=True)
+    websites_count = Column(Integer, nullable=True)
+    score = Column(Float, nullable=True)
+    is_added = Column(Boolean, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_keyword_rankings_country_kind_sort", country_id, kind, sort_value),
+    )
+
+    def __repr__(self):
+        return f"<KeywordRanking {self.kind} {self.text}>"
@@ -1,7 +1,7 @@
 """
 Modelo de KeywordSuggestion - Sugerencias de keywords basadas en análisis.
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Float, Index
 from datetime import datetime
 from app.core.database import Base
 
@@ -15,10 +15,15 @@ class KeywordSuggestion(Base):
     source = Column(String(50), nullable=True)  # meta, title, h1, content
     frequency = Column(Integer, default=1)  # Cuántas veces se ha encontrado
     websites_count = Column(Integer, default=1)  # En cuántas webs diferentes
+    score = Column(Float, nullable=True)  # Puntuación TF-IDF x lift (term_mining.rank_terms)
     is_ignored = Column(Boolean, default=False)  # Si el usuario la ha ignorado
     is_added = Column(Boolean, default=False)  # Si ya se añadió a keywords
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        Index("uq_keyword_suggestions_country_text", country_id, text, unique=True),
+    )
+
     def __repr__(self):
         return f"<KeywordSuggestion {self.text}>"
@@ -1,7 +1,7 @@
 """
 Modelo de Lead - Empresas encontradas en las búsquedas.
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -35,6 +35,10 @@ class Lead(Base):
     email = Column(String(255), nullable=True)
     phone = Column(String(50), nullable=True)
     cif = Column(String(20), nullable=True)
+    email_domain = Column(String(255), nullable=True)  # Dominio del email (sin correo gratuito)
+
+    # Empresa: id más bajo de los leads con el mismo dominio, CIF o dominio de email
+    cluster_id = Column(Integer, nullable=True)
 
     # Clasificación
     tab = Column(Enum(LeadTab), default=LeadTab.NEW, nullable=False, index=True)
@@ -42,6 +46,7 @@ class Lead(Base):
 
     # Metadatos
     found_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow)
     reviewed_at = Column(DateTime, nullable=True)
     contact_extracted = Column(Boolean, default=False)  # Si ya se hizo scraping
     contact_extracted_at = Column(DateTime, nullable=True)
@@ -52,5 +57,16 @@ class Lead(Base):
     status = relationship("LeadStatus", back_populates="leads")
     notes = relationship("Note", back_populates="lead", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Listado por país y pestaña, del más reciente al más antiguo
+        Index("ix_leads_country_tab_found", country_id, tab, found_at.desc()),
+        # Un dominio solo puede estar una vez por país
+        Index("uq_leads_country_domain", country_id, domain, unique=True),
+        # Agrupación de leads de la misma empresa (services/lead_clusters.py)
+        Index("ix_leads_cluster_id", cluster_id),
+        Index("ix_leads_email_domain", email_domain),
+        Index("ix_leads_cif", cif),
+    )
+
     def __repr__(self):
         return f"<Lead {self.domain}>"
@@ -0,0 +1,47 @@
+"""
+Modelos del análisis incremental de webs para las sugerencias de keywords.
+
+- LeadAnalysis: último análisis de la web de un lead (cuándo, hash del
+  contenido analizado y términos extraídos con su frecuencia).
+- KeywordTermStat: agregado por país de los términos de todas las webs
+  analizadas, por separado para los leads guardados y los descartados.
+  Cada análisis suma sus términos en el lado de su pestaña y, si la web
+  cambia o el lead cambia de pestaña, se restan los del análisis anterior.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Text
+from datetime import datetime
+from app.core.database import Base
+
+
+class LeadAnalysis(Base):
+    __tablename__ = "lead_analyses"
+
+    id = Column(Integer, primary_key=True)
+    # SET NULL: al borrar el lead el análisis queda huérfano y el siguiente
+    # análisis del país resta sus términos del agregado
+    lead_id = Column(Integer, ForeignKey("leads.id", ondelete="SET NULL"), nullable=True, unique=True)
+    country_id = Column(Integer, ForeignKey("countries.id", ondelete="CASCADE"), nullable=False, index=True)
+    url = Column(Text, nullable=False)  # URL analizada
+    content_hash = Column(String(64), nullable=True)  # SHA-256 del contenido analizado (None si falló)
+    tab = Column(String(20), nullable=False, default="leads")  # Lado del agregado en que cuenta: leads, discarded
+    terms = Column(JSON, nullable=False, default=dict)  # {término: {"frequency": n, "source": "meta"|"content"}}
+    error = Column(String(255), nullable=True)  # Error del último intento
+    analyzed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<LeadAnalysis lead={self.lead_id} ({len(self.terms or {})} términos)>"
+
+
+class KeywordTermStat(Base):
+    __tablename__ = "keyword_term_stats"
+
+    country_id = Column(Integer, ForeignKey("countries.id", ondelete="CASCADE"), primary_key=True)
+    text = Column(String(255), primary_key=True)
+    source = Column(String(50), nullable=True)  # meta, content
+    frequency = Column(Integer, nullable=False, default=0)  # Suma de apariciones en las webs de leads guardados
+    websites_count = Column(Integer, nullable=False, default=0)  # Webs de leads guardados en las que aparece
+    discarded_count = Column(Integer, nullable=False, default=0)  # Webs de leads descartados en las que aparece
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<KeywordTermStat {self.text} ({self.websites_count} webs)>"
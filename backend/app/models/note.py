@@ -1,7 +1,7 @@
 """
 Modelo de Note - Notas/anotaciones de cada lead.
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -19,5 +19,9 @@ class Note(Base):
     # Relaciones
     lead = relationship("Lead", back_populates="notes")
 
+    __table_args__ = (
+        Index("ix_notes_lead_created", lead_id, created_at),
+    )
+
     def __repr__(self):
         return f"<Note {self.id} for Lead {self.lead_id}>"
@@ -1,7 +1,11 @@
 """
 Modelo de SearchLog - Registro de búsquedas realizadas.
+
+En PostgreSQL la tabla está particionada por meses de searched_at (ver
+app/core/partitions.py); por eso searched_at es obligatorio y la clave
+primaria de la base de datos es (id, searched_at).
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from datetime import datetime
 from app.core.database import Base
 
@@ -17,7 +21,11 @@ class SearchLog(Base):
     new_leads_count = Column(Integer, default=0)  # Leads nuevos (no duplicados)
     is_success = Column(Boolean, default=True)
     error_message = Column(String(500), nullable=True)
-    searched_at = Column(DateTime, default=datetime.utcnow)
+    searched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_search_logs_searched_at", searched_at),
+    )
 
     def __repr__(self):
         return f"<SearchLog {self.keyword_text} at {self.searched_at}>"
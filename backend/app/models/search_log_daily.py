@@ -0,0 +1,35 @@
+"""
+Modelo de SearchLogDaily - Resumen diario de búsquedas por país y keyword.
+
+Se rellena desde search_logs (services/search_rollups.py) y se conserva
+aunque los registros originales se borren por antigüedad. No tiene claves
+foráneas para que el historial sobreviva al borrado de keywords o países:
+0 significa país o keyword desconocidos (borrados antes de la búsqueda).
+"""
+from sqlalchemy import Column, Integer, String, Date, DateTime, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class SearchLogDaily(Base):
+    __tablename__ = "search_log_daily"
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    country_id = Column(Integer, nullable=False, default=0)
+    keyword_id = Column(Integer, nullable=False, default=0)
+    keyword_text = Column(String(255), nullable=True)
+    searches = Column(Integer, nullable=False, default=0)  # Búsquedas (= unidades de cuota de la API)
+    results = Column(Integer, nullable=False, default=0)
+    new_leads = Column(Integer, nullable=False, default=0)
+    errors = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("uq_search_log_daily_bucket", day, country_id, keyword_id, unique=True),
+        # Analíticas por país y periodo
+        Index("ix_search_log_daily_country_day", country_id, day),
+    )
+
+    def __repr__(self):
+        return f"<SearchLogDaily {self.day} {self.keyword_text}: {self.searches}>"
@@ -0,0 +1,101 @@
+"""
+Índice en memoria de los dominios de leads de cada país (dominio -> id).
+
+GoogleSearchService lo consulta para saber si un resultado ya es un lead
+del país sin ir a la base de datos: en las búsquedas programadas la
+mayoría de resultados son dominios ya guardados. El índice de un país se
+carga entero la primera vez que se consulta (una consulta sobre el índice
+único (country_id, domain)) y después se mantiene:
+
+- add: tras el commit de los leads nuevos de una búsqueda.
+- removed: tras borrar leads o un país. Con PostgreSQL se avisa al resto
+  de procesos con NOTIFY (por el listener de reference_cache), que olvidan
+  el país y lo vuelven a cargar cuando lo necesiten.
+
+Que falte un dominio no es un problema: el lead se inserta con ON CONFLICT
+DO NOTHING y, si ya existía, se lee su id. Que sobre sí lo sería (un lead
+borrado no se volvería a guardar), por eso se propagan los borrados.
+"""
+import asyncio
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.lead import Lead
+from app.services.reference_cache import reference_cache
+
+
+class DomainIndex:
+    """Dominios de leads por país, cargados bajo demanda."""
+
+    CHANNEL = "osmoleads_domains"
+
+    def __init__(self):
+        self._countries: Dict[int, Dict[str, int]] = {}
+        self._generation = 0  # Cambia en cada borrado
+        self._lock = asyncio.Lock()
+
+    async def get(self, db: AsyncSession, country_id: int) -> Dict[str, int]:
+        """Dominios del país con el id de su lead, cargándolos si no están en memoria."""
+        domains = self._countries.get(country_id)
+        if domains is not None:
+            return domains
+
+        async with self._lock:
+            if country_id not in self._countries:
+                generation = self._generation
+                domains = dict((await db.execute(
+                    select(Lead.domain, Lead.id).where(Lead.country_id == country_id)
+                )).all())
+                # Si se borró algo durante la carga, puede incluir leads ya borrados
+                if generation == self._generation:
+                    self._countries[country_id] = domains
+                return domains
+            return self._countries[country_id]
+
+    async def lookup(self, db: AsyncSession, country_id: int, domain: str) -> Optional[int]:
+        """Id del lead del país con ese dominio, o None si no está en el índice."""
+        return (await self.get(db, country_id)).get(domain)
+
+    def add(self, country_id: int, domain: str, lead_id: int):
+        """Añade un lead ya guardado (después del commit) si el país está cargado."""
+        domains = self._countries.get(country_id)
+        if domains is not None:
+            domains[domain] = lead_id
+
+    def forget(self, country_id: Optional[int] = None):
+        """Descarta en este proceso el índice de un país (o de todos)."""
+        self._generation += 1
+        if country_id is None:
+            self._countries.clear()
+        else:
+            self._countries.pop(country_id, None)
+
+    async def removed(self, db: AsyncSession, country_id: int, domains: Optional[Iterable[str]] = None):
+        """
+        Quita los dominios de leads borrados (o el país entero si domains es
+        None). Llamar después del commit; avisa al resto de procesos.
+        """
+        self._generation += 1
+        if domains is None:
+            self._countries.pop(country_id, None)
+        else:
+            loaded = self._countries.get(country_id)
+            if loaded is not None:
+                for domain in domains:
+                    loaded.pop(domain, None)
+
+        if db.bind.dialect.name == "postgresql":
+            await db.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": self.CHANNEL, "payload": str(country_id)}
+            )
+            await db.commit()
+
+    def _on_notify(self, payload: Optional[str]):
+        self.forget(int(payload) if payload else None)
+
+
+domain_index = DomainIndex()
+reference_cache.subscribe(DomainIndex.CHANNEL, domain_index._on_notify)
@@ -0,0 +1,184 @@
+"""
+Normalización de dominios con la Public Suffix List.
+
+El dominio de un lead es su dominio registrable (el sufijo público más una
+etiqueta): "bar.foo.co.uk", "www.foo.co.uk" y "tienda.foo.co.uk" son todos
+"foo.co.uk", y "tienda.myshopify.com" sigue siendo una web distinta de
+"otra.myshopify.com" porque myshopify.com es un sufijo público.
+
+La lista (app/data/public_suffix_list.dat, copia de
+https://publicsuffix.org/list/) se compila una vez por proceso en un trie
+de etiquetas, de la última a la primera, la primera vez que se usa. El
+resultado por host se memoriza: en las búsquedas los mismos hosts se
+repiten continuamente.
+
+- normalize_host: host de una URL (o de un dominio suelto) en minúsculas,
+  sin puerto, sin punto final y con los nombres internacionales en ASCII.
+- registrable_domain: dominio registrable de un host.
+- lead_domain: dominio con el que se guardan y deduplican los leads.
+- base_url: portada de una web ("https://host/") para el scraping.
+
+Para actualizar la lista basta con sustituir el fichero.
+"""
+import ipaddress
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+PUBLIC_SUFFIX_LIST = Path(__file__).resolve().parents[1] / "data" / "public_suffix_list.dat"
+CACHE_SIZE = 100_000  # Hosts memorizados
+
+_END = ""  # Clave que marca el final de una regla (una etiqueta nunca está vacía)
+_WILDCARD = "*"
+_EXCEPTION = "!"
+_NETLOC = re.compile(r"\s*(?:[A-Za-z][A-Za-z0-9+.-]*:)?//([^/?#\s]*)")
+
+
+class PublicSuffixTrie:
+    """Reglas de la Public Suffix List en un trie de etiquetas invertidas."""
+
+    def __init__(self, rules: List[str]):
+        self._root: Dict = {}
+        for rule in rules:
+            exception = rule.startswith(_EXCEPTION)
+            labels = rule.lstrip(_EXCEPTION).split(".")
+            node = self._root
+            for label in reversed(labels[1:] if exception else labels):
+                node = node.setdefault(label, {})
+            if exception:
+                # La excepción cuelga del nodo padre: "!www.ck" -> nodo "ck", clave "!www"
+                node[_EXCEPTION + labels[0]] = True
+            else:
+                node[_END] = True
+
+    @classmethod
+    def from_file(cls, path: Path) -> "PublicSuffixTrie":
+        rules = []
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                line = line.strip()
+                if not line or line.startswith("//"):
+                    continue
+                rule = line.split()[0].lower()
+                rules.append(rule)
+                # Los hosts llegan en ASCII (xn--): cada regla internacional va también así
+                ascii_rule = _to_ascii(rule)
+                if ascii_rule != rule:
+                    rules.append(ascii_rule)
+        return cls(rules)
+
+    def suffix_length(self, labels: List[str]) -> int:
+        """Número de etiquetas finales que forman el sufijo público."""
+        node = self._root
+        length = 1  # Regla implícita "*": un TLD desconocido es un sufijo
+        for depth, label in enumerate(reversed(labels)):
+            if _EXCEPTION + label in node:
+                return depth
+            wildcard = node.get(_WILDCARD)
+            node = node.get(label)
+            if node is not None and _END in node:
+                length = depth + 1
+            elif wildcard is not None and _END in wildcard:
+                length = depth + 1
+            if node is None:
+                break
+        return length
+
+
+def _to_ascii(value: str) -> str:
+    if value.isascii():
+        return value
+    try:
+        return ".".join(
+            label if label.isascii() or label == _WILDCARD else label.encode("idna").decode("ascii")
+            for label in value.split(".")
+        )
+    except UnicodeError:
+        return value
+
+
+_trie: Optional[PublicSuffixTrie] = None
+
+
+def suffix_trie() -> PublicSuffixTrie:
+    """Trie de la lista incluida, compilado la primera vez."""
+    global _trie
+    if _trie is None:
+        _trie = PublicSuffixTrie.from_file(PUBLIC_SUFFIX_LIST)
+    return _trie
+
+
+def normalize_host(value: str) -> Optional[str]:
+    """Host de una URL o de un dominio ("WWW.Foo.es:8080/x" -> "www.foo.es")."""
+    if not value:
+        return None
+    value = value.strip()
+    if "://" not in value:
+        value = "//" + value
+    try:
+        host = urlsplit(value).hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    return _to_ascii(host.rstrip("."))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def registrable_domain(host: str) -> Optional[str]:
+    """
+    Dominio registrable de un host ya normalizado ("bar.foo.co.uk" ->
+    "foo.co.uk"). None si el host es un sufijo público ("co.uk") o no es un
+    nombre válido. Las IPs se devuelven tal cual.
+    """
+    labels = host.split(".")
+    if ":" in host or labels[-1].isdigit():
+        try:
+            return str(ipaddress.ip_address(host))
+        except ValueError:
+            return None
+    if not all(labels):
+        return None
+
+    length = suffix_trie().suffix_length(labels)
+    if len(labels) <= length:
+        return None
+    return ".".join(labels[-length - 1:])
+
+
+def lead_domain(url: str) -> Optional[str]:
+    """Dominio con el que se guarda un lead (el registrable del host de la URL)."""
+    if not url:
+        return None
+    # Camino rápido: solo se separa la parte del host; el resto va memorizado por host
+    match = _NETLOC.match(url)
+    return _netloc_domain(match.group(1) if match else url.strip())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _netloc_domain(netloc: str) -> Optional[str]:
+    host = normalize_host(netloc)
+    return registrable_domain(host) if host else None
+
+
+def base_url(url: str) -> Optional[str]:
+    """Portada de la web de una URL, con https si no indica protocolo."""
+    if not url:
+        return None
+    url = url.strip()
+    if not url.startswith(("http://", "https://")):
+        url = "https://" + url
+
+    try:
+        parsed = urlsplit(url)
+        port = parsed.port
+    except ValueError:
+        return None
+    host = normalize_host(url)
+    if not host:
+        return None
+    if ":" in host:
+        host = f"[{host}]"  # IPv6
+    return f"{parsed.scheme}://{host}{f':{port}' if port else ''}/"
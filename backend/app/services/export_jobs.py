@@ -0,0 +1,168 @@
+"""
+Servicio de trabajos de exportación.
+Las exportaciones grandes se generan en segundo plano en un almacén local de
+ficheros. Cada resultado se identifica por país, pestaña, formato y versión
+de los datos, así que una misma petición con los datos sin cambios se sirve
+directamente del fichero ya generado.
+
+El identificador del trabajo es la propia clave de caché y el estado se
+deduce de los ficheros, por lo que funciona con varios workers: la
+generación se reserva creando el fichero .part con O_CREAT | O_EXCL, que
+solo puede conseguir un worker. Un .part que lleva EXPORT_STALE_MINUTES
+sin escribirse es de un trabajo abandonado (el worker murió) y se puede
+volver a reservar. La generación se ejecuta en el pool de procesos.
+"""
+import hashlib
+import logging
+import os
+import time
+from pathlib import Path
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.executors import submit_cpu
+from app.services.export_source import render_export
+
+logger = logging.getLogger("osmoleads.export_jobs")
+
+
+class ExportJobService:
+    """Servicio para generar y cachear ficheros de exportación."""
+
+    def __init__(self, export_dir: Optional[str] = None):
+        self.export_dir = Path(export_dir or settings.EXPORT_DIR)
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(country_id: int, tab: Optional[str], export_format: str, data_version: str) -> str:
+        """Clave de caché (y ID del trabajo) de una exportación."""
+        version_hash = hashlib.sha1(data_version.encode("utf-8")).hexdigest()[:16]
+        return f"{country_id}_{tab or 'todos'}_{export_format}_{version_hash}"
+
+    def result_path(self, key: str) -> Path:
+        return self.export_dir / f"{key}.out"
+
+    def _partial_path(self, key: str) -> Path:
+        return self.export_dir / f"{key}.part"
+
+    def _error_path(self, key: str) -> Path:
+        return self.export_dir / f"{key}.error"
+
+    def get_status(self, key: str) -> Optional[Dict]:
+        """
+        Estado de un trabajo: done, running o error. None si no existe.
+        """
+        if self.result_path(key).exists():
+            return {"status": "done", "size": self.result_path(key).stat().st_size}
+
+        partial_age = self._partial_age(self._partial_path(key))
+        if partial_age is not None:
+            if partial_age > settings.EXPORT_STALE_MINUTES * 60:
+                return {"status": "error", "error": "La exportación se interrumpió"}
+            return {"status": "running"}
+
+        if self._error_path(key).exists():
+            return {"status": "error", "error": self._error_path(key).read_text(encoding="utf-8")}
+
+        return None
+
+    def claim(self, key: str) -> bool:
+        """
+        Reserva la generación de una clave creando su .part. Devuelve False
+        si ya existe el resultado o si otro trabajo (de cualquier worker) lo
+        está generando.
+        """
+        if self.result_path(key).exists():
+            return False
+
+        partial = self._partial_path(key)
+        partial_age = self._partial_age(partial)
+        if partial_age is not None and partial_age > settings.EXPORT_STALE_MINUTES * 60:
+            logger.warning(f"Exportación {key} abandonada, se vuelve a generar")
+            partial.unlink(missing_ok=True)
+
+        try:
+            os.close(os.open(partial, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+
+        self._error_path(key).unlink(missing_ok=True)
+        self._prune(key)
+        return True
+
+    @staticmethod
+    def _partial_age(partial: Path) -> Optional[float]:
+        """Segundos desde la última escritura del .part, o None si no existe."""
+        try:
+            return time.time() - partial.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def start(self, key: str, country_id: int, tab: Optional[str], export_format: str) -> bool:
+        """
+        Lanza la generación de una exportación en el pool de procesos.
+        Devuelve False si ya estaba generada o en curso.
+        """
+        if not self.claim(key):
+            return False
+
+        future = submit_cpu(
+            generate_export, str(self.export_dir), key, country_id, tab, export_format
+        )
+        future.add_done_callback(lambda done: self._release(key, done))
+        return True
+
+    def _release(self, key: str, done: Future):
+        """Libera la clave si el proceso del pool falla (run ya la libera al terminar)."""
+        if done.cancelled() or done.exception():
+            self._partial_path(key).unlink(missing_ok=True)
+            self._error_path(key).write_text("La exportación se interrumpió", encoding="utf-8")
+
+    def run(self, key: str, country_id: int, tab: Optional[str], export_format: str):
+        """
+        Genera el fichero de una exportación.
+        Escribe en el .part reservado por claim y lo renombra al terminar.
+        """
+        partial = self._partial_path(key)
+        db = SessionLocal()
+        start = time.perf_counter()
+
+        try:
+            with open(partial, "wb") as output:
+                for chunk in render_export(db, country_id, tab, export_format):
+                    output.write(chunk)
+            os.replace(partial, self.result_path(key))
+            logger.info(f"Exportación {key} generada en {time.perf_counter() - start:.1f}s")
+
+        except Exception as e:
+            logger.exception(f"Error generando la exportación {key}")
+            partial.unlink(missing_ok=True)
+            self._error_path(key).write_text(str(e)[:500], encoding="utf-8")
+
+        finally:
+            db.close()
+
+    def _prune(self, key: str):
+        """
+        Elimina versiones anteriores de la misma exportación y los ficheros
+        (resultados y errores) que superan el tiempo de retención.
+        """
+        prefix = key.rsplit("_", 1)[0] + "_"
+        max_age = settings.EXPORT_RETENTION_HOURS * 3600
+        now = time.time()
+
+        for pattern in ("*.out", "*.error"):
+            for path in self.export_dir.glob(pattern):
+                try:
+                    stale_version = path.name.startswith(prefix) and path.stem != key
+                    if stale_version or now - path.stat().st_mtime > max_age:
+                        path.unlink(missing_ok=True)
+                except OSError:
+                    continue
+
+
+def generate_export(export_dir: str, key: str, country_id: int, tab: Optional[str], export_format: str):
+    """Punto de entrada de un trabajo de exportación en el pool de procesos."""
+    ExportJobService(export_dir).run(key, country_id, tab, export_format)
@@ -0,0 +1,71 @@
+"""
+Origen de datos de las exportaciones de leads.
+Recorre los leads con la sesión síncrona (cursor de servidor por lotes) y
+genera los bytes en el formato pedido. Se usa tanto en las descargas en
+streaming como en los trabajos de exportación del pool de procesos, por lo
+que todo se construye a partir de valores simples (país, pestaña, formato).
+"""
+from itertools import groupby
+from typing import Iterator, Optional
+
+from sqlalchemy import case
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.lead import Lead, LeadTab
+from app.services.excel_export import ExcelExportService
+from app.services.lead_export import LeadExportService
+
+# Filas por lote al recorrer los leads con cursor de servidor
+EXPORT_BATCH_SIZE = 1000
+
+
+def export_conditions(country_id: int, tab: Optional[str] = None) -> list:
+    """Condiciones de una exportación: país y, opcionalmente, pestaña."""
+    conditions = [Lead.country_id == country_id]
+    if tab:
+        conditions.append(Lead.tab == LeadTab(tab))
+    return conditions
+
+
+def export_query(db: Session, conditions: list, include_notes: bool = True):
+    """
+    Consulta de exportación: cursor de servidor por lotes (yield_per) y
+    relaciones cargadas en bloque por cada lote (selectinload), sin N+1.
+    """
+    options = [selectinload(Lead.status), selectinload(Lead.found_by_keyword)]
+    if include_notes:
+        options.append(selectinload(Lead.notes))
+
+    return db.query(Lead).filter(*conditions).options(*options).yield_per(EXPORT_BATCH_SIZE)
+
+
+def iter_export_leads(db: Session, conditions: list) -> Iterator[Lead]:
+    """Recorre los leads a exportar, del más reciente al más antiguo."""
+    yield from export_query(db, conditions).order_by(Lead.found_at.desc())
+
+
+def iter_export_leads_by_tab(db: Session, country_id: int) -> Iterator[tuple]:
+    """
+    Recorre todos los leads de un país agrupados por pestaña con una única
+    consulta ordenada (pestaña, fecha), devolviendo (pestaña, leads).
+    """
+    tab_order = case(*[(Lead.tab == tab, index) for index, tab in enumerate(LeadTab)])
+    query = export_query(
+        db, [Lead.country_id == country_id], include_notes=False
+    ).order_by(tab_order, Lead.found_at.desc())
+
+    yield from groupby(query, key=lambda lead: lead.tab)
+
+
+def render_export(db: Session, country_id: int, tab: Optional[str], export_format: str) -> Iterator[bytes]:
+    """Bytes de la exportación de un país (y pestaña) en el formato indicado."""
+    leads = iter_export_leads(db, export_conditions(country_id, tab))
+
+    if export_format == "xlsx":
+        return ExcelExportService().stream_leads(leads)
+    return LeadExportService().stream(export_format, leads)
+
+
+def render_all_tabs(db: Session, country_id: int) -> Iterator[bytes]:
+    """Bytes del Excel con una hoja por pestaña."""
+    return ExcelExportService().stream_all_tabs(iter_export_leads_by_tab(db, country_id))
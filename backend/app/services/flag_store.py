@@ -0,0 +1,106 @@
+"""
+Almacén de banderas de países.
+Guarda las imágenes en binario en la tabla country_flags y las sirve
+con un ETag fuerte para que el navegador pueda cachearlas.
+"""
+import base64
+import hashlib
+import logging
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+
+from app.models.country import Country
+from app.models.country_flag import CountryFlag
+
+logger = logging.getLogger("osmoleads.flag_store")
+
+
+class FlagStore:
+    """Servicio para guardar y leer banderas en binario."""
+
+    # Las URLs llevan la versión (?v=etag), así que el contenido de una URL nunca cambia
+    CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+    def __init__(self, db):
+        self.db = db  # AsyncSession en los endpoints, Session en el arranque
+
+    @staticmethod
+    def compute_etag(content: bytes) -> str:
+        """Calcula el ETag (SHA-256) de una imagen."""
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    def flag_url(country: Country) -> Optional[str]:
+        """URL pública de la bandera de un país, versionada por su ETag."""
+        if not country.flag:
+            return None
+        return f"/api/countries/{country.id}/flag?v={country.flag.etag[:16]}"
+
+    def save(self, country: Country, content: bytes, content_type: str) -> CountryFlag:
+        """Guarda (o reemplaza) la bandera de un país. No hace commit."""
+        flag = country.flag
+        if not flag:
+            flag = CountryFlag(country_id=country.id)
+            country.flag = flag
+
+        flag.content = content
+        flag.content_type = content_type
+        flag.etag = self.compute_etag(content)
+        flag.size = len(content)
+
+        return flag
+
+    async def get(self, country_id: int) -> Optional[CountryFlag]:
+        """Obtiene la bandera de un país sin cargar los bytes."""
+        return await self.db.scalar(
+            select(CountryFlag).where(CountryFlag.country_id == country_id)
+        )
+
+    async def get_content(self, flag: CountryFlag) -> bytes:
+        """Carga los bytes (columna diferida) de una bandera."""
+        return await self.db.scalar(
+            select(CountryFlag.content).where(CountryFlag.country_id == flag.country_id)
+        )
+
+    def migrate_legacy(self) -> int:
+        """
+        Migra las banderas antiguas guardadas como data URL en countries.flag_image.
+        Se ejecuta al arrancar, con sesión síncrona. Las que no se pueden
+        decodificar se dejan en flag_image (y se avisa en el log).
+
+        Returns:
+            Número de banderas migradas
+        """
+        countries = self.db.query(Country).options(
+            undefer(Country.flag_image)
+        ).filter(Country.flag_image.isnot(None)).all()
+
+        migrated = 0
+        for country in countries:
+            if not country.flag:
+                decoded = self._decode_data_url(country.flag_image)
+                if not decoded:
+                    logger.warning(f"Bandera de {country.name} (id {country.id}) no migrada: data URL no válido")
+                    continue
+                content, content_type = decoded
+                self.save(country, content, content_type)
+                migrated += 1
+            country.flag_image = None
+
+        if countries:
+            self.db.commit()
+
+        return migrated
+
+    def _decode_data_url(self, data_url: str) -> Optional[tuple]:
+        """Decodifica un data URL 'data:image/png;base64,...' a (bytes, content_type)."""
+        if not data_url or not data_url.startswith("data:") or ";base64," not in data_url:
+            return None
+
+        header, encoded = data_url[5:].split(";base64,", 1)
+        try:
+            return base64.b64decode(encoded), header or "image/png"
+        except ValueError:
+            return None
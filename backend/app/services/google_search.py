@@ -5,15 +5,20 @@ Gestiona las búsquedas y el control de límites.
 import httpx
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, date
-from urllib.parse import urlparse
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.database import dialect_insert
+from app.core.metrics import outbound_client
 from app.models.lead import Lead, LeadTab
 from app.models.keyword import Keyword
 from app.models.search_log import SearchLog
-from app.models.marketplace import Marketplace
-from app.models.settings import AppSettings
+from app.services.domain_index import domain_index
+from app.services.domains import lead_domain
+from app.services.keyword_ranking import KeywordRankingService
+from app.services.lead_clusters import LeadClusterService
+from app.services.reference_cache import reference_cache, ReferenceData
 
 
 class GoogleSearchService:
@@ -21,31 +26,31 @@ class GoogleSearchService:
 
     BASE_URL = "https://www.googleapis.com/customsearch/v1"
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
-        self.searches_today = self._get_searches_today()
-        self.max_searches = self._get_max_searches()
-
-    def _get_searches_today(self) -> int:
+        self.searches_today = 0
+        self.max_searches = settings.MAX_SEARCHES_DEFAULT
+        self.reference: Optional[ReferenceData] = None
+        # Leads creados en la búsqueda en curso ((país, dominio) -> id), aún sin commit
+        self._new_domains: Dict[Tuple[int, str], int] = {}
+
+    @classmethod
+    async def create(cls, db: AsyncSession) -> "GoogleSearchService":
+        """Crea el servicio cargando el contador y el límite de búsquedas."""
+        service = cls(db)
+        service.reference = await reference_cache.get(db)
+        service.searches_today = await service._get_searches_today()
+        service.max_searches = service.reference.max_searches
+        return service
+
+    async def _get_searches_today(self) -> int:
         """Obtiene el número de búsquedas realizadas hoy."""
         today = date.today()
-        count = self.db.query(SearchLog).filter(
+        count = await self.db.scalar(select(func.count(SearchLog.id)).where(
             SearchLog.searched_at >= datetime.combine(today, datetime.min.time())
-        ).count()
+        ))
         return count
 
-    def _get_max_searches(self) -> int:
-        """Obtiene el límite máximo de búsquedas configurado."""
-        setting = self.db.query(AppSettings).filter(
-            AppSettings.key == "max_searches"
-        ).first()
-        if setting and setting.value:
-            try:
-                return int(setting.value)
-            except ValueError:
-                pass
-        return settings.MAX_SEARCHES_DEFAULT
-
     def can_search(self) -> Tuple[bool, str]:
         """Verifica si se puede realizar una búsqueda."""
         if self.max_searches == 0:  # 0 = ilimitado
@@ -101,7 +106,7 @@ class GoogleSearchService:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with outbound_client("google", timeout=30.0) as client:
                 response = await client.get(self.BASE_URL, params=params)
                 response.raise_for_status()
                 data = response.json()
@@ -112,7 +117,7 @@ class GoogleSearchService:
             new_leads = 0
 
             for item in items:
-                processed = self._process_result(item, keyword)
+                processed = await self._process_result(item, keyword)
                 if processed:
                     results.append(processed)
                     if processed.get("is_new"):
@@ -133,9 +138,13 @@ class GoogleSearchService:
             keyword.total_searches += 1
             keyword.total_results += len(items)
             keyword.last_search_at = datetime.utcnow()
+            await KeywordRankingService(self.db).refresh_keyword(keyword, new_leads)
 
-            self.db.commit()
+            await self.db.commit()
             self.searches_today += 1
+            for (country_id, domain), lead_id in self._new_domains.items():
+                domain_index.add(country_id, domain, lead_id)
+            self._new_domains.clear()
 
             return {
                 "success": True,
@@ -147,16 +156,18 @@ class GoogleSearchService:
             }
 
         except httpx.HTTPStatusError as e:
+            self._new_domains.clear()
             error_msg = f"Error HTTP: {e.response.status_code}"
-            self._log_error(keyword, error_msg)
+            await self._log_error(keyword, error_msg)
             return {"success": False, "error": error_msg, "results": [], "new_leads": 0}
 
         except Exception as e:
+            self._new_domains.clear()
             error_msg = str(e)
-            self._log_error(keyword, error_msg)
+            await self._log_error(keyword, error_msg)
             return {"success": False, "error": error_msg, "results": [], "new_leads": 0}
 
-    def _process_result(self, item: Dict, keyword: Keyword) -> Optional[Dict]:
+    async def _process_result(self, item: Dict, keyword: Keyword) -> Optional[Dict]:
         """
         Procesa un resultado de Google y lo guarda si es válido.
 
@@ -181,69 +192,64 @@ class GoogleSearchService:
         else:
             tab = LeadTab.NEW
 
-        # Verificar si ya existe
-        existing = self.db.query(Lead).filter(
-            Lead.country_id == keyword.country_id,
-            Lead.domain == domain
-        ).first()
-
-        if existing:
-            return {
-                "url": url,
-                "domain": domain,
-                "title": title,
-                "is_new": False,
-                "lead_id": existing.id
-            }
+        # Verificar si ya existe (índice en memoria: sin consulta si ya es un lead del país)
+        key = (keyword.country_id, domain)
+        existing_id = self._new_domains.get(key) or await domain_index.lookup(self.db, *key)
+        if existing_id:
+            return self._existing_result(url, domain, title, existing_id)
 
-        # Crear nuevo lead
-        lead = Lead(
-            country_id=keyword.country_id,
-            keyword_id=keyword.id,
-            name=title[:500] if title else domain,
-            url=url,
-            domain=domain,
-            snippet=snippet,
-            tab=tab
+        # Crear nuevo lead (si otro proceso ya lo ha guardado, no se inserta)
+        insert = dialect_insert(self.db.bind.dialect.name)
+        lead_id = await self.db.scalar(
+            insert(Lead).values(
+                country_id=keyword.country_id,
+                keyword_id=keyword.id,
+                name=title[:500] if title else domain,
+                url=url,
+                domain=domain,
+                snippet=snippet,
+                tab=tab
+            )
+            .on_conflict_do_nothing(index_elements=[Lead.country_id, Lead.domain])
+            .returning(Lead.id)
         )
-        self.db.add(lead)
-        self.db.flush()  # Para obtener el ID
-
+        if lead_id is None:
+            lead_id = await self.db.scalar(select(Lead.id).where(
+                Lead.country_id == keyword.country_id,
+                Lead.domain == domain
+            ))
+            domain_index.add(keyword.country_id, domain, lead_id)
+            return self._existing_result(url, domain, title, lead_id)
+
+        self._new_domains[key] = lead_id
+        await LeadClusterService(self.db).assign(lead_id, domain)
         return {
             "url": url,
             "domain": domain,
             "title": title,
             "is_new": True,
-            "lead_id": lead.id,
+            "lead_id": lead_id,
             "tab": tab.value
         }
 
-    def _extract_domain(self, url: str) -> Optional[str]:
-        """Extrae el dominio principal de una URL."""
-        try:
-            parsed = urlparse(url)
-            domain = parsed.netloc.lower()
-
-            # Quitar www.
-            if domain.startswith("www."):
-                domain = domain[4:]
-
-            # Quitar subdominios comunes
-            for prefix in ["shop.", "tienda.", "store.", "blog.", "m."]:
-                if domain.startswith(prefix):
-                    domain = domain[len(prefix):]
+    @staticmethod
+    def _existing_result(url: str, domain: str, title: str, lead_id: int) -> Dict:
+        return {
+            "url": url,
+            "domain": domain,
+            "title": title,
+            "is_new": False,
+            "lead_id": lead_id
+        }
 
-            return domain if domain else None
-        except Exception:
-            return None
+    def _extract_domain(self, url: str) -> Optional[str]:
+        """Extrae el dominio registrable de una URL (según la Public Suffix List)."""
+        return lead_domain(url)
 
     def _is_marketplace(self, domain: str) -> bool:
         """Verifica si un dominio es un marketplace."""
-        # Verificar en base de datos
-        marketplace = self.db.query(Marketplace).filter(
-            Marketplace.domain.ilike(f"%{domain}%")
-        ).first()
-        if marketplace:
+        # Verificar en los marketplaces guardados (caché de referencia)
+        if self.reference and self.reference.is_marketplace(domain):
             return True
 
         # Verificar en lista de configuración
@@ -262,7 +268,7 @@ class GoogleSearchService:
                 return True
         return False
 
-    def _log_error(self, keyword: Keyword, error_msg: str):
+    async def _log_error(self, keyword: Keyword, error_msg: str):
         """Registra un error de búsqueda."""
         log = SearchLog(
             country_id=keyword.country_id,
@@ -274,4 +280,4 @@ class GoogleSearchService:
             error_message=error_msg[:500]
         )
         self.db.add(log)
-        self.db.commit()
+        await self.db.commit()
@@ -6,11 +6,11 @@ import base64
 import httpx
 from typing import Dict, List, Optional
 from pathlib import Path
-import pytesseract
-from PIL import Image
 import io
 
 from app.core.config import settings
+from app.core.metrics import outbound_client
+from app.core.executors import run_cpu
 
 
 class ImageSearchService:
@@ -60,7 +60,7 @@ class ImageSearchService:
             }
 
             # Llamar a Vision API
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with outbound_client("vision", timeout=30.0) as client:
                 response = await client.post(
                     f"{self.VISION_API_URL}?key={self.api_key}",
                     json=request_body
@@ -157,6 +157,11 @@ class OCRService:
         Returns:
             Dict con texto extraído e información de contacto
         """
+        # Carga diferida: pytesseract (y pandas, si está instalado) tarda en importarse
+        # y solo se necesita en los procesos del pool que hacen OCR
+        import pytesseract
+        from PIL import Image
+
         result = {
             "success": True,
             "error": None,
@@ -220,14 +225,16 @@ class OCRService:
 
         return result
 
-    def extract_from_url(self, image_url: str, language: str = "spa") -> Dict:
-        """Descarga una imagen de URL y extrae el texto."""
-        import httpx
+    async def extract_text_async(self, image_data: bytes, language: str = "spa") -> Dict:
+        """Igual que extract_text, ejecutado en el pool de procesos."""
+        return await run_cpu(self.extract_text, image_data, language)
 
+    async def extract_from_url(self, image_url: str, language: str = "spa") -> Dict:
+        """Descarga una imagen de URL y extrae el texto."""
         try:
-            response = httpx.get(image_url, timeout=10)
-            response.raise_for_status()
-            return self.extract_text(response.content, language)
+            async with outbound_client("image_download", timeout=10) as client:
+                response = await client.get(image_url)
+                response.raise_for_status()
         except Exception as e:
             return {
                 "success": False,
@@ -237,3 +244,5 @@ class OCRService:
                 "phones": [],
                 "confidence": 0
             }
+
+        return await self.extract_text_async(response.content, language)
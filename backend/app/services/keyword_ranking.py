@@ -0,0 +1,200 @@
+"""
+Ranking precalculado de keywords y sugerencias por país (KeywordRanking).
+
+El ranking combina el rendimiento de las keywords (búsquedas, resultados y
+leads nuevos por búsqueda, de los resúmenes diarios de SearchLog) con las
+sugerencias mejor puntuadas del análisis de webs. En lugar de calcularlo
+en cada consulta se mantiene en una tabla que se actualiza por partes:
+
+- refresh_keyword: al terminar una búsqueda o al crear/cambiar una keyword
+  (los leads nuevos se suman al acumulado, sin recorrer los registros).
+- remove_keyword: al borrar una keyword.
+- refresh_suggestions: al terminar un análisis o al añadir/ignorar una
+  sugerencia (solo se guardan las SUGGESTIONS_IN_RANKING primeras).
+
+Las filas de un país se crean completas (rebuild) la primera vez que se
+consulta su ranking; hasta entonces las actualizaciones no hacen nada.
+"""
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import dialect_insert
+from app.models.keyword import Keyword
+from app.models.keyword_ranking import KeywordRanking
+from app.models.keyword_suggestion import KeywordSuggestion
+from app.services.search_rollups import SearchRollupService
+
+SUGGESTIONS_IN_RANKING = 30
+
+
+def _keyword_row(keyword: Keyword, new_leads: int) -> Dict:
+    return {
+        "country_id": keyword.country_id,
+        "kind": "active",
+        "keyword_id": keyword.id,
+        "text": keyword.text,
+        "sort_value": keyword.total_results or 0,
+        "category": keyword.category,
+        "is_active": keyword.is_active,
+        "total_searches": keyword.total_searches or 0,
+        "total_results": keyword.total_results or 0,
+        "new_leads": new_leads,
+        "new_leads_per_search": new_leads / keyword.total_searches if keyword.total_searches else None
+    }
+
+
+class KeywordRankingService:
+    """
+    Lectura y actualización del ranking precalculado. Las actualizaciones no
+    hacen commit: van en la transacción de quien las llama.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, country_id: int) -> Dict:
+        """Ranking del país: keywords por resultados y sugerencias por puntuación."""
+        rows = await self._rows(country_id)
+        if not rows:
+            await self.rebuild(country_id)
+            await self.db.commit()
+            rows = await self._rows(country_id)
+
+        current_keywords = [
+            {
+                "id": row.keyword_id,
+                "text": row.text,
+                "type": "active",
+                "total_results": row.total_results,
+                "total_searches": row.total_searches,
+                "new_leads": row.new_leads,
+                "new_leads_per_search": (
+                    round(row.new_leads_per_search, 2) if row.new_leads_per_search is not None else None
+                ),
+                "category": row.category,
+                "is_active": row.is_active
+            }
+            for row in rows if row.kind == "active"
+        ]
+        suggested_keywords = [
+            {
+                "id": row.suggestion_id,
+                "text": row.text,
+                "type": "suggested",
+                "frequency": row.frequency,
+                "websites_count": row.websites_count,
+                "score": row.score,
+                "source": row.source,
+                "is_added": row.is_added
+            }
+            for row in rows if row.kind == "suggested"
+        ]
+
+        return {
+            "current_keywords": current_keywords,
+            "suggested_keywords": suggested_keywords
+        }
+
+    async def _rows(self, country_id: int):
+        return (await self.db.scalars(
+            select(KeywordRanking)
+            .where(KeywordRanking.country_id == country_id)
+            .order_by(KeywordRanking.kind, KeywordRanking.sort_value.desc())
+        )).all()
+
+    async def _is_built(self, country_id: int) -> bool:
+        return await self.db.scalar(
+            select(KeywordRanking.id).where(KeywordRanking.country_id == country_id).limit(1)
+        ) is not None
+
+    async def rebuild(self, country_id: int):
+        """
+        Vuelve a crear todas las filas del país desde keywords, los resúmenes
+        diarios de búsquedas y sugerencias. Antes resume los registros
+        pendientes (rollup hace su propio commit).
+        """
+        rollups = SearchRollupService(self.db)
+        await rollups.rollup()
+        new_leads = await rollups.new_leads_by_keyword(country_id)
+
+        await self.db.execute(delete(KeywordRanking).where(KeywordRanking.country_id == country_id))
+
+        keywords = (await self.db.scalars(select(Keyword).where(Keyword.country_id == country_id))).all()
+        if keywords:
+            await self.db.execute(
+                KeywordRanking.__table__.insert(),
+                [_keyword_row(keyword, new_leads.get(keyword.id) or 0) for keyword in keywords]
+            )
+
+        await self._insert_suggestions(country_id)
+
+    async def refresh_keyword(self, keyword: Keyword, new_leads: int = 0):
+        """
+        Actualiza la fila de una keyword con sus contadores actuales y suma
+        new_leads (los leads nuevos de la búsqueda que acaba de terminar).
+        """
+        if not await self._is_built(keyword.country_id):
+            return
+
+        row = _keyword_row(keyword, new_leads)
+        insert = dialect_insert(self.db.bind.dialect.name)
+        statement = insert(KeywordRanking).values(row)
+        accumulated = KeywordRanking.new_leads + statement.excluded.new_leads
+        await self.db.execute(statement.on_conflict_do_update(
+            index_elements=[KeywordRanking.keyword_id],
+            set_={
+                **{
+                    column: statement.excluded[column]
+                    for column in ("text", "sort_value", "category", "is_active", "total_searches", "total_results")
+                },
+                "new_leads": accumulated,
+                "new_leads_per_search": accumulated * 1.0 / func.nullif(statement.excluded.total_searches, 0),
+                "updated_at": datetime.utcnow()
+            }
+        ))
+
+    async def remove_keyword(self, keyword_id: int):
+        await self.db.execute(delete(KeywordRanking).where(KeywordRanking.keyword_id == keyword_id))
+
+    async def refresh_suggestions(self, country_id: int):
+        """Vuelve a crear las filas de sugerencias del país (como mucho SUGGESTIONS_IN_RANKING)."""
+        if not await self._is_built(country_id):
+            return
+
+        await self.db.execute(delete(KeywordRanking).where(
+            KeywordRanking.country_id == country_id,
+            KeywordRanking.kind == "suggested"
+        ))
+        await self._insert_suggestions(country_id)
+
+    async def _insert_suggestions(self, country_id: int):
+        suggestions = (await self.db.scalars(select(KeywordSuggestion).where(
+            KeywordSuggestion.country_id == country_id,
+            KeywordSuggestion.is_ignored == False
+        ).order_by(
+            KeywordSuggestion.score.desc().nulls_last(),
+            KeywordSuggestion.frequency.desc()
+        ).limit(SUGGESTIONS_IN_RANKING))).all()
+        if not suggestions:
+            return
+
+        # Orden por puntuación y, sin ella, por frecuencia (por debajo de las puntuadas)
+        count = len(suggestions)
+        await self.db.execute(KeywordRanking.__table__.insert(), [
+            {
+                "country_id": country_id,
+                "kind": "suggested",
+                "suggestion_id": suggestion.id,
+                "text": suggestion.text,
+                "sort_value": count - position,
+                "source": suggestion.source,
+                "frequency": suggestion.frequency,
+                "websites_count": suggestion.websites_count,
+                "score": suggestion.score,
+                "is_added": suggestion.is_added
+            }
+            for position, suggestion in enumerate(suggestions)
+        ])
@@ -0,0 +1,186 @@
+"""
+Agrupación de leads de la misma empresa (leads.cluster_id), en todos los países.
+
+Dos leads son de la misma empresa si comparten dominio registrable, CIF o
+dominio de email (el de info@foo.com enlaza con el lead de foo.com y con
+otros leads con emails de foo.com). Los dominios de correo gratuito
+(FREE_MAIL_DOMAINS) no enlazan nada. cluster_id es el id más bajo de los
+leads del grupo; un lead sin nada en común con otros es su propio grupo.
+
+- assign / index: al crear un lead o cambiar su email o CIF. Busca los
+  grupos con los que comparte algo (índices de domain, email_domain y cif)
+  y, si son varios, los une con un único UPDATE.
+- rebuild: recalcula todos los grupos (union-find en el pool de procesos)
+  y solo escribe los leads que cambian. Al borrar un lead sus grupos no se
+  separan hasta el siguiente rebuild, que se hace tras las búsquedas
+  programadas y desde cron:
+    python -m app.services.lead_clusters
+"""
+import asyncio
+import logging
+import re
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.core.executors import run_cpu
+from app.models.lead import Lead
+from app.services.domains import lead_domain
+
+logger = logging.getLogger("osmoleads.lead_clusters")
+
+UPDATE_BATCH_SIZE = 1000
+
+FREE_MAIL_DOMAINS = {
+    "gmail.com", "googlemail.com", "hotmail.com", "hotmail.es", "hotmail.fr", "outlook.com", "outlook.es",
+    "outlook.fr", "live.com", "live.fr", "msn.com", "yahoo.com", "yahoo.es", "yahoo.fr", "ymail.com",
+    "icloud.com", "me.com", "mac.com", "aol.com", "gmx.com", "gmx.es", "gmx.fr", "gmx.de", "mail.com",
+    "protonmail.com", "proton.me", "zoho.com", "yandex.com", "telefonica.net", "movistar.es", "terra.es",
+    "orange.fr", "wanadoo.fr", "free.fr", "laposte.net", "sfr.fr", "sapo.pt", "libero.it", "web.de"
+}
+
+_CIF_NOISE = re.compile(r"[^0-9A-Z]")
+
+
+def normalize_cif(cif: Optional[str]) -> Optional[str]:
+    """CIF/NIF en mayúsculas y sin espacios, guiones ni puntos ("b-1234.5678" -> "B12345678")."""
+    if not cif:
+        return None
+    return _CIF_NOISE.sub("", cif.upper()) or None
+
+
+def email_domain(email: Optional[str]) -> Optional[str]:
+    """Dominio registrable de un email, salvo los de correo gratuito."""
+    if not email or "@" not in email:
+        return None
+    domain = lead_domain(email.rsplit("@", 1)[1])
+    return domain if domain and domain not in FREE_MAIL_DOMAINS else None
+
+
+def cluster_leads(rows: Iterable[Tuple[int, str, Optional[str], Optional[str]]]) -> Dict[int, int]:
+    """
+    Agrupa leads (id, domain, email_domain, cif) que comparten dominio o
+    CIF. Devuelve el cluster_id (id más bajo del grupo) de cada lead.
+    """
+    parent: Dict[int, int] = {}
+
+    def find(lead_id: int) -> int:
+        root = lead_id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[lead_id] != root:
+            parent[lead_id], lead_id = root, parent[lead_id]
+        return root
+
+    owners: Dict[Tuple[str, str], int] = {}
+    for lead_id, domain, mail_domain, cif in rows:
+        parent.setdefault(lead_id, lead_id)
+        keys = [("domain", domain), ("domain", mail_domain), ("cif", cif)]
+        for key in keys:
+            if not key[1]:
+                continue
+            owner = owners.setdefault(key, lead_id)
+            if owner != lead_id:
+                a, b = find(owner), find(lead_id)
+                if a != b:
+                    # La raíz es siempre el id más bajo
+                    parent[max(a, b)] = min(a, b)
+
+    return {lead_id: find(lead_id) for lead_id in parent}
+
+
+class LeadClusterService:
+    """Grupos de leads de la misma empresa. assign e index no hacen commit."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def assign(
+        self,
+        lead_id: int,
+        domain: str,
+        mail_domain: Optional[str] = None,
+        cif: Optional[str] = None
+    ) -> int:
+        """Pone el lead en el grupo de los leads con los que comparte algo. Devuelve su cluster_id."""
+        domains = [value for value in (domain, mail_domain) if value]
+        conditions = [Lead.domain.in_(domains), Lead.email_domain.in_(domains)]
+        if cif:
+            conditions.append(Lead.cif == cif)
+
+        related = (await self.db.execute(
+            select(Lead.id, Lead.cluster_id).where(or_(*conditions), Lead.id != lead_id)
+        )).all()
+
+        clusters = {cluster_id for _, cluster_id in related if cluster_id is not None}
+        unassigned = [related_id for related_id, cluster_id in related if cluster_id is None]
+        target = min(clusters | set(unassigned) | {lead_id})
+
+        # Un único UPDATE para el lead, los grupos que se unen y los leads sin grupo
+        others = clusters - {target}
+        condition = Lead.id.in_(unassigned + [lead_id])
+        if others:
+            condition = or_(condition, Lead.cluster_id.in_(others))
+        await self.db.execute(
+            update(Lead).where(condition).values(cluster_id=target)
+            .execution_options(synchronize_session=False)
+        )
+        return target
+
+    async def index(self, lead: Lead) -> int:
+        """Recalcula email_domain del lead y lo pone en su grupo (tras cambiar email o CIF)."""
+        lead.email_domain = email_domain(lead.email)
+        await self.db.flush()
+        lead.cluster_id = await self.assign(lead.id, lead.domain, lead.email_domain, lead.cif)
+        return lead.cluster_id
+
+    async def find_cluster(self, domain: str) -> Optional[int]:
+        """cluster_id de la empresa de un dominio (web o email), o None si no hay leads."""
+        return await self.db.scalar(
+            select(Lead.cluster_id)
+            .where(or_(Lead.domain == domain, Lead.email_domain == domain), Lead.cluster_id.is_not(None))
+            .order_by(Lead.cluster_id)
+            .limit(1)
+        )
+
+    async def rebuild(self) -> Dict:
+        """Recalcula email_domain y cluster_id de todos los leads. Devuelve estadísticas."""
+        rows = (await self.db.execute(
+            select(Lead.id, Lead.domain, Lead.email, Lead.cif, Lead.email_domain, Lead.cluster_id)
+        )).all()
+
+        mail_domains = {row.id: email_domain(row.email) for row in rows}
+        clusters = await run_cpu(
+            cluster_leads, [(row.id, row.domain, mail_domains[row.id], row.cif) for row in rows]
+        )
+
+        changes = [
+            {"id": row.id, "cluster_id": clusters[row.id], "email_domain": mail_domains[row.id]}
+            for row in rows
+            if row.cluster_id != clusters[row.id] or row.email_domain != mail_domains[row.id]
+        ]
+        for start in range(0, len(changes), UPDATE_BATCH_SIZE):
+            await self.db.execute(update(Lead), changes[start:start + UPDATE_BATCH_SIZE])
+        await self.db.commit()
+
+        sizes = Counter(clusters.values())
+        stats = {
+            "leads": len(rows),
+            "clusters": len(sizes),
+            "leads_in_shared_clusters": sum(size for size in sizes.values() if size > 1),
+            "updated": len(changes)
+        }
+        logger.info(f"Grupos de leads: {stats}")
+        return stats
+
+
+async def _rebuild() -> Dict:
+    async with AsyncSessionLocal() as db:
+        return await LeadClusterService(db).rebuild()
+
+
+if __name__ == "__main__":
+    print(asyncio.run(_rebuild()))
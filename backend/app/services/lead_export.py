@@ -0,0 +1,140 @@
+"""
+Servicio de exportación de leads en formatos de datos: CSV, NDJSON y Parquet.
+Usa la misma proyección de columnas que la exportación a Excel y genera
+los bytes en streaming, por lotes.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+from app.models.lead import Lead
+from app.services.lead_projection import LEAD_KEYS, record_values
+
+
+class _ChunkSink:
+    """Destino de escritura para Arrow que acumula bytes hasta que se recogen."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class LeadExportService:
+    """Servicio para exportar leads a CSV, NDJSON o Parquet."""
+
+    # formato -> (media type, extensión)
+    FORMATS = {
+        "csv": ("text/csv", "csv"),
+        "ndjson": ("application/x-ndjson", "ndjson"),
+        "parquet": ("application/vnd.apache.parquet", "parquet"),
+    }
+
+    # Filas por lote (y por row group en Parquet)
+    BATCH_SIZE = 5000
+
+    def stream(self, export_format: str, leads: Iterable[Lead]) -> Iterator[bytes]:
+        """
+        Exporta leads en el formato indicado.
+
+        Args:
+            export_format: csv, ndjson o parquet
+            leads: Iterable de objetos Lead (se consume una sola vez)
+
+        Yields:
+            Trozos de bytes del archivo
+        """
+        writers = {
+            "csv": self._stream_csv,
+            "ndjson": self._stream_ndjson,
+            "parquet": self._stream_parquet,
+        }
+        return writers[export_format](leads)
+
+    def _batches(self, leads: Iterable[Lead]) -> Iterator[List[List]]:
+        """Agrupa los leads en lotes de filas proyectadas."""
+        rows = (record_values(lead) for lead in leads)
+        while True:
+            batch = list(islice(rows, self.BATCH_SIZE))
+            if not batch:
+                return
+            yield batch
+
+    def _stream_csv(self, leads: Iterable[Lead]) -> Iterator[bytes]:
+        """CSV con cabecera, fechas en ISO 8601."""
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(LEAD_KEYS)
+
+        for batch in self._batches(leads):
+            writer.writerows(
+                [value.isoformat() if isinstance(value, datetime) else value for value in row]
+                for row in batch
+            )
+            yield output.getvalue().encode("utf-8")
+            output.seek(0)
+            output.truncate()
+
+        remaining = output.getvalue()
+        if remaining:
+            yield remaining.encode("utf-8")
+
+    def _stream_ndjson(self, leads: Iterable[Lead]) -> Iterator[bytes]:
+        """Un objeto JSON por línea."""
+        for batch in self._batches(leads):
+            lines = [
+                json.dumps(dict(zip(LEAD_KEYS, row)), ensure_ascii=False, default=self._json_default)
+                for row in batch
+            ]
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _stream_parquet(self, leads: Iterable[Lead]) -> Iterator[bytes]:
+        """Parquet columnar: un row group por lote, escrito como RecordBatch de Arrow."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            (key, pa.timestamp("us") if key == "found_at" else pa.string())
+            for key in LEAD_KEYS
+        ])
+
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        try:
+            for batch in self._batches(leads):
+                columns = dict(zip(LEAD_KEYS, map(list, zip(*batch))))
+                writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=schema))
+                yield sink.drain()
+        finally:
+            writer.close()
+
+        yield sink.drain()
+
+    @staticmethod
+    def _json_default(value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        raise TypeError(f"Tipo no serializable: {type(value).__name__}")
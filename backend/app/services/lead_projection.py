@@ -0,0 +1,83 @@
+"""
+Proyección de columnas de un lead para exportaciones.
+Todas las exportaciones (Excel, CSV, NDJSON, Parquet) usan estas columnas
+y estos valores; cada formato solo decide cómo representarlos.
+"""
+from typing import List
+
+from app.models.lead import Lead, LeadTab
+
+# Columnas de la exportación completa: (clave, encabezado, ancho en Excel)
+LEAD_COLUMNS = [
+    ("name", "Nombre", 40),
+    ("url", "URL", 50),
+    ("domain", "Dominio", 25),
+    ("email", "Email", 30),
+    ("phone", "Teléfono", 18),
+    ("cif", "CIF/NIF", 12),
+    ("status", "Estado", 15),
+    ("tab", "Pestaña", 15),
+    ("keyword", "Keyword", 25),
+    ("found_at", "Fecha encontrado", 15),
+    ("notes", "Notas", 50),
+    ("snippet", "Descripción", 60)
+]
+
+# Columnas de la exportación resumida (una hoja por pestaña)
+SUMMARY_COLUMNS = [
+    ("name", "Nombre", 40),
+    ("domain", "Dominio", 25),
+    ("email", "Email", 30),
+    ("phone", "Teléfono", 18),
+    ("status", "Estado", 15),
+    ("keyword", "Keyword", 25),
+    ("found_at", "Fecha", 12)
+]
+
+LEAD_KEYS = [key for key, _, _ in LEAD_COLUMNS]
+
+TAB_LABELS = {
+    LeadTab.NEW: "Nuevos",
+    LeadTab.LEADS: "Leads",
+    LeadTab.DOUBTS: "Dudas",
+    LeadTab.DISCARDED: "Descartados",
+    LeadTab.MARKETPLACE: "Marketplaces"
+}
+
+
+def lead_values(lead: Lead, include_notes: bool = True) -> dict:
+    """
+    Valores de un lead según LEAD_COLUMNS (sin formatear).
+    found_at es datetime y tab el enum LeadTab.
+    """
+    notes_text = None
+    if include_notes and lead.notes:
+        notes_text = "\n---\n".join([
+            f"{n.created_at.strftime('%d/%m/%Y %H:%M')}: {n.content}"
+            for n in sorted(lead.notes, key=lambda x: x.created_at)
+        ])
+
+    return {
+        "name": lead.name,
+        "url": lead.url,
+        "domain": lead.domain,
+        "email": lead.email,
+        "phone": lead.phone,
+        "cif": lead.cif,
+        "status": lead.status.name if lead.status else None,
+        "tab": lead.tab,
+        "keyword": lead.found_by_keyword.text if lead.found_by_keyword else None,
+        "found_at": lead.found_at,
+        "notes": notes_text,
+        "snippet": lead.snippet
+    }
+
+
+def record_values(lead: Lead) -> List:
+    """
+    Valores de un lead para formatos de datos (CSV, NDJSON, Parquet):
+    pestaña como código ('new', 'leads'...) y fechas sin formatear.
+    """
+    values = lead_values(lead)
+    values["tab"] = values["tab"].value if values["tab"] else None
+    return [values[key] for key in LEAD_KEYS]
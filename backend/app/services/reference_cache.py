@@ -0,0 +1,202 @@
+"""
+Caché en memoria de los datos de referencia: configuración (max_searches),
+estados de lead y marketplaces.
+
+Se cargan una vez de la base de datos y se sirven desde memoria. Los
+endpoints que los modifican invalidan la caché después del commit. Con
+PostgreSQL, la invalidación se avisa al resto de procesos (workers de
+uvicorn) con NOTIFY y cada proceso la escucha con LISTEN. La misma conexión
+reparte los avisos de otras cachés en memoria (subscribe).
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.marketplace import Marketplace
+from app.models.settings import AppSettings
+from app.models.status import LeadStatus
+
+logger = logging.getLogger("osmoleads.reference_cache")
+
+
+@dataclass(frozen=True)
+class StatusEntry:
+    id: int
+    name: str
+    color: Optional[str]
+    icon: Optional[str]
+    order: int
+    is_default: bool
+    is_system: bool
+    created_at: datetime
+
+
+@dataclass(frozen=True)
+class MarketplaceEntry:
+    id: int
+    domain: str
+    name: Optional[str]
+    is_system: bool
+    created_at: datetime
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    max_searches: int
+    statuses: Tuple[StatusEntry, ...]  # Ordenados por (order, name)
+    marketplaces: Tuple[MarketplaceEntry, ...]  # Ordenados por dominio
+
+    def get_status(self, status_id: int) -> Optional[StatusEntry]:
+        for status in self.statuses:
+            if status.id == status_id:
+                return status
+        return None
+
+    def is_marketplace(self, domain: str) -> bool:
+        """Indica si el dominio coincide con algún marketplace guardado."""
+        domain = domain.lower()
+        return any(domain in marketplace.domain.lower() for marketplace in self.marketplaces)
+
+
+class ReferenceCache:
+    """Caché de datos de referencia con invalidación entre procesos."""
+
+    CHANNEL = "osmoleads_reference"
+    RECONNECT_DELAY = 5  # Segundos entre reintentos de LISTEN
+
+    def __init__(self):
+        self._data: Optional[ReferenceData] = None
+        self._generation = 0  # Cambia en cada invalidación
+        self._lock = asyncio.Lock()
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribers: Dict[str, Callable[[Optional[str]], None]] = {}
+
+    async def get(self, db: AsyncSession) -> ReferenceData:
+        """Devuelve los datos de referencia, cargándolos si no están en caché."""
+        data = self._data
+        if data is not None:
+            return data
+
+        async with self._lock:
+            if self._data is None:
+                generation = self._generation
+                data = await self._load(db)
+                # Si se invalidó durante la carga, los datos pueden estar ya viejos
+                if generation == self._generation:
+                    self._data = data
+                return data
+            return self._data
+
+    def invalidate(self):
+        """Descarta los datos en memoria de este proceso."""
+        self._generation += 1
+        self._data = None
+
+    async def refresh(self, db: AsyncSession):
+        """
+        Invalida la caché tras un cambio (llamar después del commit) y lo
+        notifica al resto de procesos.
+        """
+        self.invalidate()
+
+        if db.bind.dialect.name == "postgresql":
+            await db.execute(text("SELECT pg_notify(:channel, '')"), {"channel": self.CHANNEL})
+            await db.commit()
+
+    async def _load(self, db: AsyncSession) -> ReferenceData:
+        max_searches = settings.MAX_SEARCHES_DEFAULT
+        value = await db.scalar(select(AppSettings.value).where(AppSettings.key == "max_searches"))
+        if value:
+            try:
+                max_searches = int(value)
+            except ValueError:
+                pass
+
+        statuses = (await db.scalars(
+            select(LeadStatus).order_by(LeadStatus.order, LeadStatus.name)
+        )).all()
+        marketplaces = (await db.scalars(select(Marketplace).order_by(Marketplace.domain))).all()
+
+        return ReferenceData(
+            max_searches=max_searches,
+            statuses=tuple(
+                StatusEntry(
+                    id=s.id, name=s.name, color=s.color, icon=s.icon, order=s.order,
+                    is_default=s.is_default, is_system=s.is_system, created_at=s.created_at
+                )
+                for s in statuses
+            ),
+            marketplaces=tuple(
+                MarketplaceEntry(
+                    id=m.id, domain=m.domain, name=m.name,
+                    is_system=m.is_system, created_at=m.created_at
+                )
+                for m in marketplaces
+            )
+        )
+
+    # ============ Invalidación entre procesos (PostgreSQL) ============
+    def subscribe(self, channel: str, callback: Callable[[Optional[str]], None]):
+        """
+        Escucha también channel: callback recibe el payload de cada NOTIFY, o
+        None al (re)conectar (lo avisado mientras no se escuchaba se ha perdido).
+        """
+        self._subscribers[channel] = callback
+
+    def start_listener(self):
+        """Arranca la escucha de invalidaciones (solo con PostgreSQL)."""
+        if not settings.async_database_url.startswith("postgresql+asyncpg"):
+            return
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop_listener(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self):
+        """Mantiene una conexión con LISTEN y se reconecta si se pierde."""
+        import asyncpg
+
+        dsn = settings.async_database_url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(self.CHANNEL, lambda *args: self.invalidate())
+                for channel, callback in self._subscribers.items():
+                    await connection.add_listener(
+                        channel, lambda _conn, _pid, _channel, payload, callback=callback: callback(payload)
+                    )
+                # Lo que cambió mientras no escuchábamos
+                self.invalidate()
+                for callback in self._subscribers.values():
+                    callback(None)
+
+                while not connection.is_closed():
+                    await asyncio.sleep(self.RECONNECT_DELAY)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"LISTEN {self.CHANNEL} interrumpido: {e}")
+
+            finally:
+                if connection and not connection.is_closed():
+                    await connection.close()
+
+            await asyncio.sleep(self.RECONNECT_DELAY)
+
+
+reference_cache = ReferenceCache()
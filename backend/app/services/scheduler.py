@@ -7,11 +7,14 @@ import logging
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import AsyncSessionLocal
 from app.models.country import Country
 from app.models.keyword import Keyword
 from app.services.google_search import GoogleSearchService
+from app.services.lead_clusters import LeadClusterService
+from app.services.search_rollups import SearchRollupService
 
 # Configurar logging
 logging.basicConfig(
@@ -24,9 +27,9 @@ logger = logging.getLogger("osmoleads.scheduler")
 class SchedulerService:
     """Servicio para ejecutar búsquedas programadas."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
-        self.search_service = GoogleSearchService(db)
+        self.search_service: Optional[GoogleSearchService] = None
 
     async def run_all_searches(self) -> dict:
         """
@@ -48,20 +51,22 @@ class SchedulerService:
         }
 
         try:
+            self.search_service = await GoogleSearchService.create(self.db)
+
             # Obtener países activos
-            countries = self.db.query(Country).filter(
+            countries = (await self.db.scalars(select(Country).where(
                 Country.is_active == True
-            ).all()
+            ))).all()
 
             for country in countries:
                 logger.info(f"Procesando país: {country.name}")
                 stats["countries_processed"] += 1
 
                 # Obtener keywords activas del país
-                keywords = self.db.query(Keyword).filter(
+                keywords = (await self.db.scalars(select(Keyword).where(
                     Keyword.country_id == country.id,
                     Keyword.is_active == True
-                ).all()
+                ))).all()
 
                 for keyword in keywords:
                     # Verificar si podemos seguir buscando
@@ -126,17 +131,19 @@ class SchedulerService:
             "finished_at": None
         }
 
-        country = self.db.query(Country).filter(Country.id == country_id).first()
+        country = await self.db.get(Country, country_id)
         if not country:
             stats["errors"].append("País no encontrado")
             return stats
 
+        self.search_service = await GoogleSearchService.create(self.db)
+
         logger.info(f"Buscando en: {country.name}")
 
-        keywords = self.db.query(Keyword).filter(
+        keywords = (await self.db.scalars(select(Keyword).where(
             Keyword.country_id == country_id,
             Keyword.is_active == True
-        ).all()
+        ))).all()
 
         for keyword in keywords:
             can_search, error_msg = self.search_service.can_search()
@@ -164,19 +171,34 @@ class SchedulerService:
         return stats
 
 
+async def _run_all_searches() -> dict:
+    async with AsyncSessionLocal() as db:
+        scheduler = SchedulerService(db)
+        stats = await scheduler.run_all_searches()
+
+        # Resúmenes diarios de las búsquedas y borrado de los registros antiguos
+        try:
+            stats["search_logs"] = await SearchRollupService(db).maintain()
+        except Exception as e:
+            logger.error(f"Error resumiendo los registros de búsqueda: {e}")
+
+        # Grupos de leads de la misma empresa (se separan los que ya no tienen nada en común)
+        try:
+            stats["lead_clusters"] = await LeadClusterService(db).rebuild()
+        except Exception as e:
+            logger.error(f"Error agrupando los leads por empresa: {e}")
+
+        return stats
+
+
 def run_scheduled_search():
     """
     Función para ejecutar desde cron/scheduler externo.
     Se llama desde: python -m backend.app.services.scheduler
     """
-    db = SessionLocal()
-    try:
-        scheduler = SchedulerService(db)
-        stats = asyncio.run(scheduler.run_all_searches())
-        print(f"Búsqueda completada: {stats['new_leads']} nuevos leads")
-        return stats
-    finally:
-        db.close()
+    stats = asyncio.run(_run_all_searches())
+    print(f"Búsqueda completada: {stats['new_leads']} nuevos leads")
+    return stats
 
 
 if __name__ == "__main__":
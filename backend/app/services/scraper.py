@@ -2,14 +2,18 @@
 Servicio de scraping para extraer información de contacto de webs.
 Extrae: email, teléfono, CIF/NIF
 """
+import hashlib
 import re
 import httpx
 from typing import Dict, Optional, List
-from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from urllib.parse import urljoin
 import asyncio
 
 from app.core.config import settings
+from app.core.metrics import outbound_client
+from app.core.executors import run_cpu
+from app.services import domains
+from app.services.term_mining import extract_ngrams
 
 
 class ScraperService:
@@ -144,7 +148,8 @@ class ScraperService:
     async def _scrape_page(self, url: str) -> Optional[Dict]:
         """Extrae información de una página específica."""
         try:
-            async with httpx.AsyncClient(
+            async with outbound_client(
+                "scraper",
                 timeout=self.timeout,
                 follow_redirects=True,
                 verify=False  # Algunas webs tienen SSL mal configurado
@@ -158,28 +163,35 @@ class ScraperService:
                 if "text/html" not in content_type:
                     return None
 
-                html = response.text
-                soup = BeautifulSoup(html, "lxml")
+                # El parseo del HTML es CPU: se hace en el pool de procesos
+                return await run_cpu(self._parse_page, response.text)
 
-                # Extraer texto visible
-                text = soup.get_text(separator=" ", strip=True)
+        except Exception:
+            return None
 
-                # También buscar en atributos href y data
-                for a in soup.find_all("a", href=True):
-                    href = a.get("href", "")
-                    if href.startswith("mailto:"):
-                        text += " " + href[7:]
-                    elif href.startswith("tel:"):
-                        text += " " + href[4:]
+    def _parse_page(self, html: str) -> Dict:
+        """Extrae emails, teléfonos y CIF del HTML de una página."""
+        # Carga diferida: el parseo corre en los procesos del pool, no en el arranque
+        from bs4 import BeautifulSoup
 
-                return {
-                    "emails": self._find_emails(text),
-                    "phones": self._find_phones(text),
-                    "cif": self._find_cif(text)
-                }
+        soup = BeautifulSoup(html, "lxml")
 
-        except Exception:
-            return None
+        # Extraer texto visible
+        text = soup.get_text(separator=" ", strip=True)
+
+        # También buscar en atributos href y data
+        for a in soup.find_all("a", href=True):
+            href = a.get("href", "")
+            if href.startswith("mailto:"):
+                text += " " + href[7:]
+            elif href.startswith("tel:"):
+                text += " " + href[4:]
+
+        return {
+            "emails": self._find_emails(text),
+            "phones": self._find_phones(text),
+            "cif": self._find_cif(text)
+        }
 
     def _find_emails(self, text: str) -> List[str]:
         """Encuentra emails en el texto."""
@@ -262,27 +274,16 @@ class ScraperService:
         return phone
 
     def _normalize_url(self, url: str) -> Optional[str]:
-        """Normaliza una URL añadiendo protocolo si falta."""
-        if not url:
-            return None
-
-        url = url.strip()
-
-        if not url.startswith(("http://", "https://")):
-            url = "https://" + url
-
-        try:
-            parsed = urlparse(url)
-            if not parsed.netloc:
-                return None
-            return f"{parsed.scheme}://{parsed.netloc}/"
-        except Exception:
-            return None
+        """Normaliza una URL a la portada de la web, añadiendo protocolo si falta."""
+        return domains.base_url(url)
 
 
 class KeywordAnalyzer:
     """Analiza webs para sugerir nuevas keywords."""
 
+    TERMS_VERSION = 2  # Subir al cambiar la extracción de términos
+    MAX_TERMS = 50  # Términos que se guardan por web
+
     # Palabras comunes a ignorar (stopwords)
     STOPWORDS = {
         "es": ["de", "la", "el", "en", "y", "a", "los", "las", "del", "con", "para",
@@ -303,10 +304,21 @@ class KeywordAnalyzer:
             "Accept-Language": "es-ES,es;q=0.9"
         }
 
-    async def analyze_website(self, url: str, language: str = "es") -> Dict:
+    async def analyze_website(
+        self,
+        url: str,
+        language: str = "es",
+        client: Optional[httpx.AsyncClient] = None
+    ) -> Dict:
         """
         Analiza una web y extrae keywords potenciales.
 
+        Args:
+            url: URL de la web
+            language: Idioma para filtrar stopwords
+            client: Cliente HTTP compartido (con pool de conexiones); si no se
+                indica, se crea uno para esta web
+
         Returns:
             Dict con keywords encontradas y su frecuencia
         """
@@ -317,58 +329,25 @@ class KeywordAnalyzer:
             "h1_tags": [],
             "h2_tags": [],
             "suggested_keywords": [],
+            "content_hash": None,
             "success": True,
             "error": None
         }
 
         try:
-            async with httpx.AsyncClient(timeout=10, follow_redirects=True) as client:
+            if client is None:
+                async with outbound_client("website_analysis", timeout=10, follow_redirects=True) as own_client:
+                    response = await own_client.get(url, headers=self.headers)
+            else:
                 response = await client.get(url, headers=self.headers)
 
-                if response.status_code != 200:
-                    result["success"] = False
-                    result["error"] = f"HTTP {response.status_code}"
-                    return result
-
-                soup = BeautifulSoup(response.text, "lxml")
-
-                # Extraer meta keywords
-                meta_kw = soup.find("meta", attrs={"name": "keywords"})
-                if meta_kw and meta_kw.get("content"):
-                    keywords = [k.strip() for k in meta_kw["content"].split(",")]
-                    result["meta_keywords"] = [k for k in keywords if k]
-
-                # Extraer meta description
-                meta_desc = soup.find("meta", attrs={"name": "description"})
-                if meta_desc and meta_desc.get("content"):
-                    result["meta_description"] = meta_desc["content"]
-
-                # Extraer title
-                title_tag = soup.find("title")
-                if title_tag:
-                    result["title"] = title_tag.get_text(strip=True)
-
-                # Extraer H1
-                for h1 in soup.find_all("h1")[:3]:
-                    text = h1.get_text(strip=True)
-                    if text:
-                        result["h1_tags"].append(text)
-
-                # Extraer H2
-                for h2 in soup.find_all("h2")[:5]:
-                    text = h2.get_text(strip=True)
-                    if text:
-                        result["h2_tags"].append(text)
-
-                # Generar sugerencias de keywords
-                all_text = " ".join([
-                    result["meta_description"],
-                    result["title"],
-                    " ".join(result["h1_tags"]),
-                    " ".join(result["h2_tags"])
-                ])
-
-                result["suggested_keywords"] = self._extract_keywords(all_text, language)
+            if response.status_code != 200:
+                result["success"] = False
+                result["error"] = f"HTTP {response.status_code}"
+                return result
+
+            # El parseo del HTML es CPU: se hace en el pool de procesos
+            result.update(await run_cpu(self._parse_website, response.text, language))
 
         except Exception as e:
             result["success"] = False
@@ -376,25 +355,68 @@ class KeywordAnalyzer:
 
         return result
 
-    def _extract_keywords(self, text: str, language: str = "es") -> List[Dict]:
-        """Extrae keywords relevantes del texto."""
-        # Limpiar texto
-        text = re.sub(r'[^\w\s]', ' ', text.lower())
-        words = text.split()
-
-        # Filtrar stopwords
-        stopwords = self.STOPWORDS.get(language, self.STOPWORDS["es"])
-        words = [w for w in words if w not in stopwords and len(w) > 3]
+    def _parse_website(self, html: str, language: str = "es") -> Dict:
+        """Extrae metadatos, títulos y keywords sugeridas del HTML."""
+        result = {
+            "meta_keywords": [],
+            "meta_description": "",
+            "title": "",
+            "h1_tags": [],
+            "h2_tags": []
+        }
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, "lxml")
+
+        # Extraer meta keywords
+        meta_kw = soup.find("meta", attrs={"name": "keywords"})
+        if meta_kw and meta_kw.get("content"):
+            keywords = [k.strip() for k in meta_kw["content"].split(",")]
+            result["meta_keywords"] = [k for k in keywords if k]
+
+        # Extraer meta description
+        meta_desc = soup.find("meta", attrs={"name": "description"})
+        if meta_desc and meta_desc.get("content"):
+            result["meta_description"] = meta_desc["content"]
+
+        # Extraer title
+        title_tag = soup.find("title")
+        if title_tag:
+            result["title"] = title_tag.get_text(strip=True)
+
+        # Extraer H1
+        for h1 in soup.find_all("h1")[:3]:
+            text = h1.get_text(strip=True)
+            if text:
+                result["h1_tags"].append(text)
+
+        # Extraer H2
+        for h2 in soup.find_all("h2")[:5]:
+            text = h2.get_text(strip=True)
+            if text:
+                result["h2_tags"].append(text)
+
+        # Generar sugerencias de keywords (cada texto por separado, para que
+        # las frases no crucen de un título a otro)
+        segments = [result["meta_description"], result["title"], *result["h1_tags"], *result["h2_tags"]]
+        result["suggested_keywords"] = self._extract_keywords(segments, language)
+
+        # Hash de lo que se analiza (no del HTML completo, que puede cambiar
+        # en cada visita por tokens, fechas o publicidad). Incluye la versión
+        # de la extracción para que un cambio en ella vuelva a extraer los términos.
+        analyzed = "\n".join([f"v{self.TERMS_VERSION}", ", ".join(result["meta_keywords"]), *segments])
+        result["content_hash"] = hashlib.sha256(analyzed.encode("utf-8")).hexdigest()
+        return result
 
-        # Contar frecuencia
-        freq = {}
-        for word in words:
-            freq[word] = freq.get(word, 0) + 1
+    def _extract_keywords(self, segments: List[str], language: str = "es") -> List[Dict]:
+        """Extrae las frases de 1 a 3 palabras más frecuentes de los textos."""
+        stopwords = set(self.STOPWORDS.get(language, self.STOPWORDS["es"]))
+        counts = extract_ngrams(segments, stopwords)
 
-        # Ordenar por frecuencia
-        sorted_keywords = sorted(freq.items(), key=lambda x: x[1], reverse=True)
+        # Por frecuencia y, a igualdad, las frases más largas
+        ranked = sorted(counts.items(), key=lambda item: (item[1], item[0].count(" ")), reverse=True)
 
         return [
             {"keyword": kw, "frequency": count}
-            for kw, count in sorted_keywords[:20]
+            for kw, count in ranked[:self.MAX_TERMS]
         ]
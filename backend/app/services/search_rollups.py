@@ -0,0 +1,272 @@
+"""
+Resúmenes diarios de search_logs (SearchLogDaily) y retención de los registros.
+
+- rollup: suma a los resúmenes los registros nuevos desde el último
+  marcador (id del último registro resumido, en app_settings) con un único
+  INSERT ... SELECT ... ON CONFLICT DO UPDATE. Solo entran los registros de
+  hace más de ROLLUP_LAG_SECONDS, para no saltarse los de búsquedas cuya
+  transacción aún no ha terminado.
+- prune: borra los registros ya resumidos más antiguos que
+  SEARCH_LOG_RETENTION_DAYS. En PostgreSQL (search_logs particionada por
+  meses) quita las particiones de los meses caducados enteros; en SQLite
+  borra por lotes.
+- maintain: lo anterior y, en PostgreSQL, crea las particiones de los
+  próximos meses.
+- keyword_effectiveness / daily_totals: analíticas servidas desde los
+  resúmenes, sin leer los registros.
+
+Se ejecuta tras las búsquedas programadas (scheduler), antes de cada
+consulta de analíticas y desde cron:
+    python -m app.services.search_rollups
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, delete, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, dialect_insert
+from app.core.partitions import (
+    drop_expired_search_log_partitions, ensure_search_log_partitions, is_partitioned
+)
+from app.models.search_log import SearchLog
+from app.models.search_log_daily import SearchLogDaily
+from app.models.settings import AppSettings
+
+logger = logging.getLogger("osmoleads.search_rollups")
+
+WATERMARK_KEY = "search_rollup_watermark"
+ROLLUP_LAG_SECONDS = 60
+PRUNE_BATCH_SIZE = 5000
+MIN_RETENTION_DAYS = 2  # El contador de búsquedas del día lee los registros de hoy
+
+
+class SearchRollupService:
+    """Resúmenes diarios de búsquedas, retención y analíticas."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _watermark(self) -> int:
+        value = await self.db.scalar(select(AppSettings.value).where(AppSettings.key == WATERMARK_KEY))
+        if value is None:
+            insert = dialect_insert(self.db.bind.dialect.name)
+            await self.db.execute(insert(AppSettings).values(
+                key=WATERMARK_KEY, value="0",
+                description="Último registro de búsqueda incluido en los resúmenes diarios"
+            ).on_conflict_do_nothing(index_elements=[AppSettings.key]))
+            await self.db.commit()
+            return await self._watermark()
+        return int(value)
+
+    async def rollup(self) -> int:
+        """
+        Resume los registros nuevos. Devuelve cuántos registros se han resumido
+        (0 si no había o si otro proceso los está resumiendo a la vez).
+        """
+        watermark = await self._watermark()
+        upper = await self.db.scalar(select(func.max(SearchLog.id)).where(
+            SearchLog.id > watermark,
+            SearchLog.searched_at < datetime.utcnow() - timedelta(seconds=ROLLUP_LAG_SECONDS)
+        ))
+        if upper is None:
+            return 0
+
+        # Se reserva el rango moviendo el marcador solo si nadie lo ha movido
+        # antes (el UPDATE bloquea la fila hasta el commit)
+        claimed = await self.db.execute(
+            update(AppSettings)
+            .where(AppSettings.key == WATERMARK_KEY, AppSettings.value == str(watermark))
+            .values(value=str(upper))
+        )
+        if claimed.rowcount != 1:
+            await self.db.rollback()
+            return 0
+
+        now = datetime.utcnow()
+        day = func.date(SearchLog.searched_at)
+        country_id = func.coalesce(SearchLog.country_id, 0)
+        keyword_id = func.coalesce(SearchLog.keyword_id, 0)
+        logs = func.count(SearchLog.id)
+        source = (
+            select(
+                day, country_id, keyword_id, func.max(SearchLog.keyword_text), logs,
+                func.coalesce(func.sum(SearchLog.results_count), 0),
+                func.coalesce(func.sum(SearchLog.new_leads_count), 0),
+                func.sum(case((SearchLog.is_success == False, 1), else_=0)),
+                literal(now)
+            )
+            .where(SearchLog.id > watermark, SearchLog.id <= upper, SearchLog.searched_at.is_not(None))
+            .group_by(day, country_id, keyword_id)
+        )
+
+        insert = dialect_insert(self.db.bind.dialect.name)
+        statement = insert(SearchLogDaily).from_select(
+            ["day", "country_id", "keyword_id", "keyword_text", "searches", "results", "new_leads", "errors",
+             "updated_at"],
+            source
+        )
+        await self.db.execute(statement.on_conflict_do_update(
+            index_elements=[SearchLogDaily.day, SearchLogDaily.country_id, SearchLogDaily.keyword_id],
+            set_={
+                "keyword_text": statement.excluded.keyword_text,
+                "searches": SearchLogDaily.searches + statement.excluded.searches,
+                "results": SearchLogDaily.results + statement.excluded.results,
+                "new_leads": SearchLogDaily.new_leads + statement.excluded.new_leads,
+                "errors": SearchLogDaily.errors + statement.excluded.errors,
+                "updated_at": now
+            }
+        ))
+        await self.db.commit()
+
+        return upper - watermark
+
+    async def new_leads_by_keyword(self, country_id: int) -> Dict[int, int]:
+        """
+        Leads nuevos acumulados por keyword del país: los resúmenes diarios
+        más los registros aún sin resumir (por encima del marcador). No se
+        pierden los de los registros ya borrados por prune.
+        """
+        watermark = await self._watermark()
+        totals = dict((await self.db.execute(
+            select(SearchLogDaily.keyword_id, func.sum(SearchLogDaily.new_leads))
+            .where(SearchLogDaily.country_id == country_id, SearchLogDaily.keyword_id != 0)
+            .group_by(SearchLogDaily.keyword_id)
+        )).all())
+
+        pending = (await self.db.execute(
+            select(SearchLog.keyword_id, func.sum(SearchLog.new_leads_count))
+            .where(SearchLog.id > watermark, SearchLog.country_id == country_id, SearchLog.keyword_id.is_not(None))
+            .group_by(SearchLog.keyword_id)
+        )).all()
+        for keyword_id, new_leads in pending:
+            totals[keyword_id] = (totals.get(keyword_id) or 0) + (new_leads or 0)
+
+        return totals
+
+    async def prune(self, days: Optional[int] = None) -> int:
+        """
+        Borra los registros ya resumidos con más de days días. Devuelve
+        cuántos registros (en SQLite) o cuántas particiones mensuales (en
+        PostgreSQL) se han quitado.
+        """
+        days = max(days or settings.SEARCH_LOG_RETENTION_DAYS, MIN_RETENTION_DAYS)
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        watermark = await self._watermark()
+
+        connection = await self.db.connection()
+        if await connection.run_sync(is_partitioned):
+            # Meses enteros: los registros de un mes a medio caducar esperan a que caduque entero
+            removed = await connection.run_sync(drop_expired_search_log_partitions, cutoff, watermark)
+            await self.db.commit()
+            return len(removed)
+
+        deleted = 0
+        while True:
+            batch = select(SearchLog.id).where(
+                SearchLog.searched_at < cutoff,
+                SearchLog.id <= watermark
+            ).limit(PRUNE_BATCH_SIZE)
+            result = await self.db.execute(delete(SearchLog).where(SearchLog.id.in_(batch)))
+            await self.db.commit()
+
+            deleted += result.rowcount
+            if result.rowcount < PRUNE_BATCH_SIZE:
+                return deleted
+
+    async def maintain(self) -> Dict:
+        """Resume los registros nuevos, borra los antiguos y prepara las particiones."""
+        rolled_up = await self.rollup()
+        pruned = await self.prune()
+
+        connection = await self.db.connection()
+        created = await connection.run_sync(ensure_search_log_partitions)
+        await self.db.commit()
+
+        logger.info(f"Registros de búsqueda: {rolled_up} resumidos, {pruned} borrados")
+        return {"rolled_up": rolled_up, "pruned": pruned, "partitions_created": created}
+
+    # ============ Analíticas ============
+    def _period(self, country_id: Optional[int], days: int) -> List:
+        since = datetime.utcnow().date() - timedelta(days=days - 1)
+        filters = [SearchLogDaily.day >= since]
+        if country_id:
+            filters.append(SearchLogDaily.country_id == country_id)
+        return filters
+
+    async def keyword_effectiveness(self, country_id: Optional[int], days: int) -> List[Dict]:
+        """
+        Rendimiento por keyword en los últimos days días. Cada búsqueda gasta
+        una unidad de la cuota diaria, así que new_leads_per_search es el
+        número de leads nuevos por unidad de cuota.
+        """
+        searches = func.sum(SearchLogDaily.searches)
+        rows = (await self.db.execute(
+            select(
+                SearchLogDaily.country_id,
+                SearchLogDaily.keyword_id,
+                func.max(SearchLogDaily.keyword_text).label("keyword"),
+                searches.label("searches"),
+                func.sum(SearchLogDaily.results).label("results"),
+                func.sum(SearchLogDaily.new_leads).label("new_leads"),
+                func.sum(SearchLogDaily.errors).label("errors")
+            )
+            .where(*self._period(country_id, days))
+            .group_by(SearchLogDaily.country_id, SearchLogDaily.keyword_id)
+        )).all()
+
+        keywords = [
+            {
+                "country_id": row.country_id or None,
+                "keyword_id": row.keyword_id or None,
+                "keyword": row.keyword,
+                "searches": row.searches,
+                "results": row.results,
+                "new_leads": row.new_leads,
+                "errors": row.errors,
+                "new_leads_per_search": round(row.new_leads / row.searches, 2) if row.searches else 0,
+                "results_per_search": round(row.results / row.searches, 2) if row.searches else 0,
+                "error_rate": round(row.errors / row.searches, 3) if row.searches else 0
+            }
+            for row in rows
+        ]
+        keywords.sort(key=lambda item: (item["new_leads_per_search"], item["new_leads"]), reverse=True)
+        return keywords
+
+    async def daily_totals(self, country_id: Optional[int], days: int) -> List[Dict]:
+        """Búsquedas, resultados, leads nuevos y errores por día."""
+        rows = (await self.db.execute(
+            select(
+                SearchLogDaily.day,
+                func.sum(SearchLogDaily.searches).label("searches"),
+                func.sum(SearchLogDaily.results).label("results"),
+                func.sum(SearchLogDaily.new_leads).label("new_leads"),
+                func.sum(SearchLogDaily.errors).label("errors")
+            )
+            .where(*self._period(country_id, days))
+            .group_by(SearchLogDaily.day)
+            .order_by(SearchLogDaily.day)
+        )).all()
+
+        return [
+            {
+                "date": row.day.isoformat(),
+                "searches": row.searches,
+                "results": row.results,
+                "new_leads": row.new_leads,
+                "errors": row.errors
+            }
+            for row in rows
+        ]
+
+
+async def _maintain() -> Dict:
+    async with AsyncSessionLocal() as db:
+        return await SearchRollupService(db).maintain()
+
+
+if __name__ == "__main__":
+    print(asyncio.run(_maintain()))
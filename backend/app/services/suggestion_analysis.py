@@ -0,0 +1,532 @@
+"""
+Análisis de las webs de los leads para generar sugerencias de keywords.
+
+El análisis es incremental: de cada lead se guarda su último análisis
+(LeadAnalysis: fecha, hash del contenido y términos extraídos) y cada
+ejecución solo procesa los leads nuevos, los que cambiaron de URL y los
+analizados hace más de ANALYSIS_REFRESH_DAYS días. Los términos de las
+webs que cambian se suman (y los de su análisis anterior se restan) al
+agregado del país (KeywordTermStat). Se analizan los leads guardados y los
+descartados, y el agregado lleva la cuenta de cada lado por separado.
+
+Las sugerencias son los términos (frases de 1 a 3 palabras) mejor
+puntuados del agregado con TF-IDF, ponderado por lo característicos que
+son de los leads guardados frente a los descartados (term_mining). Así
+tienen en cuenta todas las webs analizadas y el coste de cada ejecución
+depende solo de los datos nuevos y del número de términos del país.
+
+Las webs se analizan en un pipeline de concurrencia limitada: hasta
+ANALYSIS_CONCURRENCY webs a la vez con un único cliente HTTP con pool de
+conexiones. Cada web pasa por descarga, parseo en el pool de procesos y
+extracción de keywords.
+
+Los análisis grandes (más de ANALYSIS_SYNC_LIMIT leads) se ejecutan como
+trabajo en segundo plano. El estado del trabajo se guarda en un fichero
+JSON en JOBS_DIR, así que se puede consultar desde cualquier worker.
+
+Solo puede haber un análisis por país a la vez (AnalysisLock): dos
+ejecuciones a la vez leerían los mismos análisis anteriores y sumarían
+dos veces el mismo delta al agregado, que es relativo y no se corregiría.
+La descarga de las webs se hace fuera de transacción: se lee lo pendiente,
+se hace commit y los resultados se guardan en una transacción nueva.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import and_, case, delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine, dialect_insert
+from app.core.executors import run_cpu, run_io
+from app.core.metrics import outbound_client
+from app.models.keyword import Keyword
+from app.models.keyword_suggestion import KeywordSuggestion
+from app.models.lead import Lead, LeadTab
+from app.models.lead_analysis import KeywordTermStat, LeadAnalysis
+from app.services.keyword_ranking import KeywordRankingService
+from app.services.scraper import KeywordAnalyzer
+from app.services.term_mining import MIN_DOCUMENT_FREQUENCY, rank_terms
+
+logger = logging.getLogger("osmoleads.suggestion_analysis")
+
+JOB_ID_PATTERN = r"^[0-9a-f]{16}$"
+JOB_RETENTION_HOURS = 24
+PROGRESS_EVERY = 10  # Webs analizadas entre actualizaciones del estado del trabajo
+UPSERT_BATCH_SIZE = 1000  # Filas por sentencia INSERT ... ON CONFLICT
+IN_BATCH_SIZE = 500  # Valores por cláusula IN
+MINED_SUGGESTIONS = 100  # Términos mejor puntuados que se guardan como sugerencias
+ANALYSIS_LOCK_KEY = 4301  # Primera clave de pg_try_advisory_lock(clave, país) de los análisis
+
+# Pestañas cuyas webs se analizan y lado del agregado en que cuentan
+ANALYSIS_TABS = {LeadTab.LEADS: "leads", LeadTab.DISCARDED: "discarded"}
+
+Progress = Callable[[int, int], Awaitable[None]]
+
+
+def lead_terms(result: Dict) -> Dict[str, Dict]:
+    """
+    Términos de una web analizada.
+
+    Returns:
+        {término: {"frequency": n, "source": "meta" | "content"}}
+    """
+    terms = {}
+
+    # Meta keywords
+    for kw in result.get("meta_keywords", []):
+        kw_lower = kw.lower().strip()
+        if len(kw_lower) > 3:
+            terms.setdefault(kw_lower, {"frequency": 0, "source": "meta"})["frequency"] += 1
+
+    # Keywords sugeridas del contenido
+    for item in result.get("suggested_keywords", []):
+        kw = item["keyword"]
+        if len(kw) > 3:
+            terms.setdefault(kw, {"frequency": 0, "source": "content"})["frequency"] += item["frequency"]
+
+    return terms
+
+
+def merge_terms(delta: Dict, terms: Dict, sign: int, side: str):
+    """
+    Suma (sign=1) o resta (sign=-1) los términos de una web al delta del
+    agregado, en el lado de los leads guardados o de los descartados.
+    """
+    for text, term in terms.items():
+        entry = delta.setdefault(
+            text, {"frequency": 0, "websites_count": 0, "discarded_count": 0, "source": term["source"]}
+        )
+        if side == "leads":
+            entry["frequency"] += sign * term["frequency"]
+            entry["websites_count"] += sign
+        else:
+            entry["discarded_count"] += sign
+
+
+async def analyze_websites(
+    leads: List[Tuple[int, str]],
+    concurrency: int,
+    progress: Optional[Progress] = None
+) -> Dict[int, Dict]:
+    """
+    Analiza las webs (id del lead, url) con concurrencia limitada.
+
+    Returns:
+        Resultado de KeywordAnalyzer.analyze_website por id de lead
+    """
+    analyzer = KeywordAnalyzer()
+    results = {}
+    pending = iter(leads)  # Iterador compartido: cada web la coge un solo worker
+
+    async def worker(client: httpx.AsyncClient):
+        for lead_id, url in pending:
+            results[lead_id] = await analyzer.analyze_website(url, client=client)
+
+            if progress and (len(results) % PROGRESS_EVERY == 0 or len(results) == len(leads)):
+                await progress(len(results), len(leads))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with outbound_client("website_analysis", timeout=10, follow_redirects=True, limits=limits) as client:
+        await asyncio.gather(*(worker(client) for _ in range(min(concurrency, len(leads)))))
+
+    return results
+
+
+class AnalysisLock:
+    """
+    Bloqueo del análisis de un país. En PostgreSQL es un bloqueo consultivo
+    de sesión en una conexión propia en autocommit, así que dura todo el
+    análisis aunque la sesión del análisis haga commit, vale para todos los
+    workers y se libera solo si el proceso muere. En SQLite (desarrollo) es
+    un bloqueo del proceso.
+    """
+
+    _local = set()  # Países en análisis en este proceso (SQLite)
+
+    def __init__(self, country_id: int, connection=None):
+        self.country_id = country_id
+        self.connection = connection
+
+    @classmethod
+    async def acquire(cls, country_id: int) -> Optional["AnalysisLock"]:
+        """Reserva el análisis del país. None si ya hay otro en curso."""
+        if async_engine.dialect.name != "postgresql":
+            if country_id in cls._local:
+                return None
+            cls._local.add(country_id)
+            return cls(country_id)
+
+        connection = await async_engine.connect()
+        try:
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            acquired = await connection.scalar(select(func.pg_try_advisory_lock(ANALYSIS_LOCK_KEY, country_id)))
+        except Exception:
+            await connection.close()
+            raise
+        if not acquired:
+            await connection.close()
+            return None
+        return cls(country_id, connection)
+
+    async def release(self):
+        if self.connection is None:
+            self._local.discard(self.country_id)
+            return
+        try:
+            await self.connection.execute(select(func.pg_advisory_unlock(ANALYSIS_LOCK_KEY, self.country_id)))
+        finally:
+            await self.connection.close()
+
+
+class SuggestionAnalysisService:
+    """Genera sugerencias de keywords a partir de las webs de los leads."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.insert = dialect_insert(db.bind.dialect.name)
+
+    async def run(self, country_id: int, limit: int, progress: Optional[Progress] = None) -> Dict:
+        """
+        Analiza hasta limit leads del país pendientes de análisis y actualiza
+        las sugerencias. Quien lo llama debe tener el AnalysisLock del país.
+        """
+        # Transacción 1: cambios de pestaña al agregado y leads pendientes
+        moved = {}
+        retired = await self._reconcile(country_id, moved)
+        await self._update_aggregate(country_id, moved, datetime.utcnow())
+
+        # Leads guardados o descartados sin analizar, con otra URL o con el
+        # análisis caducado: primero los nunca analizados, luego los más
+        # antiguos; a igualdad, los guardados antes que los descartados
+        stale_before = datetime.utcnow() - timedelta(days=settings.ANALYSIS_REFRESH_DAYS)
+        leads = (await self.db.execute(
+            select(Lead.id, Lead.url, Lead.tab, LeadAnalysis)
+            .outerjoin(LeadAnalysis, LeadAnalysis.lead_id == Lead.id)
+            .where(
+                Lead.country_id == country_id,
+                Lead.tab.in_(list(ANALYSIS_TABS)),
+                or_(
+                    LeadAnalysis.id.is_(None),
+                    LeadAnalysis.url != Lead.url,
+                    LeadAnalysis.analyzed_at < stale_before
+                )
+            )
+            .order_by(
+                LeadAnalysis.analyzed_at.asc().nulls_first(),
+                case((Lead.tab == LeadTab.LEADS, 0), else_=1),
+                Lead.found_at.desc()
+            )
+            .limit(limit)
+        )).all()
+
+        # Sin transacción abierta mientras se descargan las webs
+        await self.db.commit()
+
+        if not leads and not moved:
+            return {"message": "No hay leads nuevos o modificados para analizar", "suggestions_added": 0}
+
+        start = time.perf_counter()
+        results = await analyze_websites(
+            [(lead_id, url) for lead_id, url, _, _ in leads], settings.ANALYSIS_CONCURRENCY, progress
+        ) if leads else {}
+        elapsed = time.perf_counter() - start
+
+        # Transacción 2: resultados, agregado y sugerencias
+        now = datetime.utcnow()
+        delta = {}
+        analyses = []
+        changed = unchanged = failed = 0
+        for lead_id, url, tab, previous in leads:
+            result = results[lead_id]
+            side = ANALYSIS_TABS[tab]
+            analysis = {
+                "lead_id": lead_id,
+                "country_id": country_id,
+                "url": url,
+                "tab": side,
+                "content_hash": previous.content_hash if previous else None,
+                "terms": previous.terms if previous else {},
+                "error": None,
+                "analyzed_at": now
+            }
+
+            if not result["success"]:
+                # Se conservan los términos anteriores; se reintentará cuando caduque
+                failed += 1
+                analysis["error"] = (result["error"] or "")[:255]
+            elif previous and previous.content_hash == result["content_hash"]:
+                unchanged += 1
+            else:
+                changed += 1
+                terms = lead_terms(result)
+                if previous:
+                    merge_terms(delta, previous.terms, -1, previous.tab)
+                merge_terms(delta, terms, 1, side)
+                analysis.update(content_hash=result["content_hash"], terms=terms)
+
+            analyses.append(analysis)
+
+        await self._save_analyses(analyses)
+        await self._update_aggregate(country_id, delta, now)
+        suggestions_added = 0
+        if delta or moved:
+            suggestions_added = await self._save(country_id)
+            await KeywordRankingService(self.db).refresh_suggestions(country_id)
+        await self.db.commit()
+
+        leads_per_second = round(len(leads) / elapsed, 2) if leads and elapsed else None
+        logger.info(
+            f"Análisis del país {country_id}: {len(leads)} webs ({changed} con cambios), "
+            f"{leads_per_second} webs/s"
+        )
+
+        return {
+            "message": f"Análisis completado. {len(leads)} leads analizados.",
+            "keywords_found": len(delta.keys() | moved.keys()),
+            "suggestions_added": suggestions_added,
+            "leads_analyzed": len(leads),
+            "leads_changed": changed,
+            "leads_unchanged": unchanged,
+            "leads_retired": retired,
+            "failed": failed,
+            "seconds": round(elapsed, 2),
+            "leads_per_second": leads_per_second
+        }
+
+    async def _reconcile(self, country_id: int, delta: Dict) -> int:
+        """
+        Pone al día el agregado con los cambios de pestaña: los análisis de
+        leads que pasaron de guardados a descartados (o al revés) cambian de
+        lado, y los de leads borrados o en otras pestañas se restan y se
+        borran. Devuelve cuántos análisis se han borrado.
+        """
+        rows = (await self.db.execute(
+            select(LeadAnalysis, Lead.tab)
+            .outerjoin(Lead, Lead.id == LeadAnalysis.lead_id)
+            .where(
+                LeadAnalysis.country_id == country_id,
+                or_(
+                    Lead.id.is_(None),
+                    Lead.tab.not_in(list(ANALYSIS_TABS)),
+                    *(
+                        and_(Lead.tab == tab, LeadAnalysis.tab != side)
+                        for tab, side in ANALYSIS_TABS.items()
+                    )
+                )
+            )
+        )).all()
+
+        retired = []
+        for analysis, tab in rows:
+            merge_terms(delta, analysis.terms, -1, analysis.tab)
+            if tab in ANALYSIS_TABS:
+                analysis.tab = ANALYSIS_TABS[tab]
+                merge_terms(delta, analysis.terms, 1, analysis.tab)
+            else:
+                retired.append(analysis.id)
+
+        for start in range(0, len(retired), IN_BATCH_SIZE):
+            await self.db.execute(delete(LeadAnalysis).where(LeadAnalysis.id.in_(retired[start:start + IN_BATCH_SIZE])))
+
+        return len(retired)
+
+    async def _save_analyses(self, analyses: List[Dict]):
+        """Guarda el último análisis de cada lead (un INSERT ... ON CONFLICT por lote)."""
+        for start in range(0, len(analyses), UPSERT_BATCH_SIZE):
+            statement = self.insert(LeadAnalysis).values(analyses[start:start + UPSERT_BATCH_SIZE])
+            await self.db.execute(statement.on_conflict_do_update(
+                index_elements=[LeadAnalysis.lead_id],
+                set_={
+                    column: statement.excluded[column]
+                    for column in ("url", "tab", "content_hash", "terms", "error", "analyzed_at")
+                }
+            ))
+
+    async def _update_aggregate(self, country_id: int, delta: Dict, now: datetime):
+        """Aplica el delta de términos al agregado del país y borra los que ya no aparecen en ninguna web."""
+        rows = [
+            {"country_id": country_id, "text": text, "updated_at": now, **entry}
+            for text, entry in delta.items()
+            if entry["frequency"] or entry["websites_count"] or entry["discarded_count"]
+        ]
+
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            statement = self.insert(KeywordTermStat).values(rows[start:start + UPSERT_BATCH_SIZE])
+            await self.db.execute(statement.on_conflict_do_update(
+                index_elements=[KeywordTermStat.country_id, KeywordTermStat.text],
+                set_={
+                    "frequency": KeywordTermStat.frequency + statement.excluded.frequency,
+                    "websites_count": KeywordTermStat.websites_count + statement.excluded.websites_count,
+                    "discarded_count": KeywordTermStat.discarded_count + statement.excluded.discarded_count,
+                    "updated_at": now
+                }
+            ))
+
+        if rows:
+            await self.db.execute(delete(KeywordTermStat).where(
+                KeywordTermStat.country_id == country_id,
+                KeywordTermStat.websites_count <= 0,
+                KeywordTermStat.discarded_count <= 0
+            ))
+
+    async def rank(self, country_id: int, limit: int) -> Dict:
+        """Términos del país mejor puntuados (TF-IDF x lift, ver term_mining)."""
+        pages = dict((await self.db.execute(
+            select(LeadAnalysis.tab, func.count(LeadAnalysis.id))
+            .where(LeadAnalysis.country_id == country_id, LeadAnalysis.content_hash.is_not(None))
+            .group_by(LeadAnalysis.tab)
+        )).all())
+
+        stats = (await self.db.execute(
+            select(
+                KeywordTermStat.text, KeywordTermStat.source, KeywordTermStat.frequency,
+                KeywordTermStat.websites_count, KeywordTermStat.discarded_count
+            ).where(
+                KeywordTermStat.country_id == country_id,
+                KeywordTermStat.websites_count >= MIN_DOCUMENT_FREQUENCY
+            )
+        )).mappings().all()
+
+        leads_pages = pages.get("leads", 0)
+        discarded_pages = pages.get("discarded", 0)
+        return {
+            "leads_pages": leads_pages,
+            "discarded_pages": discarded_pages,
+            "terms": await run_cpu(rank_terms, [dict(stat) for stat in stats], leads_pages, discarded_pages, limit)
+        }
+
+    async def _save(self, country_id: int) -> int:
+        """
+        Guarda como sugerencias los MINED_SUGGESTIONS términos mejor
+        puntuados del país con un INSERT ... ON CONFLICT (country_id, text)
+        DO UPDATE por lote. Las sugerencias que ya no están entre ellos se
+        quedan sin puntuación. Devuelve cuántas sugerencias son nuevas.
+        """
+        existing_keywords = {
+            text.lower() for text in
+            (await self.db.scalars(select(Keyword.text).where(Keyword.country_id == country_id))).all()
+        }
+
+        ranked = (await self.rank(country_id, MINED_SUGGESTIONS + len(existing_keywords)))["terms"]
+        rows = [
+            {
+                "country_id": country_id,
+                "text": term["text"],
+                "source": term["source"],
+                "frequency": term["frequency"],
+                "websites_count": term["websites_count"],
+                "score": term["score"]
+            }
+            for term in ranked
+            if term["text"] not in existing_keywords  # Ni si ya existe como keyword
+        ][:MINED_SUGGESTIONS]
+
+        count_query = select(func.count(KeywordSuggestion.id)).where(KeywordSuggestion.country_id == country_id)
+        before = await self.db.scalar(count_query)
+
+        await self.db.execute(
+            update(KeywordSuggestion).where(KeywordSuggestion.country_id == country_id).values(score=None)
+        )
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            statement = self.insert(KeywordSuggestion).values(rows[start:start + UPSERT_BATCH_SIZE])
+            await self.db.execute(statement.on_conflict_do_update(
+                index_elements=[KeywordSuggestion.country_id, KeywordSuggestion.text],
+                set_={
+                    "frequency": statement.excluded.frequency,
+                    "websites_count": statement.excluded.websites_count,
+                    "score": statement.excluded.score,
+                    "updated_at": datetime.utcnow()
+                }
+            ))
+
+        after = await self.db.scalar(count_query)
+        return after - before
+
+
+# ============ Trabajos en segundo plano ============
+class AnalysisJobStore:
+    """Estado de los trabajos de análisis en ficheros JSON (visibles desde todos los workers)."""
+
+    def __init__(self, jobs_dir: Optional[str] = None):
+        self.jobs_dir = Path(jobs_dir or settings.JOBS_DIR)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"analysis_{job_id}.json"
+
+    def write(self, job_id: str, status: Dict):
+        """Escritura atómica (fichero temporal + rename)."""
+        partial = self.jobs_dir / f".analysis_{job_id}.{uuid.uuid4().hex[:8]}.tmp"
+        partial.write_text(json.dumps(status, ensure_ascii=False), encoding="utf-8")
+        os.replace(partial, self.path(job_id))
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        try:
+            return json.loads(self.path(job_id).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def prune(self):
+        """Borra los estados de trabajos antiguos."""
+        limit = time.time() - JOB_RETENTION_HOURS * 3600
+        for path in self.jobs_dir.glob("analysis_*.json"):
+            if path.stat().st_mtime < limit:
+                path.unlink(missing_ok=True)
+
+
+_running_jobs = set()  # Referencias a las tareas para que no las recoja el GC
+
+
+def start_analysis_job(country_id: int, limit: int, lock: AnalysisLock) -> str:
+    """
+    Lanza el análisis como tarea en segundo plano y devuelve el ID del
+    trabajo. La tarea libera el bloqueo del país al terminar.
+    """
+    store = AnalysisJobStore()
+    store.prune()
+
+    job_id = uuid.uuid4().hex[:16]
+    status = {
+        "status": "running",
+        "country_id": country_id,
+        "limit": limit,
+        "done": 0,
+        "total": None,
+        "started_at": datetime.utcnow().isoformat()
+    }
+    store.write(job_id, status)
+
+    task = asyncio.create_task(_run_job(store, job_id, status, lock))
+    _running_jobs.add(task)
+    task.add_done_callback(_running_jobs.discard)
+    return job_id
+
+
+async def _run_job(store: AnalysisJobStore, job_id: str, status: Dict, lock: AnalysisLock):
+    async def progress(done: int, total: int):
+        await run_io(store.write, job_id, {**status, "done": done, "total": total})
+
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await SuggestionAnalysisService(db).run(status["country_id"], status["limit"], progress)
+        final = {**status, "status": "done", "result": result}
+        final["done"] = final["total"] = result.get("leads_analyzed", 0)
+
+    except Exception as e:
+        logger.exception(f"Error en el análisis {job_id}")
+        final = {**status, "status": "error", "error": str(e)}
+
+    finally:
+        await lock.release()
+
+    final["finished_at"] = datetime.utcnow().isoformat()
+    await run_io(store.write, job_id, final)
@@ -0,0 +1,118 @@
+"""
+Minería de términos para las sugerencias de keywords.
+
+- extract_ngrams: frases de 1 a 3 palabras de los textos de una web
+  (meta description, title, H1, H2). Una frase no puede empezar ni acabar
+  en stopword, pero sí contenerla ("filtro de agua"), y no cruza de un
+  texto a otro.
+- rank_terms: puntúa los términos del agregado de un país
+  (KeywordTermStat) con TF-IDF sobre todas las webs analizadas, ponderado
+  por lo característico que es el término de los leads guardados frente a
+  los descartados.
+
+El agregado ya tiene, por término, la frecuencia total y el número de webs
+(la frecuencia de documento) en Leads y en Descartados, así que el ranking
+no recorre las webs: es una pasada sobre los términos del país.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Set
+
+MAX_NGRAM = 3
+MIN_WORD_LENGTH = 4  # Palabras sueltas de al menos 4 letras
+MIN_DOCUMENT_FREQUENCY = 2  # Webs de Leads en las que debe aparecer un término para puntuarlo
+
+_TOKEN = re.compile(r"\w+")
+
+
+def extract_ngrams(segments: Iterable[str], stopwords: Set[str], max_n: int = MAX_NGRAM) -> Counter:
+    """Cuenta las frases de 1 a max_n palabras de cada texto."""
+    counts = Counter()
+    for segment in segments:
+        tokens = _TOKEN.findall(segment.lower())
+        # Una posición puede empezar o acabar frase si no es stopword ni número
+        edge = [token not in stopwords and not token.isdigit() and len(token) > 1 for token in tokens]
+
+        counts.update(
+            token for token, ok in zip(tokens, edge) if ok and len(token) >= MIN_WORD_LENGTH
+        )
+        for n in range(2, max_n + 1):
+            counts.update(
+                " ".join(tokens[i:i + n])
+                for i in range(len(tokens) - n + 1)
+                if edge[i] and edge[i + n - 1]
+            )
+    return counts
+
+
+def rank_terms(stats: Iterable[Dict], leads_pages: int, discarded_pages: int, limit: int = 100) -> List[Dict]:
+    """
+    Ordena los términos de un país por su puntuación.
+
+    Args:
+        stats: Filas del agregado (text, source, frequency, websites_count,
+            discarded_count)
+        leads_pages: Webs de leads guardados analizadas
+        discarded_pages: Webs de leads descartados analizadas
+        limit: Número de términos a devolver
+
+    Returns:
+        Términos con score, tfidf, lift y frecuencias, de mayor a menor score
+    """
+    if not leads_pages:
+        return []
+
+    pages = leads_pages + discarded_pages
+    ranked = []
+    for stat in stats:
+        leads_df = stat["websites_count"]
+        discarded_df = stat["discarded_count"]
+        if leads_df < MIN_DOCUMENT_FREQUENCY:
+            continue
+
+        # TF-IDF: frecuencia media por web de Leads por la rareza en todo el corpus
+        idf = math.log((1 + pages) / (1 + leads_df + discarded_df)) + 1
+        tfidf = stat["frequency"] / leads_pages * idf
+
+        # Lift: proporción de webs de Leads con el término frente a la de Descartados
+        if discarded_pages:
+            lift = ((leads_df + 1) / (leads_pages + 2)) / ((discarded_df + 1) / (discarded_pages + 2))
+            if lift <= 1:
+                continue  # Tan o más propio de los descartados
+        else:
+            lift = 1.0
+
+        ranked.append({
+            "text": stat["text"],
+            "words": stat["text"].count(" ") + 1,
+            "source": stat["source"],
+            "score": round(tfidf * lift, 6),
+            "tfidf": round(tfidf, 6),
+            "lift": round(lift, 4),
+            "frequency": stat["frequency"],
+            "websites_count": leads_df,
+            "discarded_count": discarded_df
+        })
+
+    ranked.sort(key=lambda term: term["score"], reverse=True)
+    # Las redundantes solo se buscan entre las mejores (margen para las que se quitan)
+    return _drop_redundant(ranked[:limit * 4])[:limit]
+
+
+def _drop_redundant(ranked: List[Dict]) -> List[Dict]:
+    """
+    Quita las frases contenidas en otra más larga que aparece en las mismas
+    webs ("agua osmosis" si "filtro agua osmosis" está en todas sus webs).
+    """
+    coverage = {term["text"]: term["websites_count"] for term in ranked}
+    redundant = set()
+    for term in ranked:
+        words = term["text"].split()
+        for n in range(1, len(words)):
+            for i in range(len(words) - n + 1):
+                part = " ".join(words[i:i + n])
+                if coverage.get(part) == term["websites_count"]:
+                    redundant.add(part)
+
+    return [term for term in ranked if term["text"] not in redundant]
@@ -0,0 +1,254 @@
+"""
+Escritor XLSX en streaming.
+Genera el fichero directamente (zip + XML de SpreadsheetML) y va devolviendo
+los bytes a medida que se producen, con memoria constante sea cual sea el
+número de filas. Los estilos se definen una sola vez en styles.xml y las
+celdas solo referencian su índice.
+"""
+import re
+import zipfile
+from typing import Iterable, Iterator, List, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+# Colores corporativos (azul Osmofilter)
+HEADER_COLOR = "1E40AF"  # Azul oscuro
+HEADER_FONT_COLOR = "FFFFFF"
+ALT_ROW_COLOR = "EFF6FF"  # Azul muy claro
+
+# Estilos compartidos: nombre -> índice en cellXfs de styles.xml
+STYLES = {
+    "default": 0,
+    "header": 1,
+    "body": 2,  # Borde + alineado arriba + ajuste de texto
+    "body_alt": 3,  # Igual que body con fondo alterno
+    "body_plain": 4,  # Solo borde
+    "body_plain_alt": 5,  # Solo borde con fondo alterno
+}
+
+# Límites de Excel
+MAX_CELL_LENGTH = 32767
+MAX_SHEET_NAME = 31
+
+# Caracteres de control no permitidos en XML
+ILLEGAL_CHARACTERS_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Cada cuántos bytes escritos se devuelve un trozo al cliente
+FLUSH_THRESHOLD = 64 * 1024
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+STYLES_XML = (
+    XML_HEADER
+    + f'<styleSheet xmlns="{NS_MAIN}">'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    f'<font><b/><sz val="11"/><color rgb="FF{HEADER_FONT_COLOR}"/><name val="Calibri"/><family val="2"/></font>'
+    '</fonts>'
+    '<fills count="4">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    f'<fill><patternFill patternType="solid"><fgColor rgb="FF{HEADER_COLOR}"/><bgColor rgb="FF{HEADER_COLOR}"/></patternFill></fill>'
+    f'<fill><patternFill patternType="solid"><fgColor rgb="FF{ALT_ROW_COLOR}"/><bgColor rgb="FF{ALT_ROW_COLOR}"/></patternFill></fill>'
+    '</fills>'
+    '<borders count="2">'
+    '<border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="6">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="1" xfId="0" applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="1" xfId="0" applyBorder="1" applyAlignment="1">'
+    '<alignment vertical="top" wrapText="1"/></xf>'
+    '<xf numFmtId="0" fontId="0" fillId="3" borderId="1" xfId="0" applyFill="1" applyBorder="1" applyAlignment="1">'
+    '<alignment vertical="top" wrapText="1"/></xf>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="1" xfId="0" applyBorder="1"/>'
+    '<xf numFmtId="0" fontId="0" fillId="3" borderId="1" xfId="0" applyFill="1" applyBorder="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def column_letter(index: int) -> str:
+    """Convierte un índice de columna (1..n) a letra de Excel (A, B, ..., AA)."""
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+class _ChunkBuffer:
+    """Destino no posicionable para ZipFile que acumula bytes hasta que se recogen."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+class XlsxStreamWriter:
+    """
+    Escribe un libro XLSX hoja a hoja devolviendo los bytes por trozos.
+
+    Uso:
+        writer = XlsxStreamWriter()
+        yield from writer.write_sheet("Leads", columns, rows)
+        yield from writer.close()
+    """
+
+    def __init__(self):
+        self._buffer = _ChunkBuffer()
+        self._zip = zipfile.ZipFile(self._buffer, "w", compression=zipfile.ZIP_DEFLATED)
+        self._sheets: List[str] = []
+
+    def write_sheet(
+        self,
+        title: str,
+        columns: List[Tuple[str, int]],
+        rows: Iterable[list],
+        wrap_text: bool = True
+    ) -> Iterator[bytes]:
+        """
+        Escribe una hoja completa.
+
+        Args:
+            title: Nombre de la hoja (se recorta a 31 caracteres)
+            columns: Lista de (encabezado, ancho)
+            rows: Iterable de filas (listas de valores), se consume una sola vez
+            wrap_text: Si ajustar el texto de las celdas de datos
+
+        Yields:
+            Trozos de bytes del fichero a medida que se generan
+        """
+        self._sheets.append(title[:MAX_SHEET_NAME])
+        sheet_number = len(self._sheets)
+        letters = [column_letter(i) for i in range(1, len(columns) + 1)]
+
+        if wrap_text:
+            body_style, alt_style = STYLES["body"], STYLES["body_alt"]
+        else:
+            body_style, alt_style = STYLES["body_plain"], STYLES["body_plain_alt"]
+
+        with self._zip.open(f"xl/worksheets/sheet{sheet_number}.xml", "w") as sheet:
+            cols_xml = "".join(
+                f'<col min="{i}" max="{i}" width="{width}" customWidth="1"/>'
+                for i, (_, width) in enumerate(columns, 1)
+            )
+            sheet.write((
+                XML_HEADER
+                + f'<worksheet xmlns="{NS_MAIN}" xmlns:r="{NS_REL}">'
+                '<sheetViews><sheetView workbookViewId="0">'
+                '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                '<selection pane="bottomLeft" activeCell="A2" sqref="A2"/>'
+                '</sheetView></sheetViews>'
+                '<sheetFormatPr defaultRowHeight="15"/>'
+                f'<cols>{cols_xml}</cols>'
+                '<sheetData>'
+            ).encode("utf-8"))
+
+            sheet.write(self._row_xml(1, letters, [c[0] for c in columns], STYLES["header"]))
+
+            for row_idx, values in enumerate(rows, 2):
+                style = alt_style if row_idx % 2 == 0 else body_style
+                sheet.write(self._row_xml(row_idx, letters, values, style))
+
+                if self._buffer.size >= FLUSH_THRESHOLD:
+                    yield self._buffer.drain()
+
+            sheet.write(b"</sheetData></worksheet>")
+
+        chunk = self._buffer.drain()
+        if chunk:
+            yield chunk
+
+    def close(self) -> Iterator[bytes]:
+        """Escribe los ficheros del libro (workbook, estilos, relaciones) y cierra el zip."""
+        sheet_count = len(self._sheets)
+
+        sheets_xml = "".join(
+            f'<sheet name={quoteattr(name)} sheetId="{i}" r:id="rId{i}"/>'
+            for i, name in enumerate(self._sheets, 1)
+        )
+        workbook_rels = "".join(
+            f'<Relationship Id="rId{i}" Type="{NS_REL}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, sheet_count + 1)
+        )
+        sheet_overrides = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, sheet_count + 1)
+        )
+
+        self._zip.writestr("[Content_Types].xml", (
+            XML_HEADER
+            + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + sheet_overrides
+            + '</Types>'
+        ))
+        self._zip.writestr("_rels/.rels", (
+            XML_HEADER
+            + f'<Relationships xmlns="{NS_PKG_REL}">'
+            f'<Relationship Id="rId1" Type="{NS_REL}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ))
+        self._zip.writestr("xl/workbook.xml", (
+            XML_HEADER
+            + f'<workbook xmlns="{NS_MAIN}" xmlns:r="{NS_REL}">'
+            f'<sheets>{sheets_xml}</sheets>'
+            '</workbook>'
+        ))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", (
+            XML_HEADER
+            + f'<Relationships xmlns="{NS_PKG_REL}">'
+            + workbook_rels
+            + f'<Relationship Id="rId{sheet_count + 1}" Type="{NS_REL}/styles" Target="styles.xml"/>'
+            '</Relationships>'
+        ))
+        self._zip.writestr("xl/styles.xml", STYLES_XML)
+        self._zip.close()
+
+        yield self._buffer.drain()
+
+    def _row_xml(self, row_idx: int, letters: List[str], values: list, style: int) -> bytes:
+        """Genera el XML de una fila."""
+        cells = []
+        for letter, value in zip(letters, values):
+            ref = f"{letter}{row_idx}"
+            if value is None or value == "":
+                cells.append(f'<c r="{ref}" s="{style}"/>')
+            elif isinstance(value, bool):
+                cells.append(f'<c r="{ref}" s="{style}" t="b"><v>{int(value)}</v></c>')
+            elif isinstance(value, (int, float)):
+                cells.append(f'<c r="{ref}" s="{style}"><v>{value}</v></c>')
+            else:
+                text = ILLEGAL_CHARACTERS_RE.sub("", str(value))[:MAX_CELL_LENGTH]
+                cells.append(
+                    f'<c r="{ref}" s="{style}" t="inlineStr">'
+                    f'<is><t xml:space="preserve">{escape(text)}</t></is></c>'
+                )
+        return f'<row r="{row_idx}">{"".join(cells)}</row>'.encode("utf-8")
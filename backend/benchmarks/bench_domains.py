@@ -0,0 +1,93 @@
+"""
+Benchmark de la normalización de dominios (app/services/domains.py).
+Mide la compilación de la Public Suffix List y el coste por URL de
+lead_domain en frío (caché vacía) y con los hosts ya memorizados (el caso
+habitual en las búsquedas: los mismos dominios se repiten), frente a la
+normalización anterior por prefijos.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_domains
+    python -m benchmarks.bench_domains --urls 200000 --hosts 5000
+"""
+import argparse
+import json
+import random
+import time
+from urllib.parse import urlparse
+
+SUFFIXES = ["es", "com", "fr", "pt", "co.uk", "com.mx", "com.ar", "org.es", "myshopify.com", "blogspot.com"]
+SUBDOMAINS = ["", "www.", "shop.", "tienda.", "blog.", "m.", "es.", "static.cdn."]
+
+
+def fake_urls(count: int, hosts: int, seed: int):
+    """URLs de resultados con hosts repetidos (hosts distintos en total)."""
+    rng = random.Random(seed)
+    names = [
+        f"{rng.choice(SUBDOMAINS)}empresa{i}.{rng.choice(SUFFIXES)}"
+        for i in range(hosts)
+    ]
+    return [f"https://{rng.choice(names)}/productos/osmosis?p={i}" for i in range(count)]
+
+
+def legacy_domain(url: str):
+    """Normalización anterior de GoogleSearchService (www. y prefijos fijos)."""
+    domain = urlparse(url).netloc.lower()
+    if domain.startswith("www."):
+        domain = domain[4:]
+    for prefix in ["shop.", "tienda.", "store.", "blog.", "m."]:
+        if domain.startswith(prefix):
+            domain = domain[len(prefix):]
+    return domain or None
+
+
+def timed(func, urls) -> float:
+    start = time.perf_counter()
+    for url in urls:
+        func(url)
+    return time.perf_counter() - start
+
+
+def run(count: int, hosts: int, seed: int) -> dict:
+    from app.services import domains
+
+    start = time.perf_counter()
+    domains.suffix_trie()
+    load = time.perf_counter() - start
+
+    urls = fake_urls(count, hosts, seed)
+    legacy = timed(legacy_domain, urls)
+
+    domains.registrable_domain.cache_clear()
+    domains._netloc_domain.cache_clear()
+    cold = timed(domains.lead_domain, urls)
+    warm = timed(domains.lead_domain, urls)
+    cache = domains._netloc_domain.cache_info()
+
+    def per_url(seconds: float) -> float:
+        return round(seconds / count * 1_000_000, 3)
+
+    return {
+        "benchmark": "domains.lead_domain",
+        "urls": count,
+        "distinct_hosts": hosts,
+        "trie_load_ms": round(load * 1000, 1),
+        "legacy_us_per_url": per_url(legacy),
+        "cold_us_per_url": per_url(cold),
+        "memoized_us_per_url": per_url(warm),
+        "cache_hits": cache.hits,
+        "cache_misses": cache.misses
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de normalización de dominios")
+    parser.add_argument("--urls", type=int, default=100_000)
+    parser.add_argument("--hosts", type=int, default=2_000, help="Hosts distintos entre las URLs")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.urls, args.hosts, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
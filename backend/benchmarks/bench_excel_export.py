@@ -0,0 +1,93 @@
+"""
+Benchmark de la exportación a Excel en streaming.
+Mide tiempo y pico de memoria (RSS) exportando leads sintéticos.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_excel_export
+    python -m benchmarks.bench_excel_export --rows 10000 100000
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+DEFAULT_ROWS = [10_000, 100_000]
+
+
+def fake_leads(count: int):
+    """Genera leads sintéticos (sin base de datos) de uno en uno."""
+    from app.models.lead import LeadTab
+
+    tabs = list(LeadTab)
+    status = SimpleNamespace(name="Pendiente")
+    keyword = SimpleNamespace(text="filtro osmosis inversa")
+    base_date = datetime(2024, 1, 1)
+
+    for i in range(count):
+        found_at = base_date + timedelta(minutes=i)
+        yield SimpleNamespace(
+            name=f"Empresa de ejemplo {i} - Tratamiento de agua",
+            url=f"https://www.empresa{i}.es/productos/osmosis",
+            domain=f"empresa{i}.es",
+            email=f"info@empresa{i}.es",
+            phone="+34 600 00 00 00",
+            cif=f"B{i:08d}"[:9],
+            status=status,
+            tab=tabs[i % len(tabs)],
+            found_by_keyword=keyword,
+            found_at=found_at,
+            notes=[SimpleNamespace(created_at=found_at, content="Llamar la semana que viene")],
+            snippet="Distribuidor de equipos de ósmosis inversa y filtros de agua para el hogar. " * 2
+        )
+
+
+def run_single(rows: int) -> dict:
+    """Exporta `rows` leads y devuelve tiempo, bytes y pico de RSS."""
+    from app.services.excel_export import ExcelExportService
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+
+    total_bytes = 0
+    for chunk in ExcelExportService().stream_leads(fake_leads(rows)):
+        total_bytes += len(chunk)
+
+    elapsed = time.perf_counter() - start
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {
+        "benchmark": "excel_export.stream_leads",
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed) if elapsed else None,
+        "bytes": total_bytes,
+        "peak_rss_mb": round(rss_peak / 1024, 1),  # ru_maxrss en KB (Linux)
+        "rss_growth_mb": round((rss_peak - rss_before) / 1024, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de exportación a Excel")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(args.rows[0])))
+        return
+
+    # Cada tamaño en un proceso nuevo para que el pico de RSS sea independiente
+    for rows in args.rows:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_excel_export", "--single", "--rows", str(rows)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        print(output.strip())
+
+
+if __name__ == "__main__":
+    main()
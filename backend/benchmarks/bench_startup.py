@@ -0,0 +1,135 @@
+"""
+Benchmark del arranque en frío.
+Mide el tiempo de importación de app.main (python -X importtime), los
+módulos que más tardan en importarse y el tiempo hasta la primera
+respuesta de /api/health con uvicorn.
+
+Cada medida se hace en un proceso nuevo. Con --max-import-ms y
+--max-first-request-ms termina con código 1 si se supera el presupuesto.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 5 --max-import-ms 1500
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+TOP_MODULES = 10
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Tiempos acumulados (µs) por módulo de la salida de -X importtime."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|", 2)
+        try:
+            times[module.strip()] = int(cumulative)
+        except ValueError:
+            continue  # Cabecera
+    return times
+
+
+def measure_import() -> dict:
+    """Importa app.main en un proceso nuevo con -X importtime."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    times = parse_importtime(process.stderr)
+    top_level = {module: us for module, us in times.items() if "." not in module}
+    return {
+        "import_ms": times.get("app.main", 0) / 1000,
+        "top_level": top_level,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_request(timeout: float = 60) -> float:
+    """Segundos desde que se lanza uvicorn hasta la primera respuesta 200."""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=os.environ.copy()
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn terminó con código {process.returncode}")
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/api/health", timeout=1)
+                if response.status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise TimeoutError("uvicorn no respondió a tiempo")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del arranque en frío")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--skip-server", action="store_true", help="Solo mide la importación")
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-first-request-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    import_ms = [run["import_ms"] for run in imports]
+
+    # Módulos de primer nivel más lentos (mediana de las ejecuciones)
+    modules = {}
+    for run in imports:
+        for module, us in run["top_level"].items():
+            modules.setdefault(module, []).append(us)
+    slowest = sorted(
+        ((module, statistics.median(values) / 1000) for module, values in modules.items()),
+        key=lambda item: item[1], reverse=True
+    )[:TOP_MODULES]
+
+    result = {
+        "import_ms": {"median": round(statistics.median(import_ms), 1), "min": round(min(import_ms), 1)},
+        "slowest_imports_ms": {module: round(ms, 1) for module, ms in slowest},
+    }
+
+    if not args.skip_server:
+        first_request_ms = [measure_first_request() * 1000 for _ in range(args.runs)]
+        result["first_request_ms"] = {
+            "median": round(statistics.median(first_request_ms), 1),
+            "min": round(min(first_request_ms), 1)
+        }
+
+    print(json.dumps(result, indent=2))
+
+    over_budget = (
+        (args.max_import_ms is not None and result["import_ms"]["median"] > args.max_import_ms)
+        or (
+            args.max_first_request_ms is not None and "first_request_ms" in result
+            and result["first_request_ms"]["median"] > args.max_first_request_ms
+        )
+    )
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
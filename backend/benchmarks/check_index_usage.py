@@ -0,0 +1,97 @@
+"""
+Comprueba con EXPLAIN que las consultas frecuentes usan sus índices.
+Se ejecuta contra la base de datos de DATABASE_URL (con las migraciones
+aplicadas) y termina con código 1 si alguna consulta no usa el índice
+esperado.
+
+En PostgreSQL se desactiva el seq scan durante la comprobación: con tablas
+pequeñas el planificador prefiere leer la tabla entera aunque el índice
+sirva, y lo que se comprueba es que el índice es utilizable.
+
+Uso (desde backend/):
+    python -m benchmarks.check_index_usage
+"""
+import json
+import sys
+from datetime import datetime
+
+from sqlalchemy import func, select, text
+
+from app.core.database import engine
+from app.models.keyword import Keyword
+from app.models.keyword_suggestion import KeywordSuggestion
+from app.models.lead import Lead, LeadTab
+from app.models.note import Note
+from app.models.search_log import SearchLog
+
+# (nombre, consulta, índice esperado)
+HOT_QUERIES = [
+    (
+        "leads por país y pestaña",
+        select(Lead.id).where(Lead.country_id == 1, Lead.tab == LeadTab.NEW)
+        .order_by(Lead.found_at.desc()).limit(100),
+        "ix_leads_country_tab_found",
+    ),
+    (
+        "lead duplicado por dominio",
+        select(Lead.id).where(Lead.country_id == 1, Lead.domain == "example.com"),
+        "uq_leads_country_domain",
+    ),
+    (
+        "búsquedas del día",
+        select(func.count(SearchLog.id)).where(SearchLog.searched_at >= datetime(2024, 1, 1)),
+        "ix_search_logs_searched_at",
+    ),
+    (
+        "notas de un lead",
+        select(Note.id).where(Note.lead_id == 1).order_by(Note.created_at.desc()),
+        "ix_notes_lead_created",
+    ),
+    (
+        "sugerencia por país y texto",
+        select(KeywordSuggestion.id).where(
+            KeywordSuggestion.country_id == 1, KeywordSuggestion.text == "osmosis"
+        ),
+        "uq_keyword_suggestions_country_text",
+    ),
+    (
+        "keywords de un país",
+        select(Keyword.id).where(Keyword.country_id == 1),
+        "ix_keywords_country_id",
+    ),
+]
+
+
+def explain(connection, query) -> str:
+    """Plan de ejecución de una consulta como texto."""
+    compiled = query.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+
+    if connection.dialect.name == "postgresql":
+        rows = connection.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+        return json.dumps(rows)
+
+    rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def main() -> int:
+    results = []
+
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SET enable_seqscan = off"))
+
+        for name, query, index in HOT_QUERIES:
+            plan = explain(connection, query)
+            results.append({"query": name, "index": index, "uses_index": index in plan})
+
+        connection.rollback()
+
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+
+    return 0 if all(result["uses_index"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
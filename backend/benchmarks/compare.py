@@ -0,0 +1,53 @@
+"""
+Compara dos resultados de benchmarks.suite (p. ej. el commit base y el
+actual) y termina con código 1 si algún benchmark empeora más del umbral.
+
+Uso (desde backend/):
+    python -m benchmarks.compare base.json nuevo.json
+    python -m benchmarks.compare base.json nuevo.json --metric p95_ms --threshold 0.2
+"""
+import argparse
+import json
+import sys
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compara dos resultados de la suite de benchmarks")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--metric", default="p50_ms")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Empeoramiento tolerado (0.10 = 10 %%)")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    if (base["leads"], base["database"]) != (new["leads"], new["database"]):
+        print(
+            f"Aviso: datos distintos ({base['leads']} leads en {base['database']} "
+            f"frente a {new['leads']} en {new['database']})",
+            file=sys.stderr
+        )
+
+    regressions = 0
+    for name in sorted(set(base["results"]) & set(new["results"])):
+        before = base["results"][name][args.metric]
+        after = new["results"][name][args.metric]
+        change = (after - before) / before if before else 0.0
+        regression = change > args.threshold
+        regressions += regression
+        print(json.dumps({
+            "benchmark": name,
+            "base": before,
+            "new": after,
+            "change_pct": round(change * 100, 1),
+            "regression": regression
+        }, ensure_ascii=False))
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Servidor HTTP local para los benchmarks, sin salir a Internet:
+
+- /customsearch/v1: imita Google Custom Search. Devuelve 10 resultados
+  deterministas por consulta: dominios nuevos, dominios que ya existen en
+  los datos sintéticos (site<n>.test), un marketplace y un dominio excluido.
+- Cualquier otra ruta: granja de webs para el scraper y el análisis de
+  keywords. La portada (/ y /s/<n>/) tiene meta keywords, títulos y texto;
+  las páginas de contacto (/contacto, /aviso-legal...) tienen email,
+  teléfono y CIF.
+
+Con --latency-ms se añade una espera a cada respuesta para simular la red.
+
+Uso (desde backend/), para probarlo a mano:
+    python -m benchmarks.fake_servers --port 8799
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import VOCABULARY
+
+PARAGRAPHS_PER_PAGE = 40  # ~20 KB de HTML por portada
+
+
+def _rng(*parts) -> random.Random:
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+
+def search_results(query: str, existing_leads: int) -> dict:
+    """Respuesta de Google Custom Search para una consulta."""
+    rng = _rng("google", query)
+    slug = "-".join(query.lower().split())[:40] or "q"
+    links = [f"https://www.{slug}-{k}.example/" for k in range(6)]
+    links += [f"https://site{rng.randrange(max(existing_leads, 1))}.test/producto" for _ in range(2)]
+    links += ["https://www.amazon.es/dp/B000TEST", "https://www.youtube.com/watch?v=test"]
+
+    return {
+        "items": [
+            {
+                "link": link,
+                "title": " ".join(rng.sample(VOCABULARY, 4)).title(),
+                "snippet": " ".join(rng.choices(VOCABULARY, k=25)),
+            }
+            for link in links
+        ]
+    }
+
+
+def home_page(site: str) -> str:
+    rng = _rng("site", site)
+    words = rng.sample(VOCABULARY, 8)
+    paragraphs = "\n".join(
+        f"<p>{' '.join(rng.choices(VOCABULARY, k=60))}</p>" for _ in range(PARAGRAPHS_PER_PAGE)
+    )
+    return f"""<!DOCTYPE html>
+<html lang="es"><head>
+<title>{' '.join(words[:3]).title()} | Tienda {site}</title>
+<meta name="keywords" content="{', '.join(' '.join(rng.sample(VOCABULARY, 2)) for _ in range(6))}">
+<meta name="description" content="{' '.join(rng.choices(VOCABULARY, k=20))}">
+</head><body>
+<h1>{' '.join(words[:3])}</h1><h1>{' '.join(words[3:5])}</h1>
+{''.join(f'<h2>{" ".join(rng.sample(VOCABULARY, 3))}</h2>' for _ in range(5))}
+{paragraphs}
+<footer><a href="/contacto">Contacto</a> <a href="/aviso-legal">Aviso legal</a></footer>
+</body></html>"""
+
+
+def contact_page(path: str) -> str:
+    rng = _rng("contact", path)
+    company = "-".join(rng.sample(VOCABULARY, 2))
+    phone = f"6{rng.randrange(10**8):08d}"
+    return f"""<!DOCTYPE html>
+<html lang="es"><head><title>Contacto</title></head><body>
+<h1>Contacto</h1>
+<p>Escríbenos a <a href="mailto:info@{company}.es">info@{company}.es</a>
+o llámanos al {phone[:3]} {phone[3:5]} {phone[5:7]} {phone[7:]}.</p>
+<p>Razón social: {company.title()} S.L. - CIF B{rng.randrange(10**8):08d}</p>
+</body></html>"""
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    server_version = "OsmoleadsBench/1.0"
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        parsed = urlparse(self.path)
+        if parsed.path == "/customsearch/v1":
+            query = parse_qs(parsed.query).get("q", [""])[0]
+            self._send(200, "application/json", json.dumps(search_results(query, self.server.existing_leads)))
+            return
+
+        parts = [part for part in parsed.path.split("/") if part]
+        if not parts or parts[0] == "s":
+            site = parts[1] if len(parts) > 1 else "root"
+            self._send(200, "text/html; charset=utf-8", home_page(site))
+        else:
+            self._send(200, "text/html; charset=utf-8", contact_page(parsed.path))
+
+    def _send(self, status: int, content_type: str, body: str):
+        payload = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # Sin log por petición
+
+
+class FakeServer:
+    """Servidor en un hilo de fondo (se usa como context manager)."""
+
+    def __init__(self, port: int = 8799, latency_ms: float = 0, existing_leads: int = 0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), FakeHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency_ms / 1000
+        self.httpd.existing_leads = existing_leads
+        self.url = f"http://127.0.0.1:{port}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def google_url(self) -> str:
+        return f"{self.url}/customsearch/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Google y granja de webs falsos para benchmarks")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    with FakeServer(args.port, args.latency_ms) as server:
+        print(f"Escuchando en {server.url} (Ctrl+C para parar)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
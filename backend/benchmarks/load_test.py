@@ -0,0 +1,145 @@
+"""
+Prueba de carga de la API con tráfico mixto.
+Lanza peticiones concurrentes contra un servidor en marcha (listado de
+leads, búsqueda en leads, estadísticas, países, keywords y detalle de
+lead) y mide la latencia por ruta.
+
+Para comparar el antes/después de un cambio, arrancar la API de cada
+commit (p. ej. con git worktree) contra una base con los mismos datos y
+lanzar la prueba con la misma concurrencia y duración. Las peticiones que
+superan --timeout cuentan como errores de su ruta.
+
+Uso (desde backend/, con la API arrancada):
+    python -m benchmarks.load_test --url http://localhost:8000 --country 1
+    python -m benchmarks.load_test --concurrency 100 --duration 60 --timeout 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from app.core.config import settings
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por interpolación lineal."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def build_requests(country_id: int, lead_ids: List[int]) -> List[tuple]:
+    """
+    Mezcla de tráfico: (peso, nombre de ruta, método, path, parámetros).
+    Las rutas de lectura dominan, como en el uso normal del panel.
+    """
+    requests = [
+        (30, "leads.list", "GET", f"/api/leads/country/{country_id}", {"tab": "new", "limit": 100}),
+        (10, "leads.search", "GET", f"/api/leads/country/{country_id}", {"search": "agua", "limit": 50}),
+        (15, "leads.stats", "GET", f"/api/leads/country/{country_id}/stats", None),
+        (15, "countries.list", "GET", "/api/countries", None),
+        (10, "keywords.list", "GET", f"/api/keywords/country/{country_id}", None),
+        (5, "search.stats", "GET", "/api/search/stats", None),
+    ]
+    if lead_ids:
+        requests.append((15, "leads.detail", "GET", "/api/leads/{lead_id}", None))
+    return requests
+
+
+async def worker(
+    client: httpx.AsyncClient,
+    requests: List[tuple],
+    lead_ids: List[int],
+    deadline: float,
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int]
+):
+    """Envía peticiones aleatorias (según pesos) hasta el final de la prueba."""
+    weights = [weight for weight, *_ in requests]
+
+    while time.perf_counter() < deadline:
+        _, name, method, path, params = random.choices(requests, weights=weights)[0]
+        if "{lead_id}" in path:
+            path = path.format(lead_id=random.choice(lead_ids))
+
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, params=params)
+            if response.status_code >= 400:
+                errors[name] += 1
+        except httpx.HTTPError:
+            errors[name] += 1
+            continue
+        latencies[name].append((time.perf_counter() - start) * 1000)
+
+
+async def run(args) -> dict:
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+        login = await client.post("/api/auth/verify-pin", json={"pin": args.pin})
+        login.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+
+        leads = await client.get(f"/api/leads/country/{args.country}", params={"limit": 500})
+        lead_ids = [lead["id"] for lead in leads.json()] if leads.status_code == 200 else []
+
+        requests = build_requests(args.country, lead_ids)
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        errors: Dict[str, int] = defaultdict(int)
+
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*[
+            worker(client, requests, lead_ids, deadline, latencies, errors)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+    routes = {}
+    for name in sorted(set(latencies) | set(errors)):
+        values = latencies.get(name, [])
+        routes[name] = {
+            "requests": len(values),
+            "errors": errors.get(name, 0),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+            "mean_ms": round(statistics.fmean(values), 2) if values else 0.0,
+        }
+
+    total = sum(route["requests"] for route in routes.values())
+    return {
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "timeout_s": args.timeout,
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "requests_per_second": round(total / elapsed, 1) if elapsed else 0.0,
+        "routes": routes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de Osmoleads")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--pin", default=settings.ACCESS_PIN)
+    parser.add_argument("--country", type=int, default=1, help="ID del país a consultar")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="Segundos de prueba")
+    parser.add_argument("--timeout", type=float, default=30, help="Segundos máximos por petición")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
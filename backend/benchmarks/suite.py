@@ -0,0 +1,327 @@
+"""
+Suite de benchmarks reproducible de los caminos calientes.
+
+Genera (o reutiliza) un conjunto de datos sintético del tamaño indicado,
+arranca un Google Custom Search y una granja de webs locales
+(benchmarks/fake_servers.py) y mide:
+
+- leads.list / leads.search / leads.stats: endpoints de la API (en proceso,
+  con httpx.ASGITransport, incluidos middlewares y serialización).
+- search.process: una búsqueda de Google completa (llamada, clasificación y
+  guardado de los leads). Los leads y registros creados se borran al final
+  para que la base de datos quede igual entre ejecuciones.
+- contact.extract: extracción de contacto de una web (sin la pausa entre
+  páginas de SCRAPING_DELAY).
+- suggestions.analyze: análisis incremental de webs para sugerir keywords
+  (cada ejecución analiza leads aún no analizados). Los análisis, el
+  agregado de términos y las sugerencias se borran al final.
+- export.xlsx: exportación a Excel de todos los leads del país principal.
+
+El resultado es un JSON con el commit, el tamaño de los datos y los
+percentiles por benchmark; benchmarks/compare.py compara dos resultados.
+
+Por defecto usa una base de datos SQLite en benchmarks/data/ (una por
+tamaño, se reutiliza entre ejecuciones), con el driver aiosqlite de
+requirements.txt para los endpoints. Para medir PostgreSQL, pasar una
+base de datos vacía con --database-url.
+
+Uso (desde backend/):
+    python -m benchmarks.suite --leads 10000
+    python -m benchmarks.suite --leads 100000 --output bench_100k.json
+    python -m benchmarks.suite --leads 1000000 --only leads.list leads.stats export.xlsx
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+BENCHMARKS = [
+    "leads.list", "leads.search", "leads.stats", "search.process",
+    "contact.extract", "suggestions.analyze", "export.xlsx",
+]
+DATA_DIR = Path(__file__).resolve().parent / "data"
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de Osmoleads")
+    parser.add_argument("--leads", type=int, default=10_000, help="Tamaño del conjunto de datos (10000, 100000, 1000000)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", default=None, help="Por defecto, SQLite en benchmarks/data/")
+    parser.add_argument("--regenerate", action="store_true", help="Vuelve a generar los datos (solo la SQLite por defecto)")
+    parser.add_argument("--port", type=int, default=8799, help="Puerto del Google y la granja de webs falsos")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latencia simulada de los servidores falsos")
+    parser.add_argument("--runs", type=int, default=20, help="Repeticiones por benchmark")
+    parser.add_argument("--export-runs", type=int, default=None, help="Repeticiones de export.xlsx")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--output", default=None, help="Fichero donde guardar el JSON")
+    return parser.parse_args()
+
+
+def git_revision() -> Dict:
+    def git(*args) -> str:
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "."))}
+
+
+def summarize(durations: List[float], extra: Dict) -> Dict:
+    from benchmarks.load_test import percentile
+
+    milliseconds = [duration * 1000 for duration in durations]
+    return {
+        "runs": len(milliseconds),
+        "p50_ms": round(percentile(milliseconds, 50), 2),
+        "p95_ms": round(percentile(milliseconds, 95), 2),
+        "mean_ms": round(statistics.mean(milliseconds), 2),
+        "min_ms": round(min(milliseconds), 2),
+        **extra
+    }
+
+
+async def timed(func: Callable[[], Awaitable[Optional[Dict]]], runs: int, warmup: int = 1) -> Dict:
+    """Ejecuta func runs veces (tras el calentamiento) y resume las duraciones."""
+    for _ in range(warmup):
+        await func()
+
+    durations = []
+    extra = {}
+    for _ in range(runs):
+        start = time.perf_counter()
+        extra = await func() or {}
+        durations.append(time.perf_counter() - start)
+    return summarize(durations, extra)
+
+
+def prepare_database(args, database_url: str, farm_url: str) -> Dict:
+    """Crea el esquema y genera los datos si la base de datos no los tiene ya."""
+    from app.core.database import engine, run_migrations
+    from app.core.seed import seed_defaults
+    from benchmarks import synthetic
+
+    wanted = synthetic.dataset_id(args.leads, args.seed, farm_url)
+    default_sqlite = args.database_url is None
+
+    if default_sqlite:
+        path = Path(database_url.replace("sqlite:///", "", 1))
+        if path.exists() and not args.regenerate:
+            try:
+                current = synthetic.current_dataset(engine)
+            except Exception:
+                current = ""
+            if current != wanted:
+                args.regenerate = True
+        engine.dispose()
+        if args.regenerate:
+            path.unlink(missing_ok=True)
+
+    run_migrations()
+    with engine.begin() as connection:
+        seed_defaults(connection)
+
+    if synthetic.current_dataset(engine) == wanted:
+        return {"dataset": wanted, "reused": True}
+
+    if synthetic.has_leads(engine):
+        raise SystemExit(
+            "La base de datos ya tiene leads de otro conjunto de datos: "
+            "usa una base de datos vacía o la SQLite por defecto con --regenerate"
+        )
+
+    start = time.perf_counter()
+    counts = synthetic.generate(engine, args.leads, farm_url, args.seed)
+    return {
+        "dataset": wanted,
+        "reused": False,
+        "generate_seconds": round(time.perf_counter() - start, 1),
+        **counts
+    }
+
+
+async def run_benchmarks(args, server) -> Dict:
+    import httpx
+    from sqlalchemy import delete, func, select
+
+    from app.core.database import AsyncSessionLocal, async_engine
+    from app.core.executors import shutdown_executors, start_executors
+    from app.core.security import create_access_token
+    from app.main import app
+    from app.models.country import Country
+    from app.models.keyword import Keyword
+    from app.models.keyword_suggestion import KeywordSuggestion
+    from app.models.lead import Lead
+    from app.models.lead_analysis import KeywordTermStat, LeadAnalysis
+    from app.models.search_log import SearchLog
+    from app.services.google_search import GoogleSearchService
+    from app.services.scraper import ScraperService
+
+    GoogleSearchService.BASE_URL = server.google_url
+    start_executors()
+
+    async with AsyncSessionLocal() as db:
+        country_id = await db.scalar(select(Country.id).order_by(Country.id))
+        keyword_ids = (await db.scalars(
+            select(Keyword.id).where(Keyword.country_id == country_id).order_by(Keyword.id)
+        )).all()
+        lead_urls = (await db.scalars(
+            select(Lead.url).where(Lead.country_id == country_id).order_by(Lead.id).limit(args.runs + 1)
+        )).all()
+        last_log_id = await db.scalar(select(func.max(SearchLog.id))) or 0
+
+    results = {}
+    export_runs = args.export_runs or (3 if args.leads <= 100_000 else 1)
+    headers = {"Authorization": f"Bearer {create_access_token()}"}
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench", headers=headers, timeout=None
+    ) as client:
+
+        async def request(method: str, path: str, **params) -> httpx.Response:
+            response = await client.request(method, path, params=params)
+            response.raise_for_status()
+            return response
+
+        async def list_leads():
+            response = await request("GET", f"/api/leads/country/{country_id}", tab="new", limit=100)
+            return {"rows": len(response.json())}
+
+        async def search_leads():
+            response = await request("GET", f"/api/leads/country/{country_id}", search="osmosis", limit=50)
+            return {"rows": len(response.json())}
+
+        async def lead_stats():
+            await request("GET", f"/api/leads/country/{country_id}/stats")
+
+        search_round = 0
+        created_lead_ids = []
+
+        async def process_search():
+            nonlocal search_round
+            keyword_id = keyword_ids[search_round % len(keyword_ids)]
+            search_round += 1
+            async with AsyncSessionLocal() as db:
+                keyword = await db.get(Keyword, keyword_id)
+                service = await GoogleSearchService.create(db)
+                service.max_searches = 0  # Sin límite diario
+                result = await service.search(keyword)
+            if not result["success"]:
+                raise RuntimeError(result["error"])
+            created_lead_ids.extend(item["lead_id"] for item in result["results"] if item["is_new"])
+            return {"results": result["total_results"], "new_leads": result["new_leads"]}
+
+        url_round = 0
+        scraper = ScraperService()
+        scraper.delay = 0
+
+        async def extract_contact():
+            nonlocal url_round
+            url = lead_urls[url_round % len(lead_urls)]
+            url_round += 1
+            result = await scraper.extract_contact_info(url)
+            return {"pages": len(result["pages_visited"]), "found_email": bool(result["email"])}
+
+        analyzed = False
+
+        async def analyze_suggestions():
+            nonlocal analyzed
+            analyzed = True
+            data = (await request("POST", f"/api/suggestions/analyze/{country_id}", limit=20)).json()
+            return {
+                "leads": data.get("leads_analyzed"),
+                "keywords_found": data.get("keywords_found"),
+                "leads_per_second": data.get("leads_per_second")
+            }
+
+        async def export_xlsx():
+            response = await request("GET", f"/api/leads/country/{country_id}/export", format="xlsx")
+            return {"bytes": len(response.content)}
+
+        benchmarks = {
+            "leads.list": (list_leads, args.runs),
+            "leads.search": (search_leads, args.runs),
+            "leads.stats": (lead_stats, args.runs),
+            "search.process": (process_search, args.runs),
+            "contact.extract": (extract_contact, args.runs),
+            "suggestions.analyze": (analyze_suggestions, max(1, args.runs // 4)),
+            "export.xlsx": (export_xlsx, export_runs),
+        }
+
+        try:
+            for name in BENCHMARKS:
+                if name not in args.only:
+                    continue
+                func, runs = benchmarks[name]
+                print(f"{name}...", file=sys.stderr)
+                results[name] = await timed(func, runs)
+
+        finally:
+            # Dejar la base de datos como estaba (las búsquedas crean leads y
+            # registros, y el análisis de webs guarda su estado y sugerencias)
+            async with AsyncSessionLocal() as db:
+                if search_round:
+                    if created_lead_ids:
+                        await db.execute(delete(Lead).where(Lead.id.in_(created_lead_ids)))
+                    await db.execute(delete(SearchLog).where(SearchLog.id > last_log_id))
+                if analyzed:
+                    for model in (LeadAnalysis, KeywordTermStat, KeywordSuggestion):
+                        await db.execute(delete(model).where(model.country_id == country_id))
+                await db.commit()
+
+            shutdown_executors()
+            await async_engine.dispose()
+
+    return results
+
+
+def main():
+    args = parse_args()
+
+    database_url = args.database_url
+    if database_url is None:
+        DATA_DIR.mkdir(exist_ok=True)
+        database_url = f"sqlite:///{DATA_DIR / f'bench_{args.leads}.db'}"
+
+    # La configuración de la aplicación se lee al importarla
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["PROFILING_ENABLED"] = "false"
+
+    from benchmarks.fake_servers import FakeServer
+
+    with FakeServer(args.port, args.latency_ms, existing_leads=args.leads) as server:
+        setup = prepare_database(args, database_url, server.url)
+        results = asyncio.run(run_benchmarks(args, server))
+
+    report = {
+        **git_revision(),
+        "created_at": datetime.utcnow().isoformat(),
+        "leads": args.leads,
+        "database": database_url.split(":", 1)[0],
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "latency_ms": args.latency_ms,
+        "setup": setup,
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Datos sintéticos para los benchmarks: países, keywords, leads, notas y
+registros de búsqueda, generados de forma determinista (misma semilla =
+mismos datos) e insertados por lotes con el engine síncrono.
+
+Las URLs de los leads apuntan a la granja de webs local
+(benchmarks/fake_servers.py) para que el scraper y el análisis de webs
+tengan algo que descargar.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+
+from app.models.country import Country
+from app.models.keyword import Keyword
+from app.models.lead import Lead, LeadTab
+from app.models.note import Note
+from app.models.search_log import SearchLog
+from app.models.settings import AppSettings
+from app.models.status import LeadStatus
+
+BATCH_SIZE = 10_000
+DATASET_KEY = "benchmark_dataset"
+
+COUNTRIES = [
+    # (nombre, código, idioma, peso en el reparto de leads)
+    ("España", "ES", "es", 0.7),
+    ("Francia", "FR", "fr", 0.2),
+    ("Portugal", "PT", "pt", 0.1),
+]
+KEYWORDS_PER_COUNTRY = 40
+
+# Reparto de leads por pestaña
+TAB_WEIGHTS = [
+    (LeadTab.NEW, 40), (LeadTab.LEADS, 30), (LeadTab.DOUBTS, 10),
+    (LeadTab.DISCARDED, 15), (LeadTab.MARKETPLACE, 5),
+]
+
+VOCABULARY = [
+    "osmosis", "inversa", "filtro", "filtros", "agua", "descalcificador", "purificador",
+    "depuradora", "cartucho", "membrana", "grifo", "domestico", "industrial", "piscina",
+    "tratamiento", "instalacion", "mantenimiento", "calidad", "potable", "cal",
+    "fontaneria", "bombas", "presion", "deposito", "recambios", "ozono", "ultravioleta",
+    "carbon", "activo", "sedimentos", "hosteleria", "oficina", "fuente", "dispensador",
+]
+NOTE_TEXTS = [
+    "Llamar la semana que viene", "Pidió presupuesto", "No contesta", "Interesado en distribución",
+    "Ya trabaja con la competencia", "Enviar catálogo por email", "Volver a contactar en septiembre",
+]
+
+
+def dataset_id(leads: int, seed: int, farm_url: str) -> str:
+    return f"{leads}:{seed}:{farm_url}"
+
+
+def current_dataset(engine: Engine) -> str:
+    """Marca del conjunto de datos cargado ('' si no hay ninguno)."""
+    with engine.connect() as connection:
+        return connection.scalar(select(AppSettings.value).where(AppSettings.key == DATASET_KEY)) or ""
+
+
+def has_leads(engine: Engine) -> bool:
+    with engine.connect() as connection:
+        return bool(connection.scalar(select(func.count(Lead.id))))
+
+
+def _insert_batches(connection, table, rows):
+    """Inserta un iterable de filas en lotes de BATCH_SIZE."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            connection.execute(insert(table), batch)
+            batch = []
+    if batch:
+        connection.execute(insert(table), batch)
+
+
+def generate(engine: Engine, leads: int, farm_url: str, seed: int = 42) -> Dict:
+    """
+    Genera el conjunto de datos en una base de datos vacía (con el esquema y
+    los datos por defecto ya creados).
+
+    Returns:
+        Dict con el número de filas generadas por tabla
+    """
+    rng = random.Random(seed)
+    now = datetime(2026, 1, 1)
+    tabs = [tab for tab, _ in TAB_WEIGHTS]
+    tab_weights = [weight for _, weight in TAB_WEIGHTS]
+
+    with engine.begin() as connection:
+        status_ids: List[int] = list(connection.scalars(select(LeadStatus.id)))
+
+        country_ids = []
+        for name, code, language, _ in COUNTRIES:
+            country_ids.append(connection.execute(
+                insert(Country).values(name=name, code=code, language=language, is_active=True, created_at=now)
+            ).inserted_primary_key[0])
+
+        keyword_rows = []
+        for country_id in country_ids:
+            for i in range(KEYWORDS_PER_COUNTRY):
+                text = " ".join(rng.sample(VOCABULARY, 2)) + f" {i}"
+                keyword_rows.append({
+                    "country_id": country_id, "text": text, "category": "sintética",
+                    "results_per_search": 10, "is_active": True, "total_searches": 0,
+                    "total_results": 0, "created_at": now
+                })
+        connection.execute(insert(Keyword), keyword_rows)
+        keyword_ids = {
+            country_id: list(connection.scalars(select(Keyword.id).where(Keyword.country_id == country_id)))
+            for country_id in country_ids
+        }
+
+        country_weights = [weight for *_, weight in COUNTRIES]
+
+        def lead_rows():
+            for i in range(leads):
+                country_id = rng.choices(country_ids, country_weights)[0]
+                words = rng.sample(VOCABULARY, 3)
+                found_at = now - timedelta(minutes=rng.randrange(365 * 24 * 60))
+                yield {
+                    "country_id": country_id,
+                    "keyword_id": rng.choice(keyword_ids[country_id]),
+                    "status_id": rng.choice(status_ids) if status_ids and rng.random() < 0.6 else None,
+                    "name": f"{' '.join(words).title()} {i}",
+                    "url": f"{farm_url}/s/{i}/",
+                    "domain": f"site{i}.test",
+                    "snippet": " ".join(rng.choices(VOCABULARY, k=20)),
+                    "email": f"info@site{i}.test" if rng.random() < 0.3 else None,
+                    "phone": f"+34 6{rng.randrange(10**8):08d}" if rng.random() < 0.3 else None,
+                    "cif": None,
+                    "tab": rng.choices(tabs, tab_weights)[0],
+                    "is_reviewed": rng.random() < 0.5,
+                    "found_at": found_at,
+                    "updated_at": found_at,
+                    "contact_extracted": False,
+                }
+
+        _insert_batches(connection, Lead.__table__, lead_rows())
+
+        # Una nota por cada dos leads (los ids son consecutivos en una base vacía)
+        first_lead_id = connection.scalar(select(func.min(Lead.id)))
+        notes = leads // 2
+
+        def note_rows():
+            for i in range(notes):
+                created_at = now - timedelta(minutes=rng.randrange(180 * 24 * 60))
+                yield {
+                    "lead_id": first_lead_id + i * 2,
+                    "content": rng.choice(NOTE_TEXTS),
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+
+        _insert_batches(connection, Note.__table__, note_rows())
+
+        # Historial de búsquedas de los últimos 90 días
+        search_logs = max(leads // 10, 100)
+
+        def search_log_rows():
+            for _ in range(search_logs):
+                country_id = rng.choices(country_ids, country_weights)[0]
+                results = rng.randrange(11)
+                yield {
+                    "country_id": country_id,
+                    "keyword_id": rng.choice(keyword_ids[country_id]),
+                    "keyword_text": "búsqueda sintética",
+                    "results_count": results,
+                    "new_leads_count": rng.randrange(results + 1),
+                    "is_success": rng.random() < 0.97,
+                    "searched_at": now - timedelta(minutes=rng.randrange(90 * 24 * 60)),
+                }
+
+        _insert_batches(connection, SearchLog.__table__, search_log_rows())
+
+        connection.execute(insert(AppSettings).values(
+            key=DATASET_KEY, value=dataset_id(leads, seed, farm_url),
+            description="Conjunto de datos sintético de los benchmarks"
+        ))
+
+    return {
+        "countries": len(country_ids),
+        "keywords": len(keyword_rows),
+        "leads": leads,
+        "notes": notes,
+        "search_logs": search_logs,
+    }
@@ -254,9 +254,9 @@ function CountryView() {
       <div className="bg-white rounded-xl shadow-sm border border-gray-100 p-6 mb-6">
         <div className="flex flex-wrap items-center justify-between gap-4">
           <div className="flex items-center gap-4">
-            {country?.flag_image ? (
+            {country?.flag_url ? (
               <img
-                src={country.flag_image}
+                src={country.flag_url}
                 alt={country.name}
                 className="w-14 h-14 rounded-xl object-cover"
               />
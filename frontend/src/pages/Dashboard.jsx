@@ -259,9 +259,9 @@ function CountryCard({ country, onEdit, onDelete, onClick }) {
       <div className="p-6">
         <div className="flex items-start justify-between mb-4">
           <div className="flex items-center gap-3">
-            {country.flag_image ? (
+            {country.flag_url ? (
               <img
-                src={country.flag_image}
+                src={country.flag_url}
                 alt={country.name}
                 className="w-10 h-10 rounded-lg object-cover"
               />
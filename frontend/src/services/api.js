@@ -77,18 +77,33 @@ export const leadsAPI = {
   move: (id, tab) => api.post(`/leads/${id}/move/${tab}`),
   extractContact: (id) => api.post(`/leads/${id}/extract-contact`),
   delete: (id) => api.delete(`/leads/${id}`),
+  // Operaciones masivas (selection = { lead_ids } o { country_id, tab, ... })
+  bulkMove: (selection, tab) => api.post('/leads/bulk/move', { selection, tab }),
+  bulkStatus: (selection, statusId) =>
+    api.post('/leads/bulk/status', { selection, status_id: statusId }),
+  bulkReview: (selection, isReviewed = true) =>
+    api.post('/leads/bulk/review', { selection, is_reviewed: isReviewed }),
+  bulkDelete: (selection) => api.post('/leads/bulk/delete', { selection }),
   // Notas
   getNotes: (leadId) => api.get(`/leads/${leadId}/notes`),
   createNote: (leadId, content) => api.post(`/leads/${leadId}/notes`, { content }),
   deleteNote: (leadId, noteId) => api.delete(`/leads/${leadId}/notes/${noteId}`),
   // Exportar
-  export: (countryId, tab = null) => {
-    const params = tab ? { tab } : {}
+  export: (countryId, tab = null, format = 'xlsx') => {
+    const params = tab ? { tab, format } : { format }
     return api.get(`/leads/country/${countryId}/export`, {
       params,
       responseType: 'blob',
     })
   },
+  // Exportación en segundo plano (devuelve job_id; consultar hasta status 'done')
+  createExportJob: (countryId, tab = null, format = 'xlsx') =>
+    api.post(`/leads/country/${countryId}/export-jobs`, null, {
+      params: tab ? { tab, format } : { format },
+    }),
+  getExportJob: (jobId) => api.get(`/leads/export-jobs/${jobId}`),
+  downloadExportJob: (jobId) =>
+    api.get(`/leads/export-jobs/${jobId}/download`, { responseType: 'blob' }),
   exportAll: (countryId) =>
     api.get(`/leads/country/${countryId}/export-all`, { responseType: 'blob' }),
 }